@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Account', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incremented to revoke all API tokens issued to this user.'),
+        ),
+    ]
@@ -32,6 +32,7 @@ class CustomUser(AbstractUser):
     last_activity = models.DateTimeField(null=True, blank=True)
     login_ip = models.GenericIPAddressField(null=True, blank=True)
     two_factor_enabled = models.BooleanField(default=False)
+    token_version = models.PositiveIntegerField(default=0, editable=False, help_text="Incremented to revoke all API tokens issued to this user.")
     class Meta:
         verbose_name = 'Custom User'
         verbose_name_plural = 'Custom Users'
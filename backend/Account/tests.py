@@ -1,3 +1,92 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from utils.ratelimit import LocalCounterStore, hit, reset
+from .models import CustomUser
+
+RATES = {
+    'login': '100/min',
+    'login_username': '2/min',
+    'register': '1/hour',
+    'password_reset': '100/hour',
+    'password_reset_email': '1/hour',
+}
+
+
+class SlidingWindowTests(TestCase):
+    def test_previous_window_is_weighted_by_overlap(self):
+        store = LocalCounterStore()
+        attempts = [hit('test', 'ip', rate='3/min', store=store, now=60 + offset)[0] for offset in (0, 1, 2, 3)]
+        self.assertEqual(attempts, [True, True, True, False])
+        # 30s into the next window, half of the previous 4 hits still count.
+        self.assertEqual(hit('test', 'ip', rate='3/min', store=store, now=150), (True, 0))
+        allowed, retry_after = hit('test', 'ip', rate='3/min', store=store, now=151)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertTrue(hit('test', 'other-ip', rate='3/min', store=store, now=151)[0])
+
+    def test_denied_attempts_do_not_extend_the_limit(self):
+        store = LocalCounterStore()
+        attempts = [hit('test', 'user', rate='2/min', store=store, now=60 + offset, count_denied=False)[0] for offset in range(5)]
+        self.assertEqual(attempts, [True, True, False, False, False])
+        # Only the two allowed attempts carry over into the next window.
+        self.assertTrue(hit('test', 'user', rate='2/min', store=store, now=150, count_denied=False)[0])
+
+    def test_reset_forgets_counted_requests(self):
+        store = LocalCounterStore()
+        for offset in range(2):
+            hit('test', 'user', rate='2/min', store=store, now=60 + offset)
+        reset('test', 'user', rate='2/min', store=store, now=62)
+        self.assertTrue(hit('test', 'user', rate='2/min', store=store, now=63)[0])
+
+
+@override_settings(RATELIMIT_RATES=RATES)
+class AuthRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        CustomUser.objects.create_user(username="target", email="target@example.com", password="right-pass")
+
+    def test_login_attempts_per_username(self):
+        for _ in range(2):
+            response = self.client.post('/api/login/', {'username': "target", 'password': "wrong"}, format='json')
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post('/api/login/', {'username': "TARGET", 'password': "right-pass"}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        response = self.client.post('/api/login/', {'username': "someone-else", 'password': "wrong"}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_failed_logins_count_across_ips(self):
+        for ip in ('10.0.0.8', '10.0.0.9'):
+            response = self.client.post('/api/login/', {'username': "target", 'password': "wrong"}, format='json', REMOTE_ADDR=ip)
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post('/api/login/', {'username': "target", 'password': "wrong"}, format='json', REMOTE_ADDR='10.0.0.10')
+        self.assertEqual(response.status_code, 429)
+
+    def test_successful_login_resets_failures(self):
+        login = lambda password: self.client.post('/api/login/', {'username': "target", 'password': password}, format='json')
+        self.assertEqual(login("wrong").status_code, 401)
+        self.assertEqual(login("right-pass").status_code, 200)
+        self.assertEqual([login("wrong").status_code for _ in range(3)], [401, 401, 429])
+
+    def test_registration_per_ip(self):
+        payload = {'username': "first", 'email': "first@example.com", 'password': "A-long-passphrase-1"}
+        self.assertEqual(self.client.post('/api/register/', payload, format='json').status_code, 201)
+        payload = {'username': "second", 'email': "second@example.com", 'password': "A-long-passphrase-1"}
+        self.assertEqual(self.client.post('/api/register/', payload, format='json').status_code, 429)
+        self.assertFalse(CustomUser.objects.filter(username="second").exists())
+
+    def test_password_reset_per_email(self):
+        url = '/api/password_reset/request/'
+        self.assertNotEqual(self.client.post(url, {'email': "target@example.com"}, format='json').status_code, 429)
+        response = self.client.post(url, {'email': "Target@example.com"}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()['error'], 'Too many requests. Please try again later.')
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_can_be_disabled(self):
+        for _ in range(3):
+            response = self.client.post('/api/login/', {'username': "target", 'password': "wrong"}, format='json')
+            self.assertEqual(response.status_code, 401)
@@ -16,12 +16,16 @@ import json
 import os
 # Import your custom mail utility
 # Ensure 'myapp.mail' matches the actual path to your mail.py file
-from utils.mail import trigger_email
+from utils.mail import queue_email
+from utils.ratelimit import json_field, ratelimit
+from courses.authentication import revoke_tokens
 from django.core.mail import send_mail, BadHeaderError
 
 User = get_user_model()
 
 @csrf_exempt # IMPORTANT: For production, use Django REST Framework or proper CSRF token handling.
+@ratelimit('password_reset')
+@ratelimit('password_reset_email', key=json_field('email'))
 def password_reset_request_api(request):
     """
     API endpoint to initiate the password reset process.
@@ -77,8 +81,8 @@ def password_reset_request_api(request):
         print("Email context:", email_context)
 
         try:
-            # Call your custom email utility function
-            email_sent_error = trigger_email(
+            # Queue the email; the outbox worker inlines CSS and talks to SMTP
+            email_sent_error = queue_email(
                 context=email_context,
                 template='emails/password_reset_email.html', # Fixed template path
                 subject='Password Reset for your SHP-Learner account',
@@ -86,7 +90,7 @@ def password_reset_request_api(request):
                 message="Please use the link below to reset your password." # Plain text fallback
             )
         except Exception as e:
-            print("Exception in trigger_email:", e)
+            print("Exception in queue_email:", e)
             return JsonResponse({'error': f'Failed to send password reset email: {str(e)}'}, status=500)
 
         if email_sent_error:
@@ -100,6 +104,7 @@ def password_reset_request_api(request):
 
 
 @csrf_exempt # IMPORTANT: For production, use Django REST Framework or proper CSRF token handling.
+@ratelimit('password_reset_confirm')
 def password_reset_confirm_api(request, uidb64, token):
     """
     API endpoint to confirm password reset and set the new password.
@@ -140,6 +145,8 @@ def password_reset_confirm_api(request, uidb64, token):
             # Set the new password and save the user
             user.set_password(new_password1)
             user.save()
+            # Bearer tokens issued before the reset must stop working too.
+            revoke_tokens(user)
 
             # Optional: Update the user's session hash to keep them logged in
             # if they were authenticated when they requested the reset.
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from .models import CourseDailyStats, QuizDailyStats
+
+class CourseDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('course', 'date', 'enrollments', 'completions', 'computed_at')
+    list_filter = ('date',)
+    list_select_related = ('course',)
+    search_fields = ('course__title',)
+    date_hierarchy = 'date'
+
+class QuizDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('quiz', 'course', 'date', 'attempts', 'passed', 'score_total', 'computed_at')
+    list_filter = ('date',)
+    list_select_related = ('quiz', 'course')
+    search_fields = ('quiz__title', 'course__title')
+    date_hierarchy = 'date'
+
+admin.site.register(CourseDailyStats, CourseDailyStatsAdmin)
+admin.site.register(QuizDailyStats, QuizDailyStatsAdmin)
@@ -0,0 +1,37 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from Analytics.rollups import rollup, update_rollups
+
+
+class Command(BaseCommand):
+    help = 'Maintain the per-day course and quiz analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help='Recompute every day bucket from scratch')
+        parser.add_argument('--since', help='Recompute the buckets from this date (YYYY-MM-DD) on')
+        parser.add_argument('--loop', action='store_true', help='Keep folding new rows in')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between incremental updates')
+
+    def handle(self, *args, **options):
+        if options['since']:
+            day = parse_date(options['since'])
+            if day is None:
+                raise CommandError("--since must be a YYYY-MM-DD date.")
+            courses, quizzes = rollup(timezone.make_aware(datetime.combine(day, datetime.min.time())))
+        elif options['backfill']:
+            courses, quizzes = rollup()
+        else:
+            courses, quizzes = update_rollups()
+        self.stdout.write(f"Wrote {courses} course and {quizzes} quiz day bucket(s)")
+
+        while options['loop']:
+            time.sleep(options['interval'])
+            courses, quizzes = update_rollups()
+            self.stdout.write(f"Wrote {courses} course and {quizzes} quiz day bucket(s)")
+        self.stdout.write(self.style.SUCCESS("Analytics rollups are up to date."))
+# python manage.py rollup_analytics --backfill
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0005_course_neighbors'),
+        ('Quiz', '0003_userquizattempt_submitted_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('score_total', models.DecimalField(decimal_places=2, default=0, help_text='Sum of attempt scores; divide by attempts for the average.', max_digits=14)),
+                ('computed_at', models.DateTimeField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_daily_stats', to='courses.course')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='Quiz.quiz')),
+            ],
+            options={
+                'verbose_name_plural': 'Quiz daily stats',
+                'ordering': ['quiz', 'date'],
+                'indexes': [models.Index(fields=['course', 'date'], name='quizstats_course_date_idx')],
+                'unique_together': {('quiz', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.course')),
+            ],
+            options={
+                'verbose_name_plural': 'Course daily stats',
+                'ordering': ['course', 'date'],
+                'unique_together': {('course', 'date')},
+            },
+        ),
+    ]
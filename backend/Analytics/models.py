@@ -0,0 +1,50 @@
+from django.db import models
+
+from courses.models import Course
+from Quiz.models import Quiz
+
+
+class CourseDailyStats(models.Model):
+    """
+    Per-course, per-day enrollment and completion counts. Maintained by
+    Analytics/rollups.py; the analytics API reads only these rollups.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['course', 'date']
+        # The unique constraint doubles as the (course, date) range index.
+        unique_together = ('course', 'date')
+        verbose_name_plural = 'Course daily stats'
+
+    def __str__(self):
+        return f"{self.course_id} on {self.date}: {self.enrollments} enrolled, {self.completions} completed"
+
+
+class QuizDailyStats(models.Model):
+    """
+    Per-quiz, per-day attempt outcomes. `course` is copied from the quiz's
+    lesson so course dashboards need no join.
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='daily_stats')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='quiz_daily_stats')
+    date = models.DateField()
+    attempts = models.PositiveIntegerField(default=0)
+    passed = models.PositiveIntegerField(default=0)
+    score_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Sum of attempt scores; divide by attempts for the average.")
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['quiz', 'date']
+        unique_together = ('quiz', 'date')
+        indexes = [
+            models.Index(fields=['course', 'date'], name='quizstats_course_date_idx'),
+        ]
+        verbose_name_plural = 'Quiz daily stats'
+
+    def __str__(self):
+        return f"{self.quiz_id} on {self.date}: {self.passed}/{self.attempts} passed"
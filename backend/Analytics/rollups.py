@@ -0,0 +1,144 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Enrollment.models import Enrollment
+from Quiz.models import UserQuizAttempt
+from .models import CourseDailyStats, QuizDailyStats
+
+# Rows this much older than the last rollup are looked at again, to catch
+# those whose transaction committed after the rollup read.
+UPDATE_OVERLAP = timedelta(minutes=5)
+
+
+def _daily(queryset, field, start, *group, **aggregates):
+    """Grouped per-day aggregate of `queryset` over the date of `field`, from `start` on."""
+    if start is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    return (
+        queryset.order_by().annotate(day=TruncDate(field))
+        .values(*group, 'day').annotate(**aggregates)
+    )
+
+
+def rollup(since=None):
+    """
+    Recompute every day bucket from the day of `since` on (every bucket when
+    None) with grouped TruncDate aggregates, and replace those buckets in
+    one transaction. Returns (course buckets, quiz buckets) written.
+    """
+    start_day = None if since is None else timezone.localdate(since)
+    start = None if since is None else timezone.make_aware(datetime.combine(start_day, time.min))
+
+    courses = defaultdict(lambda: {'enrollments': 0, 'completions': 0})
+    for row in _daily(Enrollment.objects.all(), 'enrolled_at', start, 'course_id', total=Count('pk')):
+        courses[row['course_id'], row['day']]['enrollments'] = row['total']
+    completed = Enrollment.objects.filter(completed_at__isnull=False)
+    for row in _daily(completed, 'completed_at', start, 'course_id', total=Count('pk')):
+        courses[row['course_id'], row['day']]['completions'] = row['total']
+    quizzes = _daily(
+        UserQuizAttempt.objects.all(), 'submitted_at', start, 'quiz_id', 'quiz__lesson__course_id',
+        attempts=Count('pk'), passed=Count('pk', filter=Q(passed=True)), score_total=Sum('score'),
+    )
+
+    now = timezone.now()
+    course_stats = [
+        CourseDailyStats(course_id=course_id, date=day, computed_at=now, **counts)
+        for (course_id, day), counts in courses.items()
+    ]
+    quiz_stats = [
+        QuizDailyStats(
+            quiz_id=row['quiz_id'], course_id=row['quiz__lesson__course_id'], date=row['day'], computed_at=now,
+            attempts=row['attempts'], passed=row['passed'], score_total=row['score_total'] or Decimal('0'),
+        )
+        for row in quizzes
+    ]
+    with transaction.atomic():
+        for model in (CourseDailyStats, QuizDailyStats):
+            stale = model.objects.all() if start_day is None else model.objects.filter(date__gte=start_day)
+            stale.delete()
+        CourseDailyStats.objects.bulk_create(course_stats, batch_size=1000)
+        QuizDailyStats.objects.bulk_create(quiz_stats, batch_size=1000)
+    return len(course_stats), len(quiz_stats)
+
+
+def update_rollups():
+    """
+    Fold rows created since the last rollup into the day buckets: only the
+    days from the last rollup on are recomputed, reading the new rows
+    through their date indexes. Backfills everything on first use.
+    """
+    last = max(
+        filter(None, (model.objects.aggregate(last=Max('computed_at'))['last'] for model in (CourseDailyStats, QuizDailyStats))),
+        default=None,
+    )
+    return rollup(None if last is None else last - UPDATE_OVERLAP)
+
+
+def summarize(counts):
+    """Counts plus the derived rates, with score_total turned into an average."""
+    attempts = counts['attempts']
+    return {
+        'enrollments': counts['enrollments'],
+        'completions': counts['completions'],
+        'completion_rate': round(counts['completions'] / counts['enrollments'], 4) if counts['enrollments'] else None,
+        'attempts': attempts,
+        'passed': counts['passed'],
+        'pass_rate': round(counts['passed'] / attempts, 4) if attempts else None,
+        'average_score': float(round(counts['score_total'] / attempts, 2)) if attempts else None,
+    }
+
+
+def course_report(course_ids, since, until):
+    """
+    Day series and totals for each course in `course_ids` between the
+    `since` and `until` dates (inclusive), read from the rollups only.
+    Returns {course_id: {'daily': [...], 'totals': {...}}}.
+    """
+    def empty():
+        return {'enrollments': 0, 'completions': 0, 'attempts': 0, 'passed': 0, 'score_total': Decimal('0')}
+
+    days = defaultdict(lambda: defaultdict(empty))
+    for course_id, day, enrollments, completions in CourseDailyStats.objects.filter(
+        course_id__in=course_ids, date__range=(since, until),
+    ).values_list('course_id', 'date', 'enrollments', 'completions'):
+        days[course_id][day].update(enrollments=enrollments, completions=completions)
+    for row in QuizDailyStats.objects.filter(course_id__in=course_ids, date__range=(since, until)).order_by().values(
+        'course_id', 'date',
+    ).annotate(attempts=Sum('attempts'), passed=Sum('passed'), score_total=Sum('score_total')):
+        days[row['course_id']][row['date']].update(attempts=row['attempts'], passed=row['passed'], score_total=row['score_total'])
+
+    report = {}
+    for course_id in course_ids:
+        totals = empty()
+        daily = []
+        for day, counts in sorted(days[course_id].items()):
+            for key in totals:
+                totals[key] += counts[key]
+            daily.append({'date': day, **summarize(counts)})
+        report[course_id] = {'daily': daily, 'totals': summarize(totals)}
+    return report
+
+
+def quiz_report(course_ids, since, until):
+    """Per-quiz totals for the quizzes of `course_ids` between two dates, from the rollups only."""
+    rows = QuizDailyStats.objects.filter(course_id__in=course_ids, date__range=(since, until)).order_by().values(
+        'quiz_id', 'quiz__title', 'course_id',
+    ).annotate(attempts=Sum('attempts'), passed=Sum('passed'), score_total=Sum('score_total')).order_by('course_id', 'quiz_id')
+    return [
+        {
+            'quiz': row['quiz_id'],
+            'title': row['quiz__title'],
+            'course': row['course_id'],
+            'attempts': row['attempts'],
+            'passed': row['passed'],
+            'pass_rate': round(row['passed'] / row['attempts'], 4) if row['attempts'] else None,
+            'average_score': float(round(row['score_total'] / row['attempts'], 2)) if row['attempts'] else None,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Account.models import CustomUser
+from Enrollment.models import Enrollment
+from Lesson.models import Lesson
+from Quiz.models import Quiz, UserQuizAttempt
+from courses.models import Course
+from .models import CourseDailyStats, QuizDailyStats
+from .rollups import rollup, update_rollups
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.instructor = CustomUser.objects.create_user(username="teach", password="pw", role="instructor")
+        self.course = Course.objects.create(title="Stats", short_description="Short", description="Long", instructor=self.instructor)
+        self.other = Course.objects.create(title="Elsewhere", short_description="Short", description="Long")
+        self.quiz = Quiz.objects.create(lesson=Lesson.objects.create(course=self.course, title="One", order=1), title="Check")
+        self.students = [CustomUser.objects.create_user(username=f"s{i}", password="pw") for i in range(3)]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+        Enrollment.objects.create(student=self.students[0], course=self.other)
+        Enrollment.objects.filter(student=self.students[0], course=self.course).update(is_completed=True, completed_at=timezone.now())
+        UserQuizAttempt.objects.create(student=self.students[0], quiz=self.quiz, score=Decimal('40.00'), passed=False)
+        UserQuizAttempt.objects.create(student=self.students[0], quiz=self.quiz, score=Decimal('90.00'), passed=True, attempt_number=2)
+
+    def test_backfill_builds_day_buckets(self):
+        self.assertEqual(rollup(), (2, 1))
+        stats = CourseDailyStats.objects.get(course=self.course)
+        self.assertEqual((stats.date, stats.enrollments, stats.completions), (timezone.localdate(), 3, 1))
+        quiz = QuizDailyStats.objects.get()
+        self.assertEqual((quiz.course_id, quiz.attempts, quiz.passed, quiz.score_total), (self.course.pk, 2, 1, Decimal('130.00')))
+
+    def test_update_only_recomputes_days_since_the_last_rollup(self):
+        old = timezone.now() - timedelta(days=10)
+        Enrollment.objects.update(enrolled_at=old)
+        Enrollment.objects.filter(completed_at__isnull=False).update(completed_at=old)
+        UserQuizAttempt.objects.update(submitted_at=old)
+        rollup()
+        old_bucket = CourseDailyStats.objects.get(course=self.course)
+
+        Enrollment.objects.create(student=self.students[1], course=self.other)
+        self.assertEqual(update_rollups(), (1, 0))
+        self.assertEqual(CourseDailyStats.objects.get(pk=old_bucket.pk).computed_at, old_bucket.computed_at)
+        self.assertEqual(CourseDailyStats.objects.get(course=self.other, date=timezone.localdate()).enrollments, 1)
+
+    def test_course_analytics_read_only_rollups(self):
+        call_command('rollup_analytics', '--backfill', stdout=StringIO())
+        self.client.force_authenticate(self.instructor)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/analytics/courses/')
+        sql = " ".join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('Enrollment_enrollment', sql)
+        self.assertNotIn('Quiz_userquizattempt', sql)
+
+        [course] = response.data['results']
+        self.assertEqual(course['course'], self.course.pk)
+        self.assertEqual(
+            {key: course['totals'][key] for key in ('enrollments', 'completions', 'completion_rate', 'attempts', 'pass_rate', 'average_score')},
+            {'enrollments': 3, 'completions': 1, 'completion_rate': 0.3333, 'attempts': 2, 'pass_rate': 0.5, 'average_score': 65.0},
+        )
+        self.assertEqual(len(course['daily']), 1)
+
+        quizzes = self.client.get('/api/analytics/quizzes/').data['results']
+        self.assertEqual([(quiz['title'], quiz['attempts'], quiz['average_score']) for quiz in quizzes], [("Check", 2, 65.0)])
+
+    def test_scoping_and_validation(self):
+        rollup()
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.client.get('/api/analytics/courses/').status_code, 403)
+        self.client.force_authenticate(self.instructor)
+        self.assertEqual(self.client.get('/api/analytics/courses/', {'course': self.other.pk}).data['results'], [])
+        self.assertEqual(self.client.get('/api/analytics/courses/', {'since': "last week"}).status_code, 400)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        response = self.client.get('/api/analytics/courses/', {'until': str(yesterday)})
+        self.assertEqual(response.data['results'][0]['totals']['enrollments'], 0)
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils.text import slugify
+from utils.slugs import save_with_unique_slug
 
 # Create your models here.
 
@@ -11,7 +12,9 @@ class Category(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            return save_with_unique_slug(
+                self, slugify(self.name), Category.objects.all(), lambda: super(Category, self).save(*args, **kwargs),
+            )
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.urls import reverse
+
+from Enrollment.models import Enrollment
+from courses.catalog_cache import get_cache
+from .models import Certificate
+
+TEMPLATE_NAME = 'certificates/certificate.html'
+
+
+def certificate_root():
+    return Path(getattr(settings, 'CERTIFICATE_ROOT', Path(settings.MEDIA_ROOT) / 'certificates'))
+
+
+def issue_certificates(batch_size=500):
+    """
+    Create certificates for completed enrollments that have none yet, one
+    batch at a time. Returns the newly issued certificates.
+    """
+    issued = []
+    while True:
+        enrollment_ids = list(
+            Enrollment.objects.filter(is_completed=True, certificate__isnull=True)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not enrollment_ids:
+            return issued
+        # bulk_create() skips Certificate.save(), so assign unique_id here.
+        # ignore_conflicts: another worker may have issued some meanwhile.
+        Certificate.objects.bulk_create(
+            [Certificate(enrollment_id=pk, unique_id=str(uuid.uuid4())) for pk in enrollment_ids],
+            ignore_conflicts=True,
+        )
+        issued.extend(Certificate.objects.filter(enrollment_id__in=enrollment_ids))
+
+
+def certificate_context(certificate):
+    enrollment = certificate.enrollment
+    student, course = enrollment.student, enrollment.course
+    backend_url = os.getenv('VITE_APP_BACKEND_URL')
+    return {
+        'unique_id': certificate.unique_id,
+        'student_name': student.get_full_name() or student.username,
+        'course_title': course.title,
+        'instructor_name': (course.instructor.get_full_name() or course.instructor.username) if course.instructor else '',
+        'issue_date': certificate.issue_date,
+        'verify_url': (
+            backend_url.rstrip('/') + reverse('certificate-verify', kwargs={'unique_id': certificate.unique_id})
+            if backend_url else ''
+        ),
+    }
+
+
+def document_path(context):
+    """
+    Where the rendered document for `context` is cached. The file name
+    carries a digest of the context and the template's modification time,
+    so renaming a course or editing the template re-renders on next request.
+    """
+    template = get_template(TEMPLATE_NAME)
+    digest = hashlib.sha256(
+        repr((sorted(context.items()), os.path.getmtime(template.origin.name))).encode()
+    ).hexdigest()[:16]
+    return certificate_root() / f"{context['unique_id']}-{digest}.html"
+
+
+def render_document(context):
+    """Render one certificate to disk unless it is already there. Returns the path."""
+    path = document_path(context)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        html = get_template(TEMPLATE_NAME).render(context)
+        # Write to a temporary file first so readers never see half a document.
+        temporary = path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+        temporary.write_text(html, encoding='utf-8')
+        os.replace(temporary, path)
+    return path
+
+
+def render_certificates(certificates, workers=4):
+    """
+    Render certificate documents through a thread pool. Everything the
+    template needs is loaded up front in one query, so the workers never
+    touch the database. Returns {unique_id: path}.
+    """
+    certificates = Certificate.objects.filter(pk__in=[certificate.pk for certificate in certificates]).select_related(
+        'enrollment__student', 'enrollment__course__instructor',
+    )
+    contexts = [certificate_context(certificate) for certificate in certificates]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        paths = list(pool.map(render_document, contexts))
+    return {context['unique_id']: path for context, path in zip(contexts, paths)}
+
+
+def get_document(unique_id):
+    """Path of a certificate's rendered document, rendering it on first use. Raises Certificate.DoesNotExist."""
+    certificate = Certificate.objects.select_related(
+        'enrollment__student', 'enrollment__course__instructor',
+    ).get(unique_id=unique_id)
+    return render_document(certificate_context(certificate))
+
+
+def verification_cache_key(unique_id):
+    return f"certificate:verify:{hashlib.md5(unique_id.encode()).hexdigest()}"
+
+
+def verify_certificate(unique_id):
+    """
+    Public verification data of a certificate, or None. Served from the
+    cache after the first lookup; courses/signals.py drops the entry when
+    the certificate is deleted.
+    """
+    cache = get_cache()
+    key = verification_cache_key(unique_id)
+    data = cache.get(key)
+    if data is None:
+        certificate = Certificate.objects.select_related(
+            'enrollment__student', 'enrollment__course__instructor',
+        ).filter(unique_id=unique_id).first()
+        if certificate is None:
+            return None
+        context = certificate_context(certificate)
+        data = {
+            'unique_id': certificate.unique_id,
+            'student_name': context['student_name'],
+            'course_title': context['course_title'],
+            'course': certificate.enrollment.course_id,
+            'issue_date': certificate.issue_date.isoformat(),
+            'valid': True,
+        }
+        cache.set(key, data, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+    return data
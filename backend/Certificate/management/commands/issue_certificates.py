@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Certificate.issuance import issue_certificates, render_certificates
+
+
+class Command(BaseCommand):
+    help = 'Issue certificates for completed enrollments and render their documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Enrollments handled per query')
+        parser.add_argument('--workers', type=int, default=4, help='Threads used to render documents')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for completed enrollments')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds to sleep when nothing is left to issue')
+
+    def handle(self, *args, **options):
+        while True:
+            issued = issue_certificates(options['batch_size'])
+            if issued:
+                render_certificates(issued, options['workers'])
+                self.stdout.write(f"Issued {len(issued)} certificate(s)")
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS("All completed enrollments have certificates."))
+# python manage.py issue_certificates --loop
@@ -1,3 +1,81 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from Account.models import CustomUser
+from Enrollment.models import Enrollment
+from courses.models import Course
+from .issuance import issue_certificates, render_certificates
+from .models import Certificate
+
+
+class CertificatePipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        override = override_settings(CERTIFICATE_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.client = APIClient()
+        self.course = Course.objects.create(title="Finished Course", short_description="Short", description="Long")
+        self.students = [
+            CustomUser.objects.create_user(username=f"grad{i}", first_name="Grad", last_name=str(i), password="pw")
+            for i in range(3)
+        ]
+        self.enrollments = [Enrollment.objects.create(student=student, course=self.course) for student in self.students]
+        Enrollment.objects.filter(pk__in=[e.pk for e in self.enrollments[:2]]).update(is_completed=True)
+
+    def test_only_new_completions_are_issued(self):
+        issued = issue_certificates(batch_size=1)
+        self.assertEqual(sorted(c.enrollment_id for c in issued), [e.pk for e in self.enrollments[:2]])
+        self.assertEqual(issue_certificates(), [])
+        self.assertEqual(len({c.unique_id for c in Certificate.objects.all()}), 2)
+
+    def test_documents_are_rendered_once(self):
+        paths = render_certificates(issue_certificates(), workers=2)
+        self.assertEqual(len(paths), 2)
+        path = next(iter(paths.values()))
+        self.assertIn("Finished Course", path.read_text())
+        modified = path.stat().st_mtime_ns
+        self.assertEqual(render_certificates(Certificate.objects.all()), paths)
+        self.assertEqual(path.stat().st_mtime_ns, modified)
+
+        self.course.title = "Renamed Course"
+        self.course.save()
+        renamed = render_certificates(Certificate.objects.all())
+        self.assertNotEqual(renamed, paths)
+        self.assertIn("Renamed Course", next(iter(renamed.values())).read_text())
+
+    def test_command_issues_and_renders(self):
+        out = StringIO()
+        call_command('issue_certificates', stdout=out)
+        self.assertIn("Issued 2 certificate(s)", out.getvalue())
+
+    def test_public_verification_is_cached(self):
+        certificate = issue_certificates()[0]
+        url = f'/api/certificates/{certificate.unique_id}/verify/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['student_name'], response.data['valid']), ("Grad 0", True))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+        certificate.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_document_endpoint(self):
+        certificate = issue_certificates()[0]
+        response = self.client.get(f'/api/certificates/{certificate.unique_id}/document/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Certificate of Completion", b''.join(response.streaming_content))
+        self.assertEqual(self.client.get('/api/certificates/unknown/document/').status_code, 404)
@@ -1,11 +1,18 @@
 from django.contrib import admin
-from .models import Enrollment
+from .models import Enrollment, LessonProgress
 
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ('student', 'course', 'enrolled_at', 'completed_at', 'progress', 'is_completed')
     list_filter = ('is_completed', 'enrolled_at', 'completed_at', 'course')
     search_fields = ('student__username', 'student__email', 'course__title')
-    readonly_fields = ('enrolled_at',)
+    readonly_fields = ('enrolled_at', 'completed_lessons')
     ordering = ('-enrolled_at',)
 
+class LessonProgressAdmin(admin.ModelAdmin):
+    list_display = ('enrollment', 'lesson', 'position_seconds', 'completed_at', 'updated_at')
+    list_filter = ('completed_at',)
+    search_fields = ('enrollment__student__username', 'lesson__title')
+    raw_id_fields = ('enrollment', 'lesson')
+
 admin.site.register(Enrollment, EnrollmentAdmin)
+admin.site.register(LessonProgress, LessonProgressAdmin)
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Lesson', '0001_initial'),
+        ('Enrollment', '0002_enrollment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Lessons with a completed LessonProgress row; progress is derived from it.'),
+        ),
+        migrations.CreateModel(
+            name='LessonProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position_seconds', models.PositiveIntegerField(default=0, help_text='Last reported playback position, for resuming.')),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_progress', to='Enrollment.enrollment')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_records', to='Lesson.lesson')),
+            ],
+            options={
+                'verbose_name_plural': 'Lesson progress',
+                'unique_together': {('enrollment', 'lesson')},
+            },
+        ),
+    ]
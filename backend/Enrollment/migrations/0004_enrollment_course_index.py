@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Enrollment', '0003_lesson_progress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', '-enrolled_at', '-id'], name='enrollment_course_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Enrollment', '0004_enrollment_course_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(condition=models.Q(('completed_at__isnull', False)), fields=['completed_at'], name='enrollment_completed_idx'),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 from Account.models import CustomUser
 from courses.models import Course
+from Lesson.models import Lesson
 # Create your models here.
 
 class Enrollment(models.Model):
@@ -12,9 +14,34 @@ class Enrollment(models.Model):
     completed_at = models.DateTimeField(blank=True, null=True)
     progress = models.FloatField(default=0.0, validators=[MinValueValidator(0.0), MaxValueValidator(100.0)])
     is_completed = models.BooleanField(default=False)
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False, help_text="Lessons with a completed LessonProgress row; progress is derived from it.")
 
     class Meta:
+        # The unique constraint doubles as the (student, course) lookup index.
         unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['student', '-enrolled_at', '-id'], name='enrollment_student_recent_idx'),
+            models.Index(fields=['-enrolled_at', '-id'], name='enrollment_recent_idx'),
+            models.Index(fields=['course', '-enrolled_at', '-id'], name='enrollment_course_recent_idx'),
+            # Analytics rollups scan recent completions by date.
+            models.Index(fields=['completed_at'], name='enrollment_completed_idx', condition=models.Q(completed_at__isnull=False)),
+        ]
 
     def __str__(self):
-        return f"{self.student.username} enrolled in {self.course.title}"
\ No newline at end of file
+        return f"{self.student.username} enrolled in {self.course.title}"
+
+
+class LessonProgress(models.Model):
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='lesson_progress')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='progress_records')
+    position_seconds = models.PositiveIntegerField(default=0, help_text="Last reported playback position, for resuming.")
+    completed_at = models.DateTimeField(blank=True, null=True)
+    # Set explicitly rather than auto_now, since rows are written with bulk_update().
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Lesson progress"
+        unique_together = ('enrollment', 'lesson')
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.lesson.title}"
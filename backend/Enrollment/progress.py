@@ -0,0 +1,226 @@
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from courses.models import Course
+from Lesson.models import Lesson
+from .models import Enrollment, LessonProgress
+
+
+def refresh_enrollment_progress(enrollments):
+    """
+    Recount completed lessons for the given Enrollment queryset and derive
+    progress, is_completed and completed_at from that count and the course's
+    total_lectures, in two UPDATE statements. Completion is sticky: adding a
+    lesson later lowers progress but does not revoke a finished course.
+    """
+    completed = (
+        LessonProgress.objects.filter(enrollment=OuterRef('pk'), completed_at__isnull=False)
+        .order_by().values('enrollment').annotate(total=Count('pk')).values('total')
+    )
+    total_lectures = Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('total_lectures'))
+    with transaction.atomic():
+        enrollments.update(completed_lessons=Coalesce(Subquery(completed), 0))
+        finished = Q(completed_lessons__gte=total_lectures) & Q(completed_lessons__gt=0)
+        enrollments.update(
+            progress=Case(
+                When(finished, then=Value(100.0)),
+                When(completed_lessons__gt=0, then=Cast(F('completed_lessons'), FloatField()) * 100.0 / total_lectures),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+            is_completed=Case(When(finished, then=Value(True)), default=F('is_completed')),
+            completed_at=Case(When(finished & Q(completed_at__isnull=True), then=Value(timezone.now())), default=F('completed_at')),
+        )
+
+
+def _merge_event(row, position, completed, now):
+    """Apply one coalesced event to an existing row; True when the row changed."""
+    if not ((position is not None and position != row.position_seconds) or (completed and row.completed_at is None)):
+        return False
+    if position is not None:
+        row.position_seconds = position
+    if completed and row.completed_at is None:
+        row.completed_at = now
+    row.updated_at = now
+    return True
+
+
+def apply_progress(events):
+    """
+    Write coalesced events, {(enrollment_id, lesson_id): (position, completed)},
+    with one read, one bulk_create and one bulk_update, then refresh the
+    progress of enrollments that completed a lesson.
+    """
+    if not events:
+        return
+    now = timezone.now()
+
+    def select(keys):
+        return LessonProgress.objects.select_for_update().filter(
+            enrollment_id__in={enrollment_id for enrollment_id, _ in keys},
+            lesson_id__in={lesson_id for _, lesson_id in keys},
+        )
+
+    with transaction.atomic():
+        existing = {(row.enrollment_id, row.lesson_id): row for row in select(events)}
+        created, updated, completed_enrollments = [], [], set()
+        for (enrollment_id, lesson_id), (position, completed) in events.items():
+            row = existing.get((enrollment_id, lesson_id))
+            if row is None:
+                created.append(LessonProgress(
+                    enrollment_id=enrollment_id, lesson_id=lesson_id, position_seconds=position or 0,
+                    completed_at=now if completed else None, updated_at=now,
+                ))
+            elif _merge_event(row, position, completed, now):
+                updated.append(row)
+            else:
+                continue
+            if completed:
+                completed_enrollments.add(enrollment_id)
+
+        LessonProgress.objects.bulk_create(created, ignore_conflicts=True, batch_size=500)
+        if created:
+            # A row another worker inserted meanwhile wins the insert and
+            # would drop this event (often a lesson's last, its completion):
+            # read the rows back and apply the events on top of them.
+            keys = {(row.enrollment_id, row.lesson_id) for row in created}
+            for row in select(keys):
+                key = (row.enrollment_id, row.lesson_id)
+                if key in keys and _merge_event(row, *events[key], now):
+                    updated.append(row)
+        LessonProgress.objects.bulk_update(updated, ['position_seconds', 'completed_at', 'updated_at'], batch_size=500)
+        if completed_enrollments:
+            refresh_enrollment_progress(Enrollment.objects.filter(pk__in=completed_enrollments))
+
+
+class ProgressBuffer:
+    """
+    Coalesces lesson progress events in process memory. Heartbeats for the
+    same (enrollment, lesson) collapse into one pending write holding the
+    latest position. The buffer is flushed once it holds
+    LESSON_PROGRESS_FLUSH_SIZE entries or its oldest entry is
+    LESSON_PROGRESS_FLUSH_INTERVAL seconds old, whenever a lesson is completed
+    (those must not be lost), and at interpreter exit. A timer started with
+    the oldest entry flushes it on time even if no further event arrives.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.oldest = None
+        self.timer = None
+
+    def _start_timer(self):
+        # Called with the lock held.
+        if self.timer is None:
+            self.timer = threading.Timer(getattr(settings, 'LESSON_PROGRESS_FLUSH_INTERVAL', 10), self._flush_on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _flush_on_timer(self):
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[Progress] Failed to flush {len(self.pending)} pending progress event(s): {e}")
+        finally:
+            # The timer thread ends here; do not leave its connection open.
+            connection.close()
+
+    def add(self, enrollment_id, lesson_id, position=None, completed=False):
+        key = (enrollment_id, lesson_id)
+        with self.lock:
+            previous_position, previous_completed = self.pending.get(key, (None, False))
+            self.pending[key] = (
+                position if position is not None else previous_position,
+                completed or previous_completed,
+            )
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+                self._start_timer()
+            due = (
+                completed
+                or len(self.pending) >= getattr(settings, 'LESSON_PROGRESS_FLUSH_SIZE', 500)
+                or time.monotonic() - self.oldest >= getattr(settings, 'LESSON_PROGRESS_FLUSH_INTERVAL', 10)
+            )
+        if due:
+            try:
+                self.flush()
+            except Exception as e:
+                # flush() kept the events for the timer to retry; the request that added them still succeeded.
+                print(f"[Progress] Failed to flush {len(self.pending)} pending progress event(s): {e}")
+
+    def flush(self):
+        with self.lock:
+            events, self.pending, self.oldest = self.pending, {}, None
+        try:
+            apply_progress(events)
+        except Exception:
+            # Put the events back (newer ones win) so the next flush retries them.
+            with self.lock:
+                for key, (position, completed) in events.items():
+                    pending_position, pending_completed = self.pending.get(key, (None, False))
+                    self.pending[key] = (
+                        pending_position if pending_position is not None else position,
+                        completed or pending_completed,
+                    )
+                if self.oldest is None:
+                    self.oldest = time.monotonic()
+                self._start_timer()
+            raise
+        return len(events)
+
+    def pending_for(self, enrollment_id):
+        """{lesson_id: (position, completed)} of the events of one enrollment not yet written."""
+        with self.lock:
+            return {lesson_id: event for (pending_id, lesson_id), event in self.pending.items() if pending_id == enrollment_id}
+
+    def clear(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.pending, self.oldest, self.timer = {}, None, None
+
+
+progress_buffer = ProgressBuffer()
+
+
+def lesson_progress_rows(enrollment):
+    """
+    The LessonProgress rows of `enrollment` in lesson order, with the events
+    still waiting in this process's buffer applied on top (unsaved rows for
+    lessons that have none yet), so a read sees the caller's own writes
+    without flushing everybody else's.
+    """
+    rows = {row.lesson_id: row for row in enrollment.lesson_progress.order_by('lesson__order')}
+    pending = progress_buffer.pending_for(enrollment.pk)
+    if not pending:
+        return list(rows.values())
+    now = timezone.now()
+    for lesson_id, (position, completed) in pending.items():
+        row = rows.get(lesson_id)
+        if row is None:
+            row = rows[lesson_id] = LessonProgress(enrollment=enrollment, lesson_id=lesson_id)
+        if position is not None:
+            row.position_seconds = position
+        if completed and row.completed_at is None:
+            row.completed_at = now
+        row.updated_at = now
+    orders = dict(Lesson.objects.filter(pk__in=rows.keys()).values_list('pk', 'order'))
+    return sorted(rows.values(), key=lambda row: (orders.get(row.lesson_id, 0), row.lesson_id))
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        progress_buffer.flush()
+    except Exception as e:
+        print(f"[Progress] Failed to flush {len(progress_buffer.pending)} pending progress event(s): {e}")
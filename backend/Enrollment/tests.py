@@ -1,3 +1,138 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from Account.models import CustomUser
+from Lesson.models import Lesson
+from courses.models import Course
+from .models import Enrollment, LessonProgress
+from .progress import apply_progress, progress_buffer
+
+
+@override_settings(LESSON_PROGRESS_FLUSH_SIZE=100, LESSON_PROGRESS_FLUSH_INTERVAL=3600)
+class LessonProgressTests(TestCase):
+    def setUp(self):
+        progress_buffer.clear()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(username="watcher", password="pw")
+        self.client.force_authenticate(self.student)
+        self.course = Course.objects.create(title="Video course", short_description="Short", description="Long")
+        self.lessons = [Lesson.objects.create(course=self.course, title=f"Part {i}", order=i) for i in range(4)]
+        self.enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+
+    def send(self, *events):
+        return self.client.post('/api/progress/', {'events': list(events)}, format='json')
+
+    def test_heartbeats_are_coalesced_until_flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            for position in range(0, 300, 10):
+                self.assertEqual(self.send({'lesson': self.lessons[0].pk, 'position': position}).status_code, 202)
+        self.assertFalse(LessonProgress.objects.exists())
+        self.assertFalse(any(query['sql'].startswith(('INSERT', 'UPDATE')) for query in queries))
+
+        self.assertEqual(progress_buffer.flush(), 1)
+        self.assertEqual(LessonProgress.objects.get().position_seconds, 290)
+
+    def test_completion_updates_enrollment(self):
+        self.send({'lesson': self.lessons[0].pk, 'position': 50}, {'lesson': self.lessons[1].pk, 'completed': True})
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_lessons, self.enrollment.progress), (1, 25.0))
+        self.assertEqual(LessonProgress.objects.count(), 2)
+
+        for lesson in self.lessons:
+            self.send({'lesson': lesson.pk, 'completed': True})
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_lessons, self.enrollment.progress), (4, 100.0))
+        self.assertTrue(self.enrollment.is_completed)
+        self.assertIsNotNone(self.enrollment.completed_at)
+
+    def test_new_lessons_lower_progress_but_keep_completion(self):
+        for lesson in self.lessons:
+            self.send({'lesson': lesson.pk, 'completed': True})
+        with self.captureOnCommitCallbacks(execute=True):
+            Lesson.objects.create(course=self.course, title="Bonus", order=9)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress, 80.0)
+        self.assertTrue(self.enrollment.is_completed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lessons[0].delete()
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_lessons, self.enrollment.progress), (3, 75.0))
+
+    def test_lesson_changes_refresh_progress_once_per_transaction(self):
+        self.send({'lesson': self.lessons[0].pk, 'completed': True})
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                Lesson.objects.filter(pk__in=[lesson.pk for lesson in self.lessons[2:]]).delete()
+                Lesson.objects.create(course=self.course, title="Bonus", order=9)
+            self.assertFalse(any('enrollment_enrollment' in query['sql'] for query in queries))
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.completed_lessons, self.enrollment.progress), (1, 100 / 3))
+
+    def test_deleting_a_course_skips_its_lessons_bookkeeping(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                self.course.delete()
+        self.assertFalse(Lesson.objects.exists())
+        self.assertFalse(any(query['sql'].startswith('UPDATE') for query in queries))
+
+    def test_completion_survives_losing_the_insert_race(self):
+        bulk_create = LessonProgress.objects.bulk_create
+
+        def racing(rows, **kwargs):
+            # Another worker inserts the same row first.
+            LessonProgress.objects.create(enrollment=self.enrollment, lesson=self.lessons[0], position_seconds=5)
+            return bulk_create(rows, **kwargs)
+
+        with mock.patch.object(LessonProgress.objects, 'bulk_create', side_effect=racing):
+            apply_progress({(self.enrollment.pk, self.lessons[0].pk): (50, True)})
+        row = LessonProgress.objects.get()
+        self.assertEqual(row.position_seconds, 50)
+        self.assertIsNotNone(row.completed_at)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+
+    def test_failed_flush_keeps_events_without_failing_the_request(self):
+        with mock.patch('Enrollment.progress.apply_progress', side_effect=DatabaseError("locked")), \
+                mock.patch('builtins.print'):
+            response = self.send({'lesson': self.lessons[0].pk, 'completed': True})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(progress_buffer.pending, {(self.enrollment.pk, self.lessons[0].pk): (None, True)})
+        progress_buffer.flush()
+        self.assertIsNotNone(LessonProgress.objects.get().completed_at)
+
+    def test_unenrolled_lessons_are_ignored(self):
+        other = Course.objects.create(title="Other", short_description="Short", description="Long")
+        lesson = Lesson.objects.create(course=other, title="Elsewhere", order=1)
+        response = self.send({'lesson': lesson.pk, 'completed': True})
+        self.assertEqual((response.data['accepted'], response.data['ignored']), (0, [lesson.pk]))
+        self.assertFalse(LessonProgress.objects.exists())
+
+    def test_progress_read_includes_pending_events_without_flushing(self):
+        self.send({'lesson': self.lessons[2].pk, 'position': 42})
+        progress_buffer.flush()
+        self.send({'lesson': self.lessons[2].pk, 'position': 60}, {'lesson': self.lessons[1].pk, 'position': 5})
+        other = CustomUser.objects.create_user(username="other", password="pw")
+        progress_buffer.add(Enrollment.objects.create(student=other, course=self.course).pk, self.lessons[0].pk, 7)
+
+        response = self.client.get('/api/progress/', {'course': self.course.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['lesson'], row['position_seconds']) for row in response.data['lessons']],
+            [(self.lessons[1].pk, 5), (self.lessons[2].pk, 60)],
+        )
+        self.assertEqual(len(progress_buffer.pending), 3)
+        self.assertEqual(LessonProgress.objects.get().position_seconds, 42)
+
+    @override_settings(LESSON_PROGRESS_FLUSH_INTERVAL=0.01)
+    def test_idle_buffer_is_flushed_on_a_timer(self):
+        flushed = threading.Event()
+        on_timer = lambda: threading.current_thread() is not threading.main_thread() and flushed.set()
+        with mock.patch.object(progress_buffer, 'flush', side_effect=on_timer):
+            self.send({'lesson': self.lessons[0].pk, 'position': 10})
+            self.assertTrue(flushed.wait(5))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FAQ', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at', '-id'], name='faq_published_recent_idx'),
+        ),
+    ]
@@ -17,4 +17,7 @@ class FAQ(models.Model):
 
     class Meta:
         verbose_name_plural = "FAQs"
-        ordering = ['order']
\ No newline at end of file
+        ordering = ['order']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='faq_published_recent_idx', condition=models.Q(is_published=True)),
+        ]
\ No newline at end of file
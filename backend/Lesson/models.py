@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
 from courses.models import Course
+from utils.slugs import save_with_unique_slug
 # Create your models here.
 class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lessons')
@@ -22,13 +23,10 @@ class Lesson(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             # Ensure slug is unique for this course, but not globally unique
-            base_slug = slugify(self.title)
-            unique_slug = base_slug
-            num = 1
-            while Lesson.objects.filter(course=self.course, slug=unique_slug).exists():
-                unique_slug = f"{base_slug}-{num}"
-                num += 1
-            self.slug = unique_slug
+            return save_with_unique_slug(
+                self, slugify(self.title), Lesson.objects.filter(course_id=self.course_id),
+                lambda: super(Lesson, self).save(*args, **kwargs),
+            )
         super().save(*args, **kwargs)
 
     def __str__(self):
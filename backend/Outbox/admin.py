@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import OutgoingEmail
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'available_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients', 'last_error')
+    readonly_fields = ('attempts', 'last_error', 'claimed_at', 'created_at', 'sent_at')
+    ordering = ('-created_at',)
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
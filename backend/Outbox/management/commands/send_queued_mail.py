@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Outbox.worker import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Send emails queued in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails sent per SMTP connection')
+        parser.add_argument('--workers', type=int, default=4, help='Threads used to inline CSS')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of draining it once')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = process_batch(options['batch_size'], options['workers'])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS("Outbox drained."))
+# python manage.py send_queued_mail --loop
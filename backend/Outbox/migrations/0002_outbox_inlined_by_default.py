@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='html_message',
+            field=models.TextField(blank=True, help_text='Rendered HTML body, with its CSS already inlined unless inline_css is set.'),
+        ),
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='inline_css',
+            field=models.BooleanField(default=False, help_text='Run premailer over the HTML body before sending; only for bodies queued without inlined CSS.'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils import timezone
+
+# Create your models here.
+class OutgoingEmail(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField(blank=True, help_text="Plain text body.")
+    html_message = models.TextField(blank=True, help_text="Rendered HTML body, with its CSS already inlined unless inline_css is set.")
+    inline_css = models.BooleanField(default=False, help_text="Run premailer over the HTML body before sending; only for bodies queued without inlined CSS.")
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not picked up by the worker before this time.")
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['available_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,120 @@
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.template.loader import get_template, render_to_string
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from premailer import transform
+from rest_framework.test import APIClient
+
+from utils.email_templates import clear_inlined_templates, inline_template_source, render_inlined
+from utils.mail import queue_email
+from .models import OutgoingEmail
+from .worker import process_batch
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError("SMTP unavailable")
+
+
+class OutboxTests(TestCase):
+    def queue(self, recipient="learner@example.com"):
+        error = queue_email(
+            context={'user': {'username': "learner"}},
+            template='welcome_email.html',
+            subject="Welcome",
+            recipients=[recipient],
+        )
+        self.assertIsNone(error)
+
+    def test_queue_email_stores_without_sending(self):
+        self.queue()
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, 'pending')
+        self.assertIn("learner", email.html_message)
+
+    def test_worker_sends_batch_and_inlines_css(self):
+        for i in range(3):
+            self.queue(f"learner{i}@example.com")
+        self.assertEqual(process_batch(batch_size=10, workers=2), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        html = mail.outbox[0].alternatives[0][0]
+        self.assertIn('style="', html)
+        self.assertEqual(OutgoingEmail.objects.filter(status='sent').count(), 3)
+
+    @override_settings(EMAIL_BACKEND='Outbox.tests.FailingBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        self.queue()
+        self.assertEqual(process_batch(), (0, 1))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.available_at, timezone.now())
+        self.assertIn("SMTP unavailable", email.last_error)
+
+        # Not due yet, so the next run leaves it alone.
+        self.assertEqual(process_batch(), (0, 0))
+
+        OutgoingEmail.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+        process_batch()
+        self.assertEqual(OutgoingEmail.objects.get().status, 'failed')
+
+    def test_command_drains_outbox(self):
+        self.queue()
+        call_command('send_queued_mail', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_register_api_queues_welcome_email(self):
+        response = APIClient().post('/api/register/', {
+            'username': "newcomer",
+            'email': "newcomer@example.com",
+            'password': "a-Strong-pass-123",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.get().recipients, ["newcomer@example.com"])
+
+
+class InlinedTemplateCacheTests(TestCase):
+    context = {
+        'user': {'username': "learner"},
+        'reset_url': "https://example.com/reset/MQ/abc-123/?next=/profile&x=1",
+        'SUPPORT_MAIL': "help@example.com",
+    }
+
+    def setUp(self):
+        clear_inlined_templates()
+
+    def normalize(self, html):
+        return " ".join(html.split())
+
+    def test_matches_per_message_premailer_output(self):
+        for template in ('welcome_email.html', 'emails/password_reset_email.html'):
+            expected = transform(render_to_string(template, dict(self.context)))
+            self.assertEqual(self.normalize(render_inlined(template, dict(self.context))), self.normalize(expected))
+
+    def test_premailer_runs_once_per_template_version(self):
+        with mock.patch('utils.email_templates.transform', wraps=transform) as spy:
+            for _ in range(5):
+                render_inlined('welcome_email.html', dict(self.context))
+            self.assertEqual(spy.call_count, 1)
+
+            path = get_template('welcome_email.html').origin.name
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+            try:
+                render_inlined('welcome_email.html', dict(self.context))
+            finally:
+                os.utime(path, (stat.st_atime, stat.st_mtime))
+            self.assertEqual(spy.call_count, 2)
+
+    def test_tags_premailer_would_consume_fall_back(self):
+        source = "<html><head><style>{% if dark %}p { color: red; }{% endif %}</style></head><body><p>{{ name }}</p></body></html>"
+        self.assertIsNone(inline_template_source(source))
+        self.assertIsNone(inline_template_source("{% extends 'base.html' %}"))
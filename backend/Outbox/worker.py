@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from premailer import transform
+
+from .models import OutgoingEmail
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def claim_batch(batch_size):
+    """
+    Mark up to `batch_size` due emails as 'sending' and return them.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several workers can drain the outbox without picking the same email.
+    Emails stuck in 'sending' longer than EMAIL_OUTBOX_CLAIM_TIMEOUT (a worker
+    died mid-batch) are picked up again.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=_setting('EMAIL_OUTBOX_CLAIM_TIMEOUT', 600))
+    due = Q(status='pending', available_at__lte=now) | Q(status='sending', claimed_at__lt=stale)
+    with transaction.atomic():
+        ids = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(due).order_by('available_at').values_list('pk', flat=True)[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=ids).update(status='sending', claimed_at=now)
+    return list(OutgoingEmail.objects.filter(pk__in=ids).order_by('available_at'))
+
+
+def render_html(email):
+    """Inline the CSS of a queued email. Returns (html, error)."""
+    try:
+        if email.html_message and email.inline_css:
+            return transform(email.html_message), None
+        return email.html_message, None
+    except Exception as e:
+        return None, e
+
+
+def retry_delay(attempts):
+    base = _setting('EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), _setting('EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600)))
+
+
+def process_batch(batch_size=50, workers=4):
+    """
+    Send one batch of queued emails. CSS inlining runs on a thread pool and
+    all messages go out over a single SMTP connection. Failed emails are
+    retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS.
+
+    Returns (sent, failed) counts.
+    """
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        rendered = list(pool.map(render_html, emails))
+
+    sent, errors = [], {}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for email, (html, error) in zip(emails, rendered):
+            if error is not None:
+                errors[email.pk] = error
+                continue
+            message = EmailMultiAlternatives(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email,
+                to=email.recipients,
+                connection=connection,
+            )
+            if html:
+                message.attach_alternative(html, 'text/html')
+            try:
+                message.send()
+                sent.append(email.pk)
+            except Exception as e:
+                errors[email.pk] = e
+    except Exception as e:
+        # Could not connect: every email not yet sent is retried.
+        for email in emails:
+            if email.pk not in sent:
+                errors.setdefault(email.pk, e)
+    finally:
+        connection.close()
+
+    now = timezone.now()
+    OutgoingEmail.objects.filter(pk__in=sent).update(status='sent', sent_at=now, last_error='')
+
+    max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    failed = [email for email in emails if email.pk in errors]
+    for email in failed:
+        email.attempts += 1
+        email.last_error = str(errors[email.pk])
+        email.status = 'failed' if email.attempts >= max_attempts else 'pending'
+        email.available_at = now + retry_delay(email.attempts)
+    OutgoingEmail.objects.bulk_update(failed, ['attempts', 'last_error', 'status', 'available_at'])
+
+    return len(sent), len(failed)
@@ -0,0 +1,156 @@
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Prefetch
+from rest_framework.exceptions import ValidationError
+
+from courses.catalog_cache import bump_generation, get_cache, get_generations
+from .models import Quiz, UserQuizAttempt
+
+# Immutable compiled form of a quiz: everything grading needs, nothing else.
+AnswerKey = namedtuple('AnswerKey', 'quiz_id course_id passing_score version questions')
+# `correct` holds choice ids for 'mcq' questions and normalized texts for 'text' ones.
+KeyedQuestion = namedtuple('KeyedQuestion', 'id question_type choices correct')
+GradeResult = namedtuple('GradeResult', 'score passed correct total results')
+
+ATTEMPT_NUMBER_RETRIES = 5
+
+
+def answer_key_label(quiz_id):
+    return f"quiz:{quiz_id}"
+
+
+def quiz_version(quiz_id):
+    return get_generations([answer_key_label(quiz_id)])[0]
+
+
+def invalidate_answer_key(quiz_id):
+    """Called whenever the quiz, one of its questions or one of their choices changes."""
+    if quiz_id is None:
+        return
+    # As with the catalog: bump now, and again on commit so a key compiled
+    # from the old rows by another worker meanwhile is not used either.
+    label = answer_key_label(quiz_id)
+    bump_generation(label)
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def normalize_text(value):
+    return ' '.join(str(value).split()).casefold()
+
+
+def load_quiz_tree(quiz_id):
+    """
+    Load a quiz with its questions and their choices, one query each.
+    Raises Quiz.DoesNotExist.
+    """
+    from Question.models import AnswerChoice, Question
+
+    return (
+        Quiz.objects.select_related('lesson')
+        .prefetch_related(Prefetch(
+            'questions',
+            Question.objects.prefetch_related(Prefetch('choices', AnswerChoice.objects.order_by('pk'))),
+        ))
+        .get(pk=quiz_id)
+    )
+
+
+def compile_answer_key(quiz_id, version):
+    """Compile the quiz tree into an AnswerKey. Raises Quiz.DoesNotExist."""
+    quiz = load_quiz_tree(quiz_id)
+    questions = []
+    for question in quiz.questions.all():
+        choices = question.choices.all()
+        if question.question_type == 'text':
+            correct = frozenset(normalize_text(choice.choice_text) for choice in choices if choice.is_correct)
+        else:
+            correct = frozenset(choice.pk for choice in choices if choice.is_correct)
+        questions.append(KeyedQuestion(
+            question.pk, question.question_type, frozenset(choice.pk for choice in choices), correct,
+        ))
+    return AnswerKey(quiz.pk, quiz.lesson.course_id, quiz.passing_score, version, tuple(questions))
+
+
+@lru_cache(maxsize=512)
+def _answer_key(quiz_id, version):
+    # Per-process memo in front of the shared cache; a new version is a new entry.
+    cache = get_cache()
+    cache_key = f"quiz:answer_key:{quiz_id}:{version}"
+    key = cache.get(cache_key)
+    if key is None:
+        key = compile_answer_key(quiz_id, version)
+        cache.set(cache_key, key, None)
+    return key
+
+
+def get_answer_key(quiz_id):
+    """Return the current AnswerKey of a quiz. Raises Quiz.DoesNotExist."""
+    return _answer_key(int(quiz_id), quiz_version(quiz_id))
+
+
+def grade(key, answers):
+    """
+    Score a submission against an AnswerKey without touching the database.
+
+    `answers` maps question ids to a choice id or a list of choice ids for
+    'mcq' questions (all correct choices, and only those, must be picked),
+    or to the answer text for 'text' questions. Unanswered questions count
+    as wrong. Raises ValidationError for questions or choices that are not
+    part of the quiz.
+    """
+    if not isinstance(answers, dict):
+        raise ValidationError({'answers': 'Expected an object mapping question ids to answers.'})
+    questions = {question.id: question for question in key.questions}
+    submitted = {}
+    for question_id, answer in answers.items():
+        try:
+            question = questions[int(question_id)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError({'answers': f'Question {question_id} is not part of this quiz.'})
+        if question.question_type == 'text':
+            submitted[question.id] = normalize_text(answer)
+            continue
+        try:
+            picked = frozenset(int(choice) for choice in (answer if isinstance(answer, (list, tuple)) else [answer]))
+        except (TypeError, ValueError):
+            raise ValidationError({'answers': f'Answers to question {question_id} must be choice ids.'})
+        if not picked <= question.choices:
+            raise ValidationError({'answers': f'Invalid choice for question {question_id}.'})
+        submitted[question.id] = picked
+
+    results = {}
+    for question in key.questions:
+        answer = submitted.get(question.id)
+        if question.question_type == 'text':
+            results[question.id] = answer in question.correct
+        else:
+            results[question.id] = bool(question.correct) and answer == question.correct
+
+    correct = sum(results.values())
+    total = len(key.questions)
+    score = (Decimal(100 * correct) / total if total else Decimal(0)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return GradeResult(score, score >= key.passing_score, correct, total, results)
+
+
+def record_attempt(student, key, result):
+    """
+    Save a graded attempt under the student's next attempt_number. Two
+    concurrent submissions may pick the same number; the loser hits the
+    (student, quiz, attempt_number) unique constraint and retries.
+    """
+    attempts = UserQuizAttempt.objects.filter(student=student, quiz_id=key.quiz_id)
+    for _ in range(ATTEMPT_NUMBER_RETRIES):
+        number = (attempts.aggregate(latest=Max('attempt_number'))['latest'] or 0) + 1
+        try:
+            with transaction.atomic():
+                return UserQuizAttempt.objects.create(
+                    student=student, quiz_id=key.quiz_id, score=result.score,
+                    passed=result.passed, attempt_number=number,
+                )
+        except IntegrityError:
+            continue
+    raise IntegrityError(f"Could not allocate an attempt number for quiz {key.quiz_id}.")
+
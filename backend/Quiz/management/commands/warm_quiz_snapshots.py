@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from Quiz.snapshots import warm_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Precompute the student snapshots of quizzes, e.g. before an exam window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int, help='Only these quizzes (default: all)')
+
+    def handle(self, *args, **options):
+        count = warm_snapshots(options['quiz_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Built {count} quiz snapshot(s)."))
+# python manage.py warm_quiz_snapshots [quiz_id ...]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quiz', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='userquizattempt',
+            options={'ordering': ['-submitted_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='userquizattempt',
+            index=models.Index(fields=['student', 'quiz', '-submitted_at', '-id'], name='attempt_student_quiz_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Quiz', '0002_userquizattempt_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userquizattempt',
+            index=models.Index(fields=['submitted_at'], name='attempt_submitted_idx'),
+        ),
+    ]
@@ -30,5 +30,10 @@ class UserQuizAttempt(models.Model):
         return f"{self.student.username} - {self.quiz.title} (Score: {self.score}%)"
 
     class Meta:
-        ordering = ['-submitted_at']
+        ordering = ['-submitted_at', '-id']
         unique_together = ('student', 'quiz', 'attempt_number')
+        indexes = [
+            models.Index(fields=['student', 'quiz', '-submitted_at', '-id'], name='attempt_student_quiz_idx'),
+            # Analytics rollups scan recent attempts by date.
+            models.Index(fields=['submitted_at'], name='attempt_submitted_idx'),
+        ]
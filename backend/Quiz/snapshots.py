@@ -0,0 +1,70 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from courses.catalog_cache import get_versioned, set_versioned
+from .grading import answer_key_label, load_quiz_tree
+from .models import Quiz
+
+
+def build_snapshot(quiz):
+    """
+    The student view of a quiz tree loaded by load_quiz_tree(): questions in
+    order with their choices, and without `is_correct`. Choices of 'text'
+    questions are the accepted answers, so they are left out entirely.
+    """
+    return {
+        'id': quiz.pk,
+        'lesson': quiz.lesson_id,
+        'course': quiz.lesson.course_id,
+        'title': quiz.title,
+        'description': quiz.description,
+        'passing_score': quiz.passing_score,
+        'questions': [
+            {
+                'id': question.pk,
+                'question_text': question.question_text,
+                'question_type': question.question_type,
+                'order': question.order,
+                'choices': [] if question.question_type == 'text' else [
+                    {'id': choice.pk, 'choice_text': choice.choice_text} for choice in question.choices.all()
+                ],
+            }
+            for question in quiz.questions.all()
+        ],
+    }
+
+
+def render_snapshot(quiz_id):
+    """Build a quiz's snapshot and return (version, json_bytes)."""
+    blob = json.dumps(build_snapshot(load_quiz_tree(quiz_id)), cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    return hashlib.sha256(blob).hexdigest()[:32], blob
+
+
+def get_snapshot(quiz_id):
+    """
+    Return (version, json_bytes) for a quiz, from the cache when the quiz
+    tree has not changed since the snapshot was taken. Questions and answer
+    choices bump the same per-quiz generation as the grading answer key (see
+    Quiz.grading.invalidate_answer_key), so a warm snapshot costs one cache
+    round trip and no queries. Raises Quiz.DoesNotExist.
+    """
+    key = f"quiz:snapshot:{quiz_id}"
+    snapshot, generations = get_versioned(key, [answer_key_label(quiz_id)])
+    if snapshot is None:
+        snapshot = render_snapshot(quiz_id)
+        set_versioned(key, generations, snapshot)
+    return snapshot
+
+
+def warm_snapshots(quiz_ids=None):
+    """Precompute snapshots, e.g. ahead of an exam window. Returns how many were built."""
+    quizzes = Quiz.objects.order_by('pk')
+    if quiz_ids:
+        quizzes = quizzes.filter(pk__in=quiz_ids)
+    count = 0
+    for quiz_id in quizzes.values_list('pk', flat=True).iterator():
+        get_snapshot(quiz_id)
+        count += 1
+    return count
@@ -1,3 +1,135 @@
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from Account.models import CustomUser
+from Enrollment.models import Enrollment
+from Lesson.models import Lesson
+from Question.models import AnswerChoice, Question
+from courses.models import Course
+from .grading import get_answer_key, grade
+from .snapshots import get_snapshot
+from .models import Quiz, UserQuizAttempt
+
+
+class QuizGradingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(username="taker", password="pw")
+        course = Course.objects.create(title="Quizzes", short_description="Short", description="Long")
+        Enrollment.objects.create(student=self.student, course=course)
+        lesson = Lesson.objects.create(course=course, title="Lesson", order=1)
+        self.quiz = Quiz.objects.create(lesson=lesson, title="Checkpoint", passing_score=60)
+
+        self.single = Question.objects.create(quiz=self.quiz, question_text="2 + 2?", order=1)
+        self.four = AnswerChoice.objects.create(question=self.single, choice_text="4", is_correct=True)
+        self.five = AnswerChoice.objects.create(question=self.single, choice_text="5")
+        self.multi = Question.objects.create(quiz=self.quiz, question_text="Primes?", order=2)
+        self.two = AnswerChoice.objects.create(question=self.multi, choice_text="2", is_correct=True)
+        self.three = AnswerChoice.objects.create(question=self.multi, choice_text="3", is_correct=True)
+        AnswerChoice.objects.create(question=self.multi, choice_text="4")
+        self.text = Question.objects.create(quiz=self.quiz, question_text="Capital of France?", question_type='text', order=3)
+        AnswerChoice.objects.create(question=self.text, choice_text="Paris", is_correct=True)
+
+    def submit(self, answers):
+        self.client.force_authenticate(self.student)
+        return self.client.post(f'/api/quizzes/{self.quiz.pk}/submit/', {'answers': answers}, format='json')
+
+    def test_submission_is_graded_and_numbered(self):
+        response = self.submit({self.single.pk: self.four.pk, self.multi.pk: [self.two.pk, self.three.pk], self.text.pk: " paris "})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['score'], response.data['passed'], response.data['attempt_number']), (Decimal('100.00'), True, 1))
+
+        response = self.submit({self.single.pk: self.five.pk, self.multi.pk: [self.two.pk]})
+        self.assertEqual((response.data['score'], response.data['passed'], response.data['attempt_number']), (Decimal('0.00'), False, 2))
+        self.assertEqual(
+            list(UserQuizAttempt.objects.order_by('attempt_number').values_list('attempt_number', 'passed')),
+            [(1, True), (2, False)],
+        )
+
+    def test_passing_score_threshold(self):
+        key = get_answer_key(self.quiz.pk)
+        result = grade(key, {self.single.pk: self.four.pk, self.text.pk: "Paris"})
+        self.assertEqual((result.score, result.passed), (Decimal('66.67'), True))
+
+    def test_foreign_choices_are_rejected(self):
+        response = self.submit({self.single.pk: self.two.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserQuizAttempt.objects.exists())
+
+    def test_unenrolled_students_cannot_submit(self):
+        self.student = CustomUser.objects.create_user(username="outsider", password="pw")
+        self.assertEqual(self.submit({}).status_code, 403)
+
+    def test_answer_key_is_compiled_once(self):
+        with CaptureQueriesContext(connection) as first:
+            get_answer_key(self.quiz.pk)
+        self.assertEqual(len(first), 3)  # quiz, questions, choices
+        with CaptureQueriesContext(connection) as second:
+            key = get_answer_key(self.quiz.pk)
+            for _ in range(1000):
+                grade(key, {self.single.pk: self.four.pk})
+        self.assertEqual(len(second), 0)
+
+    def test_choice_changes_invalidate_the_key(self):
+        self.assertEqual(grade(get_answer_key(self.quiz.pk), {self.single.pk: self.five.pk}).correct, 0)
+        self.five.is_correct = True
+        self.five.save()
+        self.four.delete()
+        self.assertEqual(grade(get_answer_key(self.quiz.pk), {self.single.pk: self.five.pk}).correct, 1)
+
+
+
+class QuizSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(username="examinee", password="pw"))
+        course = Course.objects.create(title="Exams", short_description="Short", description="Long")
+        lesson = Lesson.objects.create(course=course, title="Lesson", order=1)
+        self.quiz = Quiz.objects.create(lesson=lesson, title="Final")
+        self.second = Question.objects.create(quiz=self.quiz, question_text="Second", order=2)
+        self.first = Question.objects.create(quiz=self.quiz, question_text="First", order=1)
+        self.choice = AnswerChoice.objects.create(question=self.first, choice_text="Yes", is_correct=True)
+        AnswerChoice.objects.create(question=self.second, choice_text="Secret", is_correct=True)
+        self.second.question_type = 'text'
+        self.second.save()
+
+    def test_snapshot_hides_answers(self):
+        response = self.client.get(f'/api/quizzes/{self.quiz.pk}/snapshot/')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual([question['question_text'] for question in data['questions']], ["First", "Second"])
+        self.assertEqual(data['questions'][0]['choices'], [{'id': self.choice.pk, 'choice_text': "Yes"}])
+        self.assertEqual(data['questions'][1]['choices'], [])
+        self.assertNotIn(b'is_correct', response.content)
+        self.assertNotIn(b'Secret', response.content)
+
+    def test_warm_snapshot_needs_no_queries(self):
+        call_command('warm_quiz_snapshots', stdout=StringIO())
+        with CaptureQueriesContext(connection) as queries:
+            get_snapshot(self.quiz.pk)
+        self.assertEqual(len(queries), 0)
+
+    def test_version_changes_with_the_tree(self):
+        url = f'/api/quizzes/{self.quiz.pk}/snapshot/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.choice.choice_text = "Absolutely"
+        self.choice.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Absolutely', response.content)
+        self.assertNotEqual(response['ETag'], etag)
 
-# Create your tests here.
+    def test_missing_quiz(self):
+        self.assertEqual(self.client.get('/api/quizzes/999/snapshot/').status_code, 404)
@@ -35,6 +35,8 @@ INSTALLED_APPS = [
     'Question',
     'Quiz',
     'Review',
+    'Outbox',
+    'Analytics',
 ]
 
 MIDDLEWARE = [
@@ -79,6 +81,21 @@ DATABASES = {
     }
 }
 
+# --- Cache Configuration ---
+# Local memory by default (and in tests); point CACHE_BACKEND/CACHE_LOCATION at a
+# shared cache such as django.core.cache.backends.redis.RedisCache when running
+# several workers so they all see the same catalog generation counters.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'shp-learner'),
+    }
+}
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '600'))
+# 'auto' uses the SQLite FTS5 table when the database has one, else an in-memory index; or force 'fts5' / 'python'.
+COURSE_SEARCH_BACKEND = os.getenv('COURSE_SEARCH_BACKEND', 'auto')
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -96,6 +113,7 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+CERTIFICATE_ROOT = MEDIA_ROOT / 'certificates'  # rendered certificate documents
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'Account.CustomUser'
@@ -103,12 +121,34 @@ AUTH_USER_MODEL = 'Account.CustomUser'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'courses.authentication.SignedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'courses.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '20')),
+    'PAGINATION_INCLUDE_COUNT': os.getenv('API_PAGINATION_INCLUDE_COUNT', 'False').lower() in ('true', '1', 't'),
+}
+# Sliding-window rate limits (utils/ratelimit.py), per client IP unless noted.
+# RATELIMIT_STORE is 'cache' (shared by all workers) or 'local' (per process).
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() in ('true', '1', 't')
+RATELIMIT_STORE = os.getenv('RATELIMIT_STORE', 'cache')
+RATELIMIT_CACHE_ALIAS = 'default'
+RATELIMIT_TRUST_X_FORWARDED_FOR = os.getenv('RATELIMIT_TRUST_X_FORWARDED_FOR', 'False').lower() in ('true', '1', 't')
+RATELIMIT_RATES = {
+    'login': os.getenv('RATELIMIT_LOGIN', '20/min'),
+    'login_username': os.getenv('RATELIMIT_LOGIN_USERNAME', '5/min'),  # failed logins per account
+    'register': os.getenv('RATELIMIT_REGISTER', '10/hour'),
+    'password_reset': os.getenv('RATELIMIT_PASSWORD_RESET', '5/hour'),
+    'password_reset_email': os.getenv('RATELIMIT_PASSWORD_RESET_EMAIL', '3/hour'),  # per email address
+    'password_reset_confirm': os.getenv('RATELIMIT_PASSWORD_RESET_CONFIRM', '20/hour'),
 }
+# Bearer tokens issued by /api/login/ (courses/authentication.py)
+API_TOKEN_MAX_AGE = int(os.getenv('API_TOKEN_MAX_AGE', '86400'))  # seconds
+API_TOKEN_USER_CACHE_TIMEOUT = int(os.getenv('API_TOKEN_USER_CACHE_TIMEOUT', '300'))
+# Cached /api/me/ profiles; dropped whenever the user is saved or enrolls
+CURRENT_USER_CACHE_TIMEOUT = int(os.getenv('CURRENT_USER_CACHE_TIMEOUT', '300'))
 
 # --- Email Configuration ---
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND')
@@ -119,6 +159,28 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 
+# Outbox worker (python manage.py send_queued_mail). Use
+# django.core.mail.backends.console.EmailBackend to try it offline.
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', '60'))  # seconds, doubled per attempt
+EMAIL_OUTBOX_MAX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_MAX_RETRY_DELAY', '3600'))
+EMAIL_OUTBOX_CLAIM_TIMEOUT = int(os.getenv('EMAIL_OUTBOX_CLAIM_TIMEOUT', '600'))
+
+# Lesson progress heartbeats are coalesced in memory and written in batches.
+LESSON_PROGRESS_FLUSH_SIZE = int(os.getenv('LESSON_PROGRESS_FLUSH_SIZE', '500'))
+LESSON_PROGRESS_FLUSH_INTERVAL = int(os.getenv('LESSON_PROGRESS_FLUSH_INTERVAL', '10'))  # seconds
+
+# "Students also took" neighbors (courses/recommendations.py, built by `manage.py build_recommendations`)
+RECOMMENDATION_TOP_K = int(os.getenv('RECOMMENDATION_TOP_K', '20'))  # neighbors stored per course
+RECOMMENDATION_MIN_OVERLAP = int(os.getenv('RECOMMENDATION_MIN_OVERLAP', '2'))  # shared students needed to count
+
+# Resized copies of uploaded images (courses/images.py, backfilled by `manage.py generate_image_variants`)
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')]
+IMAGE_VARIANT_FORMAT = os.getenv('IMAGE_VARIANT_FORMAT', 'webp')  # webp or jpeg; jpeg when Pillow has no WebP
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', '80'))
+IMAGE_VARIANT_WORKERS = int(os.getenv('IMAGE_VARIANT_WORKERS', '2'))  # background threads per process
+IMAGE_VARIANTS_ASYNC = os.getenv('IMAGE_VARIANTS_ASYNC', 'True').lower() in ('true', '1', 't')
+
 # --- Security Settings ---
 SECURE_SSL_REDIRECT = os.getenv('SECURE_SSL_REDIRECT', 'False').lower() in ('true', '1', 't') and not DEBUG
 SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', 'False').lower() in ('true', '1', 't') and not DEBUG
@@ -183,9 +245,12 @@ JAZZMIN_SETTINGS = {
         "auth.Group": "fas fa-users",
         "Account.CustomUser": "fas fa-user-graduate",
         "courses.Course": "fas fa-book-open",
+        "courses.CourseNeighbor": "fas fa-project-diagram",
+        "courses.ImageVariant": "fas fa-images",
         "Category.Category": "fas fa-layer-group",
         "Certificate.Certificate": "fas fa-certificate",
         "Enrollment.Enrollment": "fas fa-user-check",
+        "Enrollment.LessonProgress": "fas fa-tasks",
         "FAQ.FAQ": "fas fa-question",
         "Lesson.Lesson": "fas fa-chalkboard-teacher",
         "Question.Question": "fas fa-question-circle",
@@ -193,6 +258,9 @@ JAZZMIN_SETTINGS = {
         "Quiz.Quiz": "fas fa-poll",
         "Quiz.UserQuizAttempt": "fas fa-user-clock",
         "Review.Review": "fas fa-star",
+        "Outbox.OutgoingEmail": "fas fa-envelope",
+        "Analytics.CourseDailyStats": "fas fa-chart-line",
+        "Analytics.QuizDailyStats": "fas fa-chart-bar",
     },
     "default_icon_parents": "fas fa-folder-open",
     "default_icon_children": "fas fa-file-alt",
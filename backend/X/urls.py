@@ -1,10 +1,13 @@
 # myproject/urls.py
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from courses import views # Assuming 'courses' app views are still needed
 from django.conf import settings
 from django.conf.urls.static import static
+from django.views.decorators.cache import cache_control
+from django.views.static import serve
+from courses.images import VARIANT_DIR
 # from django.contrib.auth import views as auth_views # Commented out as we are replacing with API views
 from courses.views import faq_view # Assuming faq_view is still needed
 
@@ -31,3 +34,12 @@ urlpatterns = [
     path('reset/<str:uidb64>/<str:token>/', password_reset_confirm_api, name='api_password_reset_confirm'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+if settings.DEBUG:
+    # Image variants have content-hashed names (courses/images.py), so they
+    # never change; production servers should send the same header.
+    urlpatterns.insert(0, re_path(
+        rf'^{settings.MEDIA_URL.lstrip("/")}{VARIANT_DIR}/(?P<path>.*)$',
+        cache_control(public=True, max_age=31536000, immutable=True)(serve),
+        {'document_root': settings.MEDIA_ROOT / VARIANT_DIR},
+    ))
+
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Course
+from .models import Course, CourseNeighbor, ImageVariant
+from .search import search_courses
 
 class CourseAdmin(admin.ModelAdmin):
     list_display = (
@@ -8,9 +9,10 @@ class CourseAdmin(admin.ModelAdmin):
         'created_at'
     )
     list_filter = ('is_published', 'is_free', 'level', 'category', 'created_at')
-    search_fields = ('title', 'short_description', 'description', 'instructor__email')
+    # Title and description matches come from the full-text index in get_search_results.
+    search_fields = ('instructor__email',)
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('average_rating', 'number_of_reviews', 'created_at', 'updated_at')
+    readonly_fields = ('total_lectures', 'average_rating', 'number_of_reviews', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
     fieldsets = (
@@ -34,4 +36,29 @@ class CourseAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            matches = [pk for pk, _ in search_courses(search_term, limit=1000)]
+            results |= queryset.filter(pk__in=matches)
+        return results, may_have_duplicates
+
 admin.site.register(Course, CourseAdmin)
+
+
+class CourseNeighborAdmin(admin.ModelAdmin):
+    list_display = ('course', 'rank', 'neighbor', 'score', 'computed_at')
+    list_select_related = ('course', 'neighbor')
+    search_fields = ('course__title',)
+    readonly_fields = ('course', 'neighbor', 'rank', 'score', 'computed_at')
+
+admin.site.register(CourseNeighbor, CourseNeighborAdmin)
+
+
+class ImageVariantAdmin(admin.ModelAdmin):
+    list_display = ('source', 'width', 'height', 'format', 'name', 'created_at')
+    list_filter = ('format',)
+    search_fields = ('source', 'name')
+    readonly_fields = ('source', 'width', 'height', 'format', 'name', 'created_at')
+
+admin.site.register(ImageVariant, ImageVariantAdmin)
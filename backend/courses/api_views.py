@@ -1,14 +1,21 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.exceptions import ValidationError
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 # from .models import CustomUser, Category, Course, Lesson, Enrollment, Quiz, FAQ
 from .models import Course
 from Enrollment.models import Enrollment
@@ -18,14 +25,33 @@ from Lesson.models import Lesson
 from Quiz.models import Quiz
 from FAQ.models import FAQ
 from .serializers import (
-    CustomUserSerializer, CategorySerializer, CourseSerializer,
-    LessonSerializer, EnrollmentSerializer, QuizSerializer, FAQSerializer
+    CustomUserSerializer, CurrentUserSerializer, CategorySerializer, CourseSerializer,
+    LessonSerializer, EnrollmentSerializer, QuizSerializer, FAQSerializer,
+    CourseSummarySerializer, EnrollmentFeedSerializer, StaffEnrollmentSerializer, BulkEnrollmentSerializer, ProgressEventsSerializer, LessonProgressSerializer,
 )
+from utils.ratelimit import LoginRateThrottle, LoginUsernameRateThrottle, RegisterRateThrottle
+from .authentication import (
+    SignedTokenAuthentication, forget_profiles, full_user, issue_token, profile_cache_key, revoke_tokens, token_max_age,
+)
+from .content_import import import_course, load_package
+from .exports import FORMATS, export_rows, iter_export
+from .query_planner import QueryPlannerMixin, plan_queryset
+from .recommendations import also_taken, recommend_for
+from .search import search_courses
+from Analytics.rollups import course_report, quiz_report
+from Certificate.issuance import get_document, verify_certificate
+from Certificate.models import Certificate
+from Enrollment.progress import lesson_progress_rows, progress_buffer
+from Quiz.grading import get_answer_key, grade, record_attempt
+from Quiz.snapshots import get_snapshot
+from .catalog_cache import CatalogCacheMixin, get_cache
+from .conditional import ConditionalGetMixin
 
 # import traceback
-from utils.mail import trigger_email  
+from utils.mail import queue_email, queue_mass_email
 import os
 import traceback
+from datetime import timedelta
 
 # --- Custom Permission Helpers ---
 def is_instructor(user):
@@ -38,7 +64,7 @@ def is_student(user):
     return user.is_authenticated and getattr(user, "role", None) == "student"
 
 # --- CustomUser API Views ---
-class CustomUserListCreateAPIView(generics.ListCreateAPIView):
+class CustomUserListCreateAPIView(QueryPlannerMixin, generics.ListCreateAPIView):
     """
     API view to list all CustomUsers or create a new CustomUser.
     Allows any user to create (for registration), but only authenticated to list.
@@ -46,9 +72,9 @@ class CustomUserListCreateAPIView(generics.ListCreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = [AllowAny] # Allow anyone to register (create), but restrict list if needed
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
 
-class CustomUserRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class CustomUserRetrieveUpdateDestroyAPIView(QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific CustomUser by ID.
     Only authenticated users can access.
@@ -73,21 +99,54 @@ class CustomUserRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIVi
         return super().delete(request, *args, **kwargs)
 
 
+class CurrentUserAPIView(APIView):
+    """
+    API endpoint for the logged-in user's own profile: GET /api/me/ returns
+    it with the number of enrollments, PATCH updates it. GET is served from
+    the cache after the first request; saving the user (through this
+    endpoint, /api/users/<id>/ or the admin) or enrolling drops the entry.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = profile_cache_key(request.user.pk)
+        data = cache.get(key)
+        if data is None:
+            data = self.profile(request)
+            cache.set(key, data, getattr(settings, 'CURRENT_USER_CACHE_TIMEOUT', 300))
+        return Response(data)
+
+    def patch(self, request, *args, **kwargs):
+        serializer = CurrentUserSerializer(full_user(request.user), data=request.data, partial=True, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(self.profile(request))
+
+    def profile(self, request):
+        return {
+            **CurrentUserSerializer(full_user(request.user), context={'request': request}).data,
+            'enrollment_count': Enrollment.objects.filter(student=request.user).count(),
+        }
+
+
 # --- Category API Views ---
-class CategoryListCreateAPIView(generics.ListCreateAPIView):
+class CategoryListCreateAPIView(CatalogCacheMixin, QueryPlannerMixin, generics.ListCreateAPIView):
     """
     API view to list all Categories or create a new Category.
     """
     queryset = Category.objects.all().order_by('name')
     serializer_class = CategorySerializer
+    cache_models = (Category,)
     permission_classes = [AllowAny] # Adjust permissions as needed (e.g., IsAdminUser)
 
-class CategoryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class CategoryRetrieveUpdateDestroyAPIView(CatalogCacheMixin, QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific Category by ID.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
     permission_classes = [AllowAny] # Adjust permissions as needed (e.g., IsAdminUser)
 
     def put(self, request, *args, **kwargs):
@@ -105,21 +164,63 @@ class CategoryRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView
 
 
 # --- Course API Views ---
-class CourseListCreateAPIView(generics.ListCreateAPIView):
+class CourseListCreateAPIView(ConditionalGetMixin, CatalogCacheMixin, QueryPlannerMixin, generics.ListCreateAPIView):
     """
     API view to list all Courses or create a new Course.
+    The public catalog lists ?published=true, optionally narrowed with
+    ?category=<id> and ?level=<level>; the partial indexes on Course cover
+    exactly those queries.
     """
     print("CourseListCreateAPIView called",os.getenv('SESSION_COOKIE_SECURE23'))
     queryset = Course.objects.all().order_by('-created_at')
     serializer_class = CourseSerializer
+    etag_timestamp_fields = ('updated_at', 'lessons__updated_at')
+    cache_models = (Course, Lesson, Category, CustomUser)
     permission_classes = [AllowAny] # Allow anyone to view, but restrict create to instructors/admins
 
-class CourseRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        published = params.get('published', '').lower()
+        if published in ('true', '1'):
+            queryset = queryset.filter(is_published=True)
+        elif published in ('false', '0'):
+            queryset = queryset.filter(is_published=False)
+        elif published:
+            raise ValidationError({'published': 'Must be true or false.'})
+        category = params.get('category')
+        if category:
+            if not category.isdigit():
+                raise ValidationError({'category': 'A valid integer is required.'})
+            queryset = queryset.filter(category_id=int(category))
+        level = params.get('level')
+        if level:
+            if level not in dict(Course._meta.get_field('level').choices):
+                raise ValidationError({'level': 'Not a valid level.'})
+            queryset = queryset.filter(level=level)
+        return queryset
+
+class CourseBySlugAPIView(ConditionalGetMixin, CatalogCacheMixin, QueryPlannerMixin, generics.RetrieveAPIView):
+    """
+    API view to retrieve a Course by slug: GET /api/courses/slug/<slug>/.
+    Course pages are addressed by slug, and the catalog list is paginated,
+    so the frontend reads a single course from here.
+    """
+    queryset = Course.objects.all()
+    serializer_class = CourseSerializer
+    lookup_field = 'slug'
+    etag_timestamp_fields = ('updated_at', 'lessons__updated_at')
+    cache_models = (Course, Lesson, Category, CustomUser)
+    permission_classes = [AllowAny]
+
+class CourseRetrieveUpdateDestroyAPIView(ConditionalGetMixin, CatalogCacheMixin, QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific Course by ID.
     """
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    etag_timestamp_fields = ('updated_at', 'lessons__updated_at')
+    cache_models = (Course, Lesson, Category, CustomUser)
     permission_classes = [AllowAny] # Allow anyone to view, but restrict update/delete to instructors/admins
 
     def put(self, request, *args, **kwargs):
@@ -136,20 +237,113 @@ class CourseRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
+class CourseSearchAPIView(APIView):
+    """
+    API endpoint for full-text course search: GET /api/courses/search/?q=...
+    Results are ranked by BM25 over titles, descriptions, learning outcomes
+    and lesson titles; the last word matches as a prefix for typeahead.
+    Only published courses are returned. Supports the same ?fields= /
+    ?expand= options as the course list.
+    """
+    permission_classes = [AllowAny]
+    max_results = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.max_results)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+
+        hits = search_courses(query, limit, published_only=True)
+        context = {'request': request, 'view': self}
+        queryset = plan_queryset(Course.objects.filter(pk__in=[pk for pk, _ in hits]), CourseSerializer(context=context))
+        courses = queryset.in_bulk()
+        hits = [(courses[pk], score) for pk, score in hits if pk in courses]
+        data = CourseSerializer([course for course, _ in hits], many=True, context=context).data
+        results = [{**item, 'score': round(score, 4)} for item, (_, score) in zip(data, hits)]
+        return Response({'query': query, 'results': results})
+
+
+class CourseImportAPIView(APIView):
+    """
+    API endpoint importing a whole course package: POST /api/courses/import/
+    with the course, its lessons, quizzes, questions and choices as JSON (or
+    YAML with a YAML content type). See CoursePackageSerializer for the
+    format. Instructors import courses they teach; admins may name any
+    instructor in the package.
+    """
+    permission_classes = [IsAuthenticated]
+    yaml_content_types = ('application/yaml', 'application/x-yaml', 'text/yaml')
+
+    def post(self, request, *args, **kwargs):
+        if not (is_admin(request.user) or is_instructor(request.user)):
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        if request.content_type.split(';')[0].strip() in self.yaml_content_types:
+            data = load_package(request.body.decode('utf-8'), 'yaml')
+        else:
+            data = request.data
+        if not isinstance(data, dict):
+            raise ValidationError({'detail': 'A course package must be an object.'})
+        if is_instructor(request.user) and data.get('instructor') not in (None, request.user.username):
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        course, counts = import_course(data, instructor=None if is_admin(request.user) else request.user)
+        return Response({'course': course.pk, 'slug': course.slug, **counts}, status=status.HTTP_201_CREATED)
+
+
+def parse_limit(request, default=10, maximum=50):
+    try:
+        return min(max(int(request.query_params.get('limit', default)), 1), maximum)
+    except ValueError:
+        raise ValidationError({'limit': 'A valid integer is required.'})
+
+
+class CourseAlsoTakenAPIView(APIView):
+    """
+    API endpoint for "students also took": GET /api/courses/<pk>/also-taken/
+    returns the published courses most often taken with this one, read from
+    the precomputed CourseNeighbor table (see courses/recommendations.py).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk, *args, **kwargs):
+        hits = also_taken(pk, parse_limit(request))
+        data = CourseSummarySerializer([course for course, _ in hits], many=True, context={'request': request}).data
+        return Response({'results': [{**item, 'score': round(score, 4)} for item, (_, score) in zip(data, hits)]})
+
+
+class RecommendationAPIView(APIView):
+    """
+    API endpoint for the logged-in user's course recommendations:
+    GET /api/recommendations/. Courses similar to the ones they take, best
+    first, excluding those they are already enrolled in.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        hits = recommend_for(request.user, parse_limit(request))
+        data = CourseSummarySerializer([course for course, _ in hits], many=True, context={'request': request}).data
+        return Response({'results': [{**item, 'score': round(score, 4)} for item, (_, score) in zip(data, hits)]})
+
+
 # --- Lesson API Views ---
-class LessonListCreateAPIView(generics.ListCreateAPIView):
+class LessonListCreateAPIView(ConditionalGetMixin, QueryPlannerMixin, generics.ListCreateAPIView):
     """
     API view to list all Lessons or create a new Lesson.
     """
     queryset = Lesson.objects.all().order_by('order')
+    cache_models = (Lesson,)  # generations for the ETag; deletes do not move MAX(updated_at)
     serializer_class = LessonSerializer
     permission_classes = [AllowAny] # Adjust permissions (e.g., IsAuthenticated, IsAdminUser)
 
-class LessonRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class LessonRetrieveUpdateDestroyAPIView(ConditionalGetMixin, QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific Lesson by ID.
     """
     queryset = Lesson.objects.all()
+    cache_models = (Lesson,)  # generations for the ETag; deletes do not move MAX(updated_at)
     serializer_class = LessonSerializer
     permission_classes = [AllowAny] # Adjust permissions
 
@@ -168,20 +362,20 @@ class LessonRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # --- Enrollment API Views ---
-class EnrollmentListCreateAPIView(generics.ListCreateAPIView):
+class EnrollmentListCreateAPIView(QueryPlannerMixin, generics.ListCreateAPIView):
     """
-    API view to list all Enrollments or create a new Enrollment.
-    Anyone can list, only authenticated users can create.
+    API view to list the requesting user's Enrollments or create a new Enrollment.
+    Anyone can list (anonymous users get an empty list), only authenticated users can create.
+    Staff see other students' enrollments through StaffEnrollmentListAPIView.
     """
     serializer_class = EnrollmentSerializer
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
 
     def get_queryset(self):
         user = self.request.user
         print(user, "is requesting enrollments")
         if user.is_authenticated:
-            # return Enrollment.objects.filter(student=user).order_by('-enrolled_at')
-            return Enrollment.objects.all().order_by('-enrolled_at')
+            return Enrollment.objects.filter(student=user).order_by('-enrolled_at')
         return Enrollment.objects.none()
 
     def get_permissions(self):
@@ -192,15 +386,74 @@ class EnrollmentListCreateAPIView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(student=self.request.user)
 
-class EnrollmentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class EnrollmentFeedAPIView(QueryPlannerMixin, generics.ListAPIView):
+    """
+    API endpoint for the logged-in student's enrollment feed:
+    GET /api/enrollments/feed/. Each enrollment carries its progress and a
+    course summary, read in one joined query per page. ?course=<slug>
+    narrows it to one course, to tell whether the student is enrolled.
+    """
+    serializer_class = EnrollmentFeedSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+
+    def get_queryset(self):
+        queryset = Enrollment.objects.filter(student=self.request.user).order_by('-enrolled_at')
+        course = self.request.query_params.get('course')
+        if course:
+            queryset = queryset.filter(course__slug=course)
+        return queryset
+
+
+class StaffEnrollmentListAPIView(QueryPlannerMixin, generics.ListAPIView):
+    """
+    API endpoint listing enrollments for staff: GET /api/enrollments/staff/.
+    Admins see every enrollment, instructors those in the courses they
+    teach. Filter with ?course=<id> and ?student=<id>; paginated like every
+    other list.
+    """
+    serializer_class = StaffEnrollmentSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Enrollment.objects.order_by('-enrolled_at')
+        if not is_admin(user):
+            queryset = queryset.filter(course__instructor=user)
+        for param in ('course', 'student'):
+            value = self.request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError({param: 'A valid integer is required.'})
+                queryset = queryset.filter(**{f'{param}_id': int(value)})
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if not (is_admin(request.user) or is_instructor(request.user)):
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+        return super().list(request, *args, **kwargs)
+
+
+class EnrollmentRetrieveUpdateDestroyAPIView(QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific Enrollment by ID.
-    Only authenticated users (typically the student or an admin) can access.
+    Scoped like the lists: students reach their own enrollments, instructors
+    also those in the courses they teach, admins every enrollment. Anything
+    else is a 404.
     """
-    queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [SessionAuthentication, SignedTokenAuthentication]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Enrollment.objects.all()
+        if is_admin(user):
+            return queryset
+        if is_instructor(user):
+            return queryset.filter(Q(student=user) | Q(course__instructor=user))
+        return queryset.filter(student=user)
 
     def delete(self, request, *args, **kwargs):
         # Only admin or instructor can delete enrollments
@@ -209,20 +462,288 @@ class EnrollmentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIVi
         return super().delete(request, *args, **kwargs)
 
 
+class BulkEnrollmentAPIView(APIView):
+    """
+    API endpoint for enrolling a cohort into one course.
+    Expects {"course": <id>, "users": [<user id or email>, ...]} and returns a
+    result per requested user. Students are resolved in one query, inserted
+    with one bulk_create and notified through one batch of queued emails.
+    Only admins and the course's instructor can use it.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course = serializer.validated_data['course']
+        identifiers = list(dict.fromkeys(value.strip() for value in serializer.validated_data['users']))
+
+        if not (is_admin(request.user) or (is_instructor(request.user) and course.instructor_id == request.user.pk)):
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        ids = [int(value) for value in identifiers if value.isdigit()]
+        emails = [value.lower() for value in identifiers if not value.isdigit()]
+        # Emails match case-insensitively on every backend, as they do below.
+        users = CustomUser.objects.alias(email_lower=Lower('email')).filter(
+            Q(pk__in=ids) | Q(email_lower__in=emails)
+        ).only('pk', 'username', 'first_name', 'email')
+        by_id = {user.pk: user for user in users}
+        by_email = {user.email.lower(): user for user in users if user.email}
+        already_enrolled = set(
+            Enrollment.objects.filter(course=course, student__in=by_id.keys()).values_list('student_id', flat=True)
+        )
+
+        results, new_students = [], {}
+        for value in identifiers:
+            user = by_id.get(int(value)) if value.isdigit() else by_email.get(value.lower())
+            if user is None:
+                results.append({'user': value, 'status': 'not_found'})
+            elif user.pk in already_enrolled or user.pk in new_students:
+                results.append({'user': value, 'student_id': user.pk, 'status': 'already_enrolled'})
+            else:
+                new_students[user.pk] = user
+                results.append({'user': value, 'student_id': user.pk, 'status': 'enrolled'})
+
+        with transaction.atomic():
+            # ignore_conflicts lets the ('student', 'course') unique constraint
+            # absorb enrollments created concurrently since the check above.
+            Enrollment.objects.bulk_create(
+                [Enrollment(student=user, course=course) for user in new_students.values()],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+            # bulk_create() sends no post_save, so drop the cached /api/me/ counts here.
+            forget_profiles(new_students)
+
+            course_url = request.build_absolute_uri(course.get_absolute_url())
+            email_error = queue_mass_email(
+                template='registration/course_enrollment_email.html',
+                subject=f'Enrolled in {course.title}',
+                messages=[
+                    (
+                        {'user': user, 'course': course, 'course_url': course_url},
+                        [user.email],
+                        f"Hi {user.username},\n\nYou have successfully enrolled in {course.title}! Access the course at {course_url}\n\nBest,\nThe E-Learn Team",
+                    )
+                    for user in new_students.values() if user.email
+                ],
+            )
+            if email_error:
+                print(f"[Email Error] Failed to queue enrollment emails for course {course.pk}: {email_error}")
+
+        return Response({
+            'course': course.pk,
+            'enrolled': len(new_students),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
+class LessonProgressAPIView(APIView):
+    """
+    API endpoint for lesson progress.
+
+    POST {"events": [{"lesson": <id>, "position": <seconds>, "completed": <bool>}, ...]}
+    accepts playback heartbeats and completions from the player. Events are
+    coalesced in memory and written in batches (see Enrollment/progress.py);
+    events for lessons of courses the user is not enrolled in are ignored.
+
+    GET ?course=<id> returns the user's progress in that course, per lesson.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ProgressEventsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.validated_data['events']
+
+        lesson_courses = dict(
+            Lesson.objects.filter(pk__in={event['lesson'] for event in events}).values_list('pk', 'course_id')
+        )
+        enrollment_ids = dict(
+            Enrollment.objects.filter(student=request.user, course_id__in=set(lesson_courses.values()))
+            .values_list('course_id', 'pk')
+        )
+
+        accepted, ignored = 0, []
+        for event in events:
+            enrollment_id = enrollment_ids.get(lesson_courses.get(event['lesson']))
+            if enrollment_id is None:
+                ignored.append(event['lesson'])
+                continue
+            progress_buffer.add(enrollment_id, event['lesson'], event.get('position'), event['completed'])
+            accepted += 1
+        return Response({'accepted': accepted, 'ignored': ignored}, status=status.HTTP_202_ACCEPTED)
+
+    def get(self, request, *args, **kwargs):
+        course_id = request.query_params.get('course', '')
+        if not course_id.isdigit():
+            raise ValidationError({'course': 'A valid course id is required.'})
+        enrollment = Enrollment.objects.filter(student=request.user, course_id=course_id).first()
+        if enrollment is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'enrollment': enrollment.pk,
+            'progress': enrollment.progress,
+            'is_completed': enrollment.is_completed,
+            'completed_at': enrollment.completed_at,
+            'completed_lessons': enrollment.completed_lessons,
+            # Includes the user's events still waiting in this process.
+            'lessons': LessonProgressSerializer(lesson_progress_rows(enrollment), many=True).data,
+        })
+
+
+# --- Certificate API Views ---
+class CertificateVerifyAPIView(APIView):
+    """
+    Public API endpoint confirming that a certificate exists:
+    GET /api/certificates/<unique_id>/verify/
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, unique_id, *args, **kwargs):
+        data = verify_certificate(unique_id)
+        if data is None:
+            return Response({'detail': 'Not found.', 'valid': False}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+class CertificateDocumentAPIView(APIView):
+    """
+    Public API endpoint returning a certificate's printable HTML document:
+    GET /api/certificates/<unique_id>/document/
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, unique_id, *args, **kwargs):
+        try:
+            path = get_document(unique_id)
+        except Certificate.DoesNotExist:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), content_type='text/html; charset=utf-8')
+
+
+# --- Export API Views ---
+class ExportAPIView(APIView):
+    """
+    API endpoint streaming a report: GET /api/exports/<kind>/ where kind is
+    'enrollments' or 'quiz-attempts'.
+
+    ?output=csv|jsonl (default csv), ?course=<id>, ?since= / ?until= (dates or
+    datetimes, inclusive) and ?passed=true|false (completion for enrollments).
+    Admins can export everything; instructors only their own courses.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, kind, *args, **kwargs):
+        if not (is_admin(request.user) or is_instructor(request.user)):
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        params = request.query_params
+        output_format = params.get('output', 'csv')
+        try:
+            header, rows = export_rows(
+                kind,
+                course=params.get('course'),
+                since=params.get('since'),
+                until=params.get('until'),
+                passed=params.get('passed'),
+                instructor=None if is_admin(request.user) else request.user,
+            )
+            content = iter_export(header, rows, output_format)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(content, content_type=FORMATS[output_format])
+        filename = f"{kind}-{timezone.now():%Y%m%d-%H%M%S}.{output_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+# --- Analytics API Views ---
+class AnalyticsMixin:
+    """
+    Shared scoping for the analytics endpoints: admins see every course,
+    instructors the courses they teach. ?course=<id> narrows to one course;
+    ?since= / ?until= are dates (default: the last 30 days). Responses are
+    built from the Analytics rollups only.
+    """
+    permission_classes = [IsAuthenticated]
+    default_days = 30
+
+    def get_scope(self, request):
+        courses = Course.objects.all() if is_admin(request.user) else Course.objects.filter(instructor=request.user)
+        course = request.query_params.get('course')
+        if course:
+            if not course.isdigit():
+                raise ValidationError({'course': 'A valid integer is required.'})
+            courses = courses.filter(pk=int(course))
+        until = self.get_date(request, 'until') or timezone.localdate()
+        since = self.get_date(request, 'since') or until - timedelta(days=self.default_days - 1)
+        return dict(courses.values_list('pk', 'title')), since, until
+
+    def get_date(self, request, param):
+        value = request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({param: 'Use the YYYY-MM-DD format.'})
+        return day
+
+    def has_analytics_access(self, request):
+        return is_admin(request.user) or is_instructor(request.user)
+
+
+class CourseAnalyticsAPIView(AnalyticsMixin, APIView):
+    """
+    API endpoint for per-course analytics: GET /api/analytics/courses/.
+    Each course gets daily enrollments, completions and quiz outcomes plus
+    totals with completion rate, pass rate and average score.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not self.has_analytics_access(request):
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+        titles, since, until = self.get_scope(request)
+        report = course_report(list(titles), since, until)
+        return Response({
+            'since': since,
+            'until': until,
+            'results': [{'course': pk, 'title': title, **report[pk]} for pk, title in titles.items()],
+        })
+
+
+class QuizAnalyticsAPIView(AnalyticsMixin, APIView):
+    """
+    API endpoint for per-quiz analytics: GET /api/analytics/quizzes/.
+    Attempts, pass rate and average score of every quiz in scope.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not self.has_analytics_access(request):
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+        titles, since, until = self.get_scope(request)
+        return Response({'since': since, 'until': until, 'results': quiz_report(list(titles), since, until)})
+
+
 # --- Quiz API Views ---
-class QuizListCreateAPIView(generics.ListCreateAPIView):
+class QuizListCreateAPIView(ConditionalGetMixin, QueryPlannerMixin, generics.ListCreateAPIView):
     """
     API view to list all Quizzes or create a new Quiz.
     """
     queryset = Quiz.objects.all().order_by('-created_at')
+    cache_models = (Quiz,)  # generations for the ETag; deletes do not move MAX(updated_at)
     serializer_class = QuizSerializer
     permission_classes = [AllowAny] # Adjust permissions
 
-class QuizRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class QuizRetrieveUpdateDestroyAPIView(ConditionalGetMixin, QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific Quiz by ID.
     """
     queryset = Quiz.objects.all()
+    cache_models = (Quiz,)  # generations for the ETag; deletes do not move MAX(updated_at)
     serializer_class = QuizSerializer
     permission_classes = [AllowAny] # Adjust permissions
 
@@ -240,21 +761,78 @@ class QuizRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
+class QuizSnapshotAPIView(APIView):
+    """
+    API endpoint serving a quiz's questions and choices (without the correct
+    answers) as one precomputed JSON document: GET /api/quizzes/<pk>/snapshot/
+    The ETag is the snapshot's version hash, so clients can revalidate.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, *args, **kwargs):
+        try:
+            version, blob = get_snapshot(pk)
+        except Quiz.DoesNotExist:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = f'"{version}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(blob, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class QuizSubmitAPIView(APIView):
+    """
+    API endpoint for submitting answers to a quiz: POST /api/quizzes/<pk>/submit/
+    with {"answers": {"<question id>": <choice id> | [<choice ids>] | "<text>"}}.
+    The submission is graded in memory against the quiz's cached answer key
+    and stored as the student's next UserQuizAttempt.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk, *args, **kwargs):
+        try:
+            key = get_answer_key(pk)
+        except Quiz.DoesNotExist:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not (is_admin(request.user) or Enrollment.objects.filter(student=request.user, course_id=key.course_id).exists()):
+            return Response({'detail': 'You must be enrolled in this course to take the quiz.'}, status=status.HTTP_403_FORBIDDEN)
+
+        result = grade(key, request.data.get('answers', {}))
+        attempt = record_attempt(request.user, key, result)
+        return Response({
+            'attempt': attempt.pk,
+            'attempt_number': attempt.attempt_number,
+            'score': result.score,
+            'passed': result.passed,
+            'correct': result.correct,
+            'total': result.total,
+            'results': {str(question_id): is_correct for question_id, is_correct in result.results.items()},
+        }, status=status.HTTP_201_CREATED)
+
+
 # --- FAQ API Views ---
-class FAQListCreateAPIView(generics.ListCreateAPIView):
+class FAQListCreateAPIView(ConditionalGetMixin, CatalogCacheMixin, QueryPlannerMixin, generics.ListCreateAPIView):
     """
     API view to list all FAQs or create a new FAQ.
     """
     queryset = FAQ.objects.filter(is_published=True).order_by('-created_at')
     serializer_class = FAQSerializer
+    cache_models = (FAQ,)
     permission_classes = [AllowAny]
 
-class FAQRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class FAQRetrieveUpdateDestroyAPIView(ConditionalGetMixin, CatalogCacheMixin, QueryPlannerMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API view to retrieve, update, or delete a specific FAQ by ID.
     """
     queryset = FAQ.objects.all()
     serializer_class = FAQSerializer
+    cache_models = (FAQ,)
     permission_classes = [AllowAny]
 
     def put(self, request, *args, **kwargs):
@@ -277,6 +855,7 @@ class LoginAPIView(APIView):
     API endpoint for logging in a user using username and password.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle, LoginUsernameRateThrottle]
 
     def post(self, request, *args, **kwargs):
         username = request.data.get('username')
@@ -284,18 +863,39 @@ class LoginAPIView(APIView):
         user = authenticate(request, username=username, password=password)
 
         if user is not None and user.is_active:
+            # Only failed attempts count against the account.
+            LoginUsernameRateThrottle().reset(request)
             login(request, user)
-            return Response({'detail': 'Login successful'}, status=status.HTTP_200_OK)
+            # API clients send this as `Authorization: Bearer <token>` instead of a session cookie
+            return Response({
+                'detail': 'Login successful',
+                'token': issue_token(user),
+                'expires_in': token_max_age(),
+            }, status=status.HTTP_200_OK)
 
         return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
+class LogoutAPIView(APIView):
+    """
+    API endpoint for logging out: ends the session and revokes every bearer
+    token issued to the user.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        revoke_tokens(request.user)
+        logout(request)
+        return Response({'detail': 'Logout successful'}, status=status.HTTP_200_OK)
+
+
 # --- Register API View ---
 class RegisterAPIView(APIView):
     """
     API endpoint for registering a new user.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterRateThrottle]
 
     def post(self, request, *args, **kwargs):
         username = request.data.get('username')
@@ -342,7 +942,8 @@ class RegisterAPIView(APIView):
             welcome_email_template = 'welcome_email.html'
             welcome_email_subject = f'Welcome to SHP-Learner, {user.username}!'
 
-            email_error = trigger_email(
+            # Queued for the outbox worker so the request never waits on SMTP
+            email_error = queue_email(
                 context=welcome_context,
                 template=welcome_email_template,
                 subject=welcome_email_subject,
@@ -351,7 +952,7 @@ class RegisterAPIView(APIView):
             )
 
             if email_error:
-                print(f"[Email Error] Failed to send welcome email to {user.email}: {email_error}")
+                print(f"[Email Error] Failed to queue welcome email to {user.email}: {email_error}")
                 print(email_error)
 
         except Exception as e:
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
+from rest_framework import authentication, exceptions
+
+from Account.models import CustomUser
+from .catalog_cache import get_cache
+
+TOKEN_SALT = 'courses.authentication.api-token'
+KEYWORD = 'Bearer'
+
+
+def token_max_age():
+    return getattr(settings, 'API_TOKEN_MAX_AGE', 86400)
+
+
+# The columns token authentication and the permission checks need. Only
+# these are kept in the shared cache; the password hash and profile stay
+# in the database.
+CACHED_USER_FIELDS = ('id', 'username', 'role', 'is_active', 'is_staff', 'is_superuser', 'token_version')
+
+
+def user_cache_key(user_id):
+    return f"auth:identity:{user_id}"
+
+
+def profile_cache_key(user_id):
+    return f"auth:profile:{user_id}"
+
+
+def issue_token(user):
+    """
+    Sign a bearer token for `user`. It carries the user id and the user's
+    token_version, so it stops verifying once it expires (API_TOKEN_MAX_AGE)
+    or the user's tokens are revoked.
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign_object({'u': user.pk, 'v': user.token_version})
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to `user` so far."""
+    CustomUser.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    forget_user(user.pk)
+
+
+def forget_user(user_id):
+    get_cache().delete_many([user_cache_key(user_id), profile_cache_key(user_id)])
+
+
+def forget_profiles(user_ids):
+    """Drop the cached /api/me/ responses of these users, e.g. after their enrollments changed."""
+    get_cache().delete_many([profile_cache_key(user_id) for user_id in user_ids])
+
+
+def get_cached_user(user_id):
+    """
+    Load a user for authentication, cached for API_TOKEN_USER_CACHE_TIMEOUT
+    seconds. courses/signals.py drops the entry whenever the user is saved.
+    Only CACHED_USER_FIELDS are cached and loaded; the other fields are
+    deferred, so they load on first access (see full_user()).
+    """
+    # from_db() expects the values in model field order.
+    fields = [field.attname for field in CustomUser._meta.concrete_fields if field.attname in CACHED_USER_FIELDS]
+    cache = get_cache()
+    key = user_cache_key(user_id)
+    values = cache.get(key)
+    if values is None:
+        values = CustomUser.objects.filter(pk=user_id).values_list(*fields).first()
+        if values is None:
+            return None
+        cache.set(key, values, getattr(settings, 'API_TOKEN_USER_CACHE_TIMEOUT', 300))
+    return CustomUser.from_db(CustomUser.objects.db, fields, values)
+
+
+def full_user(user):
+    """`user` with every field loaded, in one query if token authentication deferred some."""
+    if user.get_deferred_fields():
+        return CustomUser.objects.get(pk=user.pk)
+    return user
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Stateless bearer tokens: `Authorization: Bearer <token>`.
+
+    Verifying a token is an HMAC check (django.core.signing) plus a cached
+    user lookup, instead of a password hash per request as with
+    BasicAuthentication. Tokens are issued by LoginAPIView.
+    """
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != KEYWORD.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            payload = signing.TimestampSigner(salt=TOKEN_SALT).unsign_object(
+                header[1].decode(), max_age=token_max_age(),
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        except (signing.BadSignature, UnicodeDecodeError, ValueError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        user = get_cached_user(payload.get('u'))
+        if user is None or not user.is_active or user.token_version != payload.get('v'):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        return (user, payload)
+
+    def authenticate_header(self, request):
+        return KEYWORD
@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _generation_key(label):
+    return f"catalog:generation:{label}"
+
+
+def _model_label(model):
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def get_generations(models):
+    """
+    Return the current generation counter of every model in `models`.
+
+    Counters start at the current time in milliseconds rather than 1, so a
+    counter that was evicted and re-created can never line up with response
+    entries cached under its previous life.
+    """
+    cache = get_cache()
+    keys = [_generation_key(_model_label(model)) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, int(time.time() * 1000), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(model):
+    """Invalidate every cached response that depends on `model`."""
+    cache = get_cache()
+    key = _generation_key(_model_label(model))
+    cache.add(key, int(time.time() * 1000), None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr().
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def get_versioned(key, models):
+    """
+    Return (value, generations): the value stored under `key` by
+    set_versioned() if it was stored at the current generations of `models`,
+    else None. The entry and the counters are read in one cache round trip.
+    """
+    cache = get_cache()
+    generation_keys = [_generation_key(_model_label(model)) for model in models]
+    found = cache.get_many([key, *generation_keys])
+    if all(generation_key in found for generation_key in generation_keys):
+        generations = [found[generation_key] for generation_key in generation_keys]
+    else:
+        generations = get_generations(models)
+    entry = found.get(key)
+    if entry is not None and entry[0] == generations:
+        return entry[1], generations
+    return None, generations
+
+
+def set_versioned(key, generations, value, timeout=None):
+    get_cache().set(key, (generations, value), timeout)
+
+
+def response_cache_key(view, request, kind='response'):
+    generations = get_generations(view.cache_models)
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    versions = '.'.join(str(generation) for generation in generations)
+    return f"catalog:{kind}:{type(view).__name__}:{versions}:{url}"
+
+
+class CatalogCacheMixin:
+    """
+    Read-through cache for public catalog endpoints.
+
+    GET responses are cached under a key built from the request URL and the
+    generation counters of `cache_models`. Saving or deleting any of those
+    models bumps its counter (see courses/signals.py), so stale entries are
+    never read again and simply age out of the cache.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = response_cache_key(self, request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+            response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,96 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .catalog_cache import get_cache, get_generations, response_cache_key
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for list and detail GETs.
+
+    The validators come from the generation counters of `cache_models`
+    (bumped on every save and delete of those models, see
+    catalog_cache.py) and one MAX() query over every field in
+    `etag_timestamp_fields`. They are cached per generation, so a matching
+    If-None-Match / If-Modified-Since is answered with 304 before any rows
+    are loaded or serialized, and usually without any query at all.
+
+    Last-Modified only has one-second precision and cannot see a
+    generation bump by itself, so it is the later of the newest timestamp
+    and the time the current generations were first seen, and it is left
+    out while that falls in the current second. When a client sends both
+    headers the ETag decides.
+    """
+    etag_timestamp_fields = ('updated_at',)
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, self.get_queryset(), request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return self.conditional_response(super().retrieve, queryset, request, *args, **kwargs)
+
+    def get_validators(self, queryset, request):
+        aggregates = {f'max_{i}': Max(field) for i, field in enumerate(self.etag_timestamp_fields)}
+        values = queryset.order_by().aggregate(**aggregates)
+        timestamps = [values[f'max_{i}'] for i in range(len(self.etag_timestamp_fields))]
+        timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+        generations = get_generations(self.cache_models)
+
+        parts = [
+            type(self).__name__,
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+        ]
+        parts.extend(timestamp.isoformat() for timestamp in timestamps)
+        parts.extend(str(generation) for generation in generations)
+        etag = quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+
+        changed = [timestamp.timestamp() for timestamp in timestamps]
+        if generations:
+            changed.append(self.generations_seen_at(generations))
+        return etag, max(changed) if changed else None
+
+    def generations_seen_at(self, generations):
+        # When these generations were first seen: no earlier than the change that produced them.
+        key = f"catalog:seen:{type(self).__name__}:{'.'.join(str(generation) for generation in generations)}"
+        cache = get_cache()
+        cache.add(key, time.time(), getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+        return cache.get(key, time.time())
+
+    def get_cached_validators(self, queryset, request):
+        if not self.cache_models:
+            return self.get_validators(queryset, request)
+        cache = get_cache()
+        accept = hashlib.md5(request.META.get('HTTP_ACCEPT', '').encode()).hexdigest()
+        key = response_cache_key(self, request, kind=f'validators:{accept}')
+        validators = cache.get(key)
+        if validators is None:
+            validators = self.get_validators(queryset, request)
+            cache.set(key, validators, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600))
+        return validators
+
+    def conditional_response(self, handler, queryset, request, *args, **kwargs):
+        etag, last_modified = self.get_cached_validators(queryset, request)
+        if last_modified is not None:
+            # Another change within this second would carry the same date.
+            last_modified = int(last_modified) if int(last_modified) < int(time.time()) else None
+        # Django ignores If-Modified-Since whenever If-None-Match is sent.
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Let browsers and the CDN keep the body but revalidate every time.
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,124 @@
+import json
+
+from django.db import transaction
+from django.utils.text import slugify
+from rest_framework.exceptions import ValidationError
+
+from Lesson.models import Lesson
+from utils.slugs import allocate_slugs, save_with_unique_slug
+from Question.models import AnswerChoice, Question
+from Quiz.models import Quiz
+from .models import Course
+from .search import reindex_courses
+from .serializers import CoursePackageSerializer
+from .signals import invalidate_catalog
+
+try:
+    import yaml
+except ImportError:  # YAML packages are optional; JSON always works.
+    yaml = None
+
+
+def load_package(text, fmt='json'):
+    """Parse a course package from JSON or YAML text. Raises ValidationError."""
+    if fmt == 'yaml':
+        if yaml is None:
+            raise ValidationError({'detail': "YAML packages need PyYAML installed."})
+        try:
+            return yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValidationError({'detail': f"Invalid YAML: {e}"})
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise ValidationError({'detail': f"Invalid JSON: {e}"})
+
+
+def _bulk_insert(model, objects, parent_field):
+    """
+    bulk_create() `objects` and make sure they have primary keys. Backends
+    that cannot return ids from a bulk insert get them read back by parent,
+    in insertion order; the parents were created by this import, so their
+    children are exactly these rows.
+    """
+    model.objects.bulk_create(objects, batch_size=500)
+    if objects and objects[0].pk is None:
+        attname = model._meta.get_field(parent_field).attname
+        pks = model.objects.filter(**{f'{attname}__in': {getattr(obj, attname) for obj in objects}}).order_by(attname, 'pk')
+        by_parent = {}
+        for obj in objects:
+            by_parent.setdefault(getattr(obj, attname), []).append(obj)
+        for parent_id, pk in pks.values_list(attname, 'pk'):
+            by_parent[parent_id].pop(0).pk = pk
+    return objects
+
+
+def import_course(data, instructor=None):
+    """
+    Validate a course package (see CoursePackageSerializer) and create the
+    course with all its lessons, quizzes, questions and choices in one
+    transaction: one bulk INSERT per table, whatever the size of the course.
+    `instructor` overrides the package's. Returns (course, counts).
+
+    bulk_create() sends no signals, so total_lectures, the search index and
+    the catalog generations are updated here instead.
+    """
+    serializer = CoursePackageSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    package = dict(serializer.validated_data)
+    lessons_data = package.pop('lessons')
+    if instructor is not None:
+        package['instructor'] = instructor
+
+    base = package.pop('slug', None) or slugify(package['title'])
+    # The course is new, so its lesson slugs only have to differ from each other.
+    lesson_slugs = allocate_slugs(
+        [lesson.get('slug') or slugify(lesson['title']) for lesson in lessons_data],
+        set(), Lesson._meta.get_field('slug').max_length,
+    )
+
+    with transaction.atomic():
+        course = Course(total_lectures=len(lessons_data), **package)
+        save_with_unique_slug(course, base, Course.objects.all(), course.save)
+
+        lessons = _bulk_insert(Lesson, [
+            Lesson(
+                course=course, slug=slug, order=lesson.get('order', index + 1),
+                **{key: value for key, value in lesson.items() if key not in ('quizzes', 'slug', 'order')},
+            )
+            for index, (lesson, slug) in enumerate(zip(lessons_data, lesson_slugs))
+        ], 'course')
+
+        quizzes, quizzes_data = [], []
+        for lesson, lesson_data in zip(lessons, lessons_data):
+            for quiz in lesson_data.get('quizzes', []):
+                quizzes.append(Quiz(lesson=lesson, **{key: value for key, value in quiz.items() if key != 'questions'}))
+                quizzes_data.append(quiz)
+        _bulk_insert(Quiz, quizzes, 'lesson')
+
+        questions, questions_data = [], []
+        for quiz, quiz_data in zip(quizzes, quizzes_data):
+            for index, question in enumerate(quiz_data.get('questions', [])):
+                questions.append(Question(
+                    quiz=quiz, order=question.get('order', index + 1),
+                    **{key: value for key, value in question.items() if key not in ('choices', 'order')},
+                ))
+                questions_data.append(question)
+        _bulk_insert(Question, questions, 'quiz')
+
+        choices = [
+            AnswerChoice(question=question, **choice)
+            for question, question_data in zip(questions, questions_data)
+            for choice in question_data.get('choices', [])
+        ]
+        AnswerChoice.objects.bulk_create(choices, batch_size=500)
+
+        invalidate_catalog(Lesson)
+        reindex_courses([course.pk])
+
+    return course, {
+        'lessons': len(lessons),
+        'quizzes': len(quizzes),
+        'questions': len(questions),
+        'choices': len(choices),
+    }
@@ -0,0 +1,134 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from Enrollment.models import Enrollment
+from Quiz.models import UserQuizAttempt
+
+# kind -> how to export it. `columns` are (header, values_list path) pairs.
+EXPORTS = {
+    'enrollments': {
+        'queryset': lambda: Enrollment.objects.all(),
+        'columns': (
+            ('id', 'id'),
+            ('student_id', 'student_id'),
+            ('username', 'student__username'),
+            ('email', 'student__email'),
+            ('course_id', 'course_id'),
+            ('course', 'course__title'),
+            ('enrolled_at', 'enrolled_at'),
+            ('progress', 'progress'),
+            ('is_completed', 'is_completed'),
+            ('completed_at', 'completed_at'),
+        ),
+        'course': 'course_id',
+        'instructor': 'course__instructor',
+        'date': 'enrolled_at',
+        'passed': 'is_completed',
+    },
+    'quiz-attempts': {
+        'queryset': lambda: UserQuizAttempt.objects.all(),
+        'columns': (
+            ('id', 'id'),
+            ('student_id', 'student_id'),
+            ('username', 'student__username'),
+            ('course_id', 'quiz__lesson__course_id'),
+            ('quiz_id', 'quiz_id'),
+            ('quiz', 'quiz__title'),
+            ('attempt_number', 'attempt_number'),
+            ('score', 'score'),
+            ('passed', 'passed'),
+            ('submitted_at', 'submitted_at'),
+        ),
+        'course': 'quiz__lesson__course_id',
+        'instructor': 'quiz__lesson__course__instructor',
+        'date': 'submitted_at',
+        'passed': 'passed',
+    },
+}
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+CHUNK_SIZE = 2000
+
+
+def parse_bound(value, end=False):
+    """
+    A date or datetime filter value as an aware datetime. A bare date used
+    as the end of a range covers that whole day.
+    """
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    elif moment is None:
+        raise ValueError(f"'{value}' is not a valid date or datetime.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_rows(kind, course=None, since=None, until=None, passed=None, instructor=None):
+    """
+    Return (header, rows) for an export. `rows` is a lazy iterator of
+    tuples read with values_list().iterator(), so no model instances are
+    built and memory stays flat however many rows there are. Raises
+    ValueError for unknown kinds or invalid filter values.
+    """
+    try:
+        spec = EXPORTS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown export '{kind}'. Choose from: {', '.join(EXPORTS)}.")
+
+    queryset = spec['queryset']()
+    if course not in (None, ''):
+        if not str(course).isdigit():
+            raise ValueError("'course' must be a course id.")
+        queryset = queryset.filter(**{spec['course']: int(course)})
+    if instructor is not None:
+        queryset = queryset.filter(**{spec['instructor']: instructor})
+    if since:
+        queryset = queryset.filter(**{f"{spec['date']}__gte": parse_bound(since)})
+    if until:
+        # A bare date ends at the next midnight, exclusive; a datetime is inclusive.
+        bound = parse_bound(until, end=True)
+        lookup = 'lte' if parse_date(until) is None else 'lt'
+        queryset = queryset.filter(**{f"{spec['date']}__{lookup}": bound})
+    if passed not in (None, ''):
+        if str(passed).lower() not in ('true', 'false', '1', '0'):
+            raise ValueError("'passed' must be true or false.")
+        queryset = queryset.filter(**{spec['passed']: str(passed).lower() in ('true', '1')})
+
+    header = [name for name, _ in spec['columns']]
+    rows = queryset.order_by('pk').values_list(*(path for _, path in spec['columns'])).iterator(chunk_size=CHUNK_SIZE)
+    return header, rows
+
+
+class _Echo:
+    """A file-like object that hands back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(header, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+def iter_export(header, rows, output_format):
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown format '{output_format}'. Choose from: {', '.join(FORMATS)}.")
+    return (iter_csv if output_format == 'csv' else iter_jsonl)(header, rows)
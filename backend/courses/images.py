@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import ExifTags, Image, ImageOps, features
+
+from Account.models import CustomUser
+from Category.models import Category
+from .catalog_cache import bump_generation, get_cache
+from .models import Course, ImageVariant
+
+logger = logging.getLogger(__name__)
+
+# model -> its uploaded image field. Variants of these are built on upload,
+# on first use, or by `manage.py generate_image_variants`.
+IMAGE_FIELDS = {
+    Course: 'thumbnail',
+    Category: 'image',
+    CustomUser: 'profile_picture',
+}
+VARIANT_DIR = 'variants'
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+CACHE_TIMEOUT = 24 * 60 * 60
+# Sources that could not be read or decoded are not retried for this long.
+FAILURE_TIMEOUT = 60 * 60
+# Sources queued for building are cached as having no variants for this
+# long, so pages listing them do not query for them on every request.
+PENDING_TIMEOUT = 60
+
+_pool = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def variant_options():
+    """(widths, format, quality) from settings. Falls back to JPEG when Pillow was built without WebP."""
+    widths = sorted({width for width in getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1280]) if width > 0})
+    fmt = getattr(settings, 'IMAGE_VARIANT_FORMAT', 'webp').lower()
+    if fmt not in EXTENSIONS or (fmt == 'webp' and not features.check('webp')):
+        fmt = 'jpeg'
+    return widths, fmt, getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+
+
+def variants_cache_key(source, fmt):
+    return f"image:variants:{fmt}:{hashlib.md5(source.encode()).hexdigest()}"
+
+
+def _prepare(image, fmt):
+    """Upright, in a mode the output format can store. JPEG has no alpha, so transparency goes on white."""
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if not has_alpha:
+        return image.convert('RGB')
+    image = image.convert('RGBA')
+    if fmt == 'webp':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def encode_variants(source, storage=None):
+    """
+    Resize the image stored as `source` to every configured width narrower
+    than it (or re-encode it at its own width when it is narrower than them
+    all) and store the results under variants/<digest>-<width>w.<ext>.
+
+    The digest covers the source bytes, format and quality, so a file name
+    is only ever written once; existing files are reused. Touches storage
+    only, never the database. Returns unsaved ImageVariant rows.
+    """
+    storage = storage or default_storage
+    widths, fmt, quality = variant_options()
+    with storage.open(source, 'rb') as original:
+        data = original.read()
+    digest = hashlib.sha256(data + repr((fmt, quality)).encode()).hexdigest()[:16]
+
+    image = Image.open(BytesIO(data))
+    # EXIF orientations 5-8 turn the image on its side once it is upright.
+    upright_width = image.height if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8) else image.width
+    targets = [width for width in widths if width < upright_width] or [upright_width]
+    # JPEG sources can be decoded straight at a fraction of their size.
+    scale = targets[-1] / upright_width
+    image.draft('RGB', (max(1, round(image.width * scale)), max(1, round(image.height * scale))))
+    image = _prepare(image, fmt)
+
+    variants = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        name = f"{VARIANT_DIR}/{digest}-{width}w.{EXTENSIONS[fmt]}"
+        if not storage.exists(name):
+            resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            buffer = BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=quality, optimize=True)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+        variants.append(ImageVariant(source=source, width=width, height=height, format=fmt, name=name))
+    return variants
+
+
+def save_variants(source, variants):
+    """Replace the variant rows of `source` in one transaction and cache them. Returns {width: name}."""
+    with transaction.atomic():
+        ImageVariant.objects.filter(source=source).delete()
+        ImageVariant.objects.bulk_create(variants)
+    found = {variant.width: variant.name for variant in variants}
+    get_cache().set(variants_cache_key(source, variant_options()[1]), found, CACHE_TIMEOUT)
+    return found
+
+
+def build_variants(source, storage=None):
+    """Encode and store the variants of `source`. Returns {width: name}."""
+    return save_variants(source, encode_variants(source, storage))
+
+
+def _generate(source, model=None):
+    try:
+        build_variants(source)
+    except Exception:
+        logger.exception("Could not build image variants of %s", source)
+        get_cache().set(variants_cache_key(source, variant_options()[1]), {}, FAILURE_TIMEOUT)
+        return
+    if model is not None:
+        # Catalog responses cached before the variants existed list none.
+        bump_generation(model)
+
+
+def _run(source, model):
+    try:
+        _generate(source, model)
+    finally:
+        with _lock:
+            _pending.discard(source)
+        # Pool threads outlive the task; do not leave their connection open.
+        connection.close()
+
+
+def schedule_variants(source, model=None):
+    """
+    Build the variants of `source` off the request thread, on a small
+    per-process thread pool. A source already queued is not queued twice.
+    With IMAGE_VARIANTS_ASYNC off they are built right away instead.
+    """
+    if not getattr(settings, 'IMAGE_VARIANTS_ASYNC', True):
+        _generate(source, model)
+        return
+    global _pool
+    with _lock:
+        if source in _pending:
+            return
+        _pending.add(source)
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2), thread_name_prefix='image-variants',
+            )
+    _pool.submit(_run, source, model)
+
+
+def get_variants(source, model=None):
+    """
+    {width: name} of the variants of `source`, from the cache or one
+    indexed query. When there are none yet they are scheduled, so existing
+    uploads are backfilled on first use, and {} is returned meanwhile.
+    """
+    return get_many_variants({source: model})[source]
+
+
+def get_many_variants(sources):
+    """
+    get_variants() for many sources at once, given as {source: model}:
+    one cache round trip, then at most one query for the sources not cached.
+    Returns {source: {width: name}}.
+    """
+    fmt = variant_options()[1]
+    cache = get_cache()
+    keys = {source: variants_cache_key(source, fmt) for source in sources}
+    cached = cache.get_many(list(keys.values()))
+    found = {source: cached[key] for source, key in keys.items() if key in cached}
+    missing = [source for source in sources if source not in found]
+    if not missing:
+        return found
+
+    stored = {}
+    for source, width, name in ImageVariant.objects.filter(source__in=missing, format=fmt).values_list('source', 'width', 'name'):
+        stored.setdefault(source, {})[width] = name
+    if stored:
+        cache.set_many({keys[source]: variants for source, variants in stored.items()}, CACHE_TIMEOUT)
+    for source in missing:
+        if source in stored:
+            found[source] = stored[source]
+            continue
+        schedule_variants(source, sources[source])
+        # Unless they were built synchronously (or already failed), mark them pending.
+        found[source] = {} if cache.add(keys[source], {}, PENDING_TIMEOUT) else cache.get(keys[source], {})
+    return found
+
+
+def missing_sources(force=False):
+    """(source, model) for every stored image without variants in the current format (every image when `force`)."""
+    fmt = variant_options()[1]
+    done = set() if force else set(ImageVariant.objects.filter(format=fmt).values_list('source', flat=True).distinct())
+    for model, field in IMAGE_FIELDS.items():
+        names = model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''}).values_list(field, flat=True)
+        for name in names.distinct().iterator():
+            if name not in done:
+                done.add(name)
+                yield name, model
+
+
+def _encode(source):
+    try:
+        return encode_variants(source), None
+    except Exception as e:
+        return None, e
+
+
+def backfill_variants(force=False, workers=4):
+    """
+    Build the variants of every stored image that has none yet. Decoding
+    and encoding run on a thread pool that only touches storage; the rows
+    are written from this thread. Returns (built, failed) counts.
+    """
+    sources = list(missing_sources(force))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        encoded = list(pool.map(_encode, [source for source, _ in sources]))
+
+    built, changed = 0, set()
+    for (source, model), (variants, error) in zip(sources, encoded):
+        if error is not None:
+            logger.error("Could not build image variants of %s: %s", source, error)
+            continue
+        save_variants(source, variants)
+        built += 1
+        changed.add(model)
+    for model in changed:
+        bump_generation(model)
+    return built, len(sources) - built
+
+
+def prune_variants(storage=None):
+    """
+    Delete the variant rows of images no longer referenced by any model, and
+    their files unless another source shares them. Returns the rows deleted.
+    """
+    storage = storage or default_storage
+    referenced = set()
+    for model, field in IMAGE_FIELDS.items():
+        referenced.update(model.objects.exclude(**{f'{field}__isnull': True}).values_list(field, flat=True))
+    stale = ImageVariant.objects.exclude(source__in=referenced)
+    names = set(stale.values_list('name', flat=True))
+    deleted, _ = stale.delete()
+    for name in names - set(ImageVariant.objects.filter(name__in=names).values_list('name', flat=True)):
+        storage.delete(name)
+    return deleted
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from courses.recommendations import rebuild_recommendations, update_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Build the "students also took" course neighbors from enrollments and reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every course instead of only those with new enrollments')
+        parser.add_argument('--loop', action='store_true', help='Keep applying new enrollments')
+        parser.add_argument('--interval', type=float, default=300.0, help='Seconds between incremental updates')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            self.stdout.write(f"Rebuilt neighbors for {rebuild_recommendations()} course(s)")
+        else:
+            self.stdout.write(f"Refreshed neighbors for {update_recommendations()} course(s)")
+        while options['loop']:
+            time.sleep(options['interval'])
+            self.stdout.write(f"Refreshed neighbors for {update_recommendations()} course(s)")
+        self.stdout.write(self.style.SUCCESS("Course recommendations are up to date."))
+# python manage.py build_recommendations --full
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses.exports import EXPORTS, FORMATS, export_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Stream an enrollment or quiz attempt report as CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS), help='What to export')
+        parser.add_argument('--format', dest='output_format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--course', help='Only rows for this course id')
+        parser.add_argument('--since', help='Only rows on or after this date/datetime')
+        parser.add_argument('--until', help='Only rows on or before this date/datetime')
+        parser.add_argument('--passed', choices=['true', 'false'], help='Passed attempts / completed enrollments only, or the opposite')
+        parser.add_argument('--output', help='File to write to (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            header, rows = export_rows(
+                options['kind'],
+                course=options['course'],
+                since=options['since'],
+                until=options['until'],
+                passed=options['passed'],
+            )
+            content = iter_export(header, rows, options['output_format'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not options['output']:
+            for line in content:
+                self.stdout.write(line, ending='')
+            return
+
+        lines = 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+            for line in content:
+                out.write(line)
+                lines += 1
+        self.stdout.write(self.style.SUCCESS(f"Wrote {lines} line(s) to {options['output']}"))
+# python manage.py export_report quiz-attempts --format jsonl --course 1 --since 2024-01-01 --output attempts.jsonl
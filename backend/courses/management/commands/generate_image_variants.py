@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from courses.images import backfill_variants, prune_variants
+
+
+class Command(BaseCommand):
+    help = 'Build resized copies of course thumbnails, category images and profile pictures that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild the variants of every image')
+        parser.add_argument('--prune', action='store_true', help='Also delete variants of images no longer in use')
+        parser.add_argument('--workers', type=int, default=4, help='Threads used to resize images')
+
+    def handle(self, *args, **options):
+        built, failed = backfill_variants(force=options['force'], workers=options['workers'])
+        self.stdout.write(f"Built variants for {built} image(s), {failed} failed")
+        if options['prune']:
+            self.stdout.write(f"Pruned {prune_variants()} variant(s) of removed images")
+        self.stdout.write(self.style.SUCCESS("Image variants are up to date."))
+# python manage.py generate_image_variants --prune
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from Account.models import CustomUser
+from courses.content_import import import_course, load_package
+
+
+class Command(BaseCommand):
+    help = 'Import a course with its lessons, quizzes, questions and choices from a JSON or YAML package'
+
+    def add_arguments(self, parser):
+        parser.add_argument('package', help='Path to the package file (.json, .yaml or .yml)')
+        parser.add_argument('--instructor', help="Username of the course's instructor, overriding the package")
+
+    def handle(self, *args, **options):
+        path = options['package']
+        instructor = None
+        if options['instructor']:
+            instructor = CustomUser.objects.filter(username=options['instructor']).first()
+            if instructor is None:
+                raise CommandError(f"No user named '{options['instructor']}'.")
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = load_package(f.read(), 'yaml' if path.endswith(('.yaml', '.yml')) else 'json')
+            course, counts = import_course(data, instructor=instructor)
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(f"Invalid course package: {e.detail}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported '{course.title}' ({course.slug}): {counts['lessons']} lesson(s), {counts['quizzes']} quiz(zes), "
+            f"{counts['questions']} question(s), {counts['choices']} choice(s)."
+        ))
+# python manage.py import_course course.yaml --instructor teacher
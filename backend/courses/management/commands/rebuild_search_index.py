@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from courses.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text course search index from the database'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the course search index ({type(backend).__name__})."))
+# python manage.py rebuild_search_index
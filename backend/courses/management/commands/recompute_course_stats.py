@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from courses.statistics import recompute_course_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute total_lectures, number_of_reviews and average_rating for every course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted courses without saving them')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        drifted = recompute_course_statistics(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        for course in drifted:
+            self.stdout.write(
+                f"Course {course.pk}: lectures={course.total_lectures} "
+                f"reviews={course.number_of_reviews} rating={course.average_rating}"
+            )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} course(s) drifted (dry run, nothing saved)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} course(s)."))
+# python manage.py recompute_course_stats [--dry-run]
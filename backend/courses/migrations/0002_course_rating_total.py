@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_total',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Sum of approved review ratings, kept in step with number_of_reviews.'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'courses_course_search'
+
+
+def create_search_table(apps, schema_editor):
+    # Only SQLite builds with FTS5 get the table; elsewhere courses/search.py
+    # falls back to its in-memory index.
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        if 'ENABLE_FTS5' not in {row[0] for row in cursor.fetchall()}:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "title, short_description, description, what_you_will_learn, lesson_titles, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, short_description, description, what_you_will_learn, lesson_titles) "
+            "SELECT c.id, c.title, c.short_description, c.description, COALESCE(c.what_you_will_learn, ''), "
+            "COALESCE((SELECT group_concat(l.title, ' ') FROM Lesson_lesson l WHERE l.course_id = c.id), '') "
+            "FROM courses_course c"
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_indexes'),
+        ('Lesson', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,38 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill_rating_total(apps, schema_editor):
+    """Fill rating_total, and the counters derived with it, from the approved reviews of every course."""
+    Course = apps.get_model('courses', 'Course')
+    Review = apps.get_model('Review', 'Review')
+
+    totals = {
+        row['course']: (row['reviews'], row['ratings'] or 0)
+        for row in Review.objects.filter(is_approved=True).order_by().values('course')
+        .annotate(reviews=Count('pk'), ratings=Sum('rating'))
+    }
+    changed = []
+    for course in Course.objects.only('pk', 'number_of_reviews', 'rating_total', 'average_rating').iterator(chunk_size=500):
+        reviews, ratings = totals.get(course.pk, (0, 0))
+        course.number_of_reviews = reviews
+        course.rating_total = ratings
+        course.average_rating = (
+            (Decimal(ratings) / reviews).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) if reviews else Decimal('0.00')
+        )
+        changed.append(course)
+    Course.objects.bulk_update(changed, ['number_of_reviews', 'rating_total', 'average_rating'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_search_changes'),
+        ('Review', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_total, migrations.RunPython.noop),
+    ]
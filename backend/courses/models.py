@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
 from Account.models import CustomUser
 from Category.models import Category
+from utils.slugs import save_with_unique_slug
 
 class Course(models.Model):
     title = models.CharField(max_length=200)
@@ -29,13 +30,16 @@ class Course(models.Model):
     total_lectures = models.PositiveIntegerField(default=0)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00, validators=[MinValueValidator(0), MaxValueValidator(5)])
     number_of_reviews = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0, editable=False, help_text="Sum of approved review ratings, kept in step with number_of_reviews.")
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            return save_with_unique_slug(
+                self, slugify(self.title), Course.objects.all(), lambda: super(Course, self).save(*args, **kwargs),
+            )
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -46,9 +50,68 @@ class Course(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='course_recent_idx'),
+            # Partial indexes for the public catalog, which only ever lists
+            # published courses, optionally narrowed by category or level.
+            models.Index(fields=['-created_at', '-id'], name='course_published_recent_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['category', '-created_at', '-id'], name='course_category_recent_idx', condition=models.Q(is_published=True)),
+            models.Index(fields=['level', '-created_at', '-id'], name='course_level_recent_idx', condition=models.Q(is_published=True)),
+        ]
+
+
+class CourseNeighbor(models.Model):
+    """
+    One of a course's precomputed "students also took" neighbors, ranked by
+    co-enrollment similarity. Built by courses/recommendations.py.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='neighbor_of')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
 
+    class Meta:
+        ordering = ['course', 'rank']
+        # The unique constraint doubles as the (course, rank) lookup index.
+        unique_together = ('course', 'rank')
 
+    def __str__(self):
+        return f"{self.course_id} -> {self.neighbor_id} ({self.score:.3f})"
 
 
+class SearchChange(models.Model):
+    """
+    A course whose search document changed, logged for the in-memory search
+    indexes of other worker processes (see courses/search.py). Only written
+    on databases without FTS5; old rows are pruned when an index is built.
+    """
+    # A plain id: the course may be gone by the time the change is read.
+    course_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    def __str__(self):
+        return f"{self.course_id} @ {self.created_at}"
+
+
+class ImageVariant(models.Model):
+    """
+    A resized, re-encoded copy of an uploaded image (course thumbnail,
+    category image or profile picture), built by courses/images.py. `name`
+    carries a digest of the source bytes and the encoding settings, so the
+    file behind a variant URL never changes and can be cached forever.
+    """
+    source = models.CharField(max_length=255, help_text="Storage name of the original upload.")
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10)
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ['source', 'width']
+        # The unique constraint doubles as the per-source lookup index.
+        unique_together = ('source', 'format', 'width')
+
+    def __str__(self):
+        return f"{self.source} @ {self.width}w ({self.format})"
@@ -0,0 +1,143 @@
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination used by every list endpoint in the API.
+
+    The cursor is keyed on the ordering the view's queryset already declares
+    (e.g. '-created_at', 'order', '-enrolled_at') plus the primary key, so
+    fetching page N costs the same indexed range scan as page one. Unlike
+    DRF's, which positions on the first column only and skips over ties
+    with an OFFSET, the cursor holds every ordering column and pages with a
+    (key, pk) comparison, so large groups of equal keys page like any other
+    rows. Cursors are opaque base64 tokens.
+
+    Query params:
+        ?page_size=50   - override the page size (capped at max_page_size)
+        ?count=true     - include the total row count in the response
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-pk'
+    count_query_param = 'count'
+
+    # Counting is a full scan of the filtered table, so it is opt-in per request
+    # unless a view (or the REST_FRAMEWORK settings) turns it on by default.
+    include_total_count = False
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Use the view's `cursor_ordering`, or the queryset's own ordering, and
+        append the primary key as a tie-breaker so the order is total.
+        """
+        ordering = getattr(view, 'cursor_ordering', None)
+        if not ordering:
+            ordering = queryset.query.order_by or queryset.model._meta.ordering or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+
+        pk_fields = {'pk', '-pk', 'id', '-id'}
+        if not pk_fields.intersection(ordering):
+            direction = '-' if ordering[0].startswith('-') else ''
+            ordering += (direction + 'pk',)
+        return ordering
+
+    def _get_position_from_instance(self, instance, ordering):
+        # Every ordering column (none of them nullable), so each row's position is unique.
+        values = [
+            str(instance[name] if isinstance(instance, dict) else getattr(instance, name))
+            for name in (field.lstrip('-') for field in ordering)
+        ]
+        return json.dumps(values, separators=(',', ':'))
+
+    def keyset_filter(self, position, reverse):
+        """
+        Rows after `position` in the (possibly reversed) ordering:
+        (a > x) OR (a = x AND b > y) OR ..., with each column's direction.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering) or None in values:
+            raise NotFound(self.invalid_cursor_message)
+        after, equal = Q(), Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            after |= equal & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal &= Q(**{name: value})
+        return after
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = queryset.count() if self.should_include_count(request, view) else None
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor if self.cursor is not None else (0, False, None)
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = queryset.filter(self.keyset_filter(current_position, reverse))
+
+        # Positions are unique, so DRF's link building below never needs an offset.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if has_following_position else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def should_include_count(self, request, view):
+        value = request.query_params.get(self.count_query_param)
+        if value is not None:
+            return value.lower() in ('true', '1', 't')
+        default = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGINATION_INCLUDE_COUNT', self.include_total_count)
+        return getattr(view, 'include_total_count', default)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'example': 123,
+        }
+        return response_schema
@@ -0,0 +1,129 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+
+def plan_queryset(queryset, serializer, required=()):
+    """
+    Apply the select_related/prefetch_related calls a serializer needs.
+
+    Walks the (possibly nested) serializer fields and joins every forward
+    foreign key / one-to-one that is rendered by a nested serializer, and
+    prefetches every reverse or many-to-many relation. Nested `many=True`
+    serializers get a `Prefetch` whose queryset is planned recursively and
+    keeps the related model's default ordering (e.g. lessons by 'order').
+
+    When the serializer carries a sparse fieldset (`is_sparse`), the columns
+    it does not render are deferred with `.only()`; `required` names extra
+    columns that must still be loaded.
+
+    `serializer` may be a serializer class or an instance.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    restrict = getattr(serializer, 'is_sparse', False)
+    select, prefetch, only = _collect_lookups(serializer, queryset.model, restrict=restrict)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if restrict and only is not None:
+        queryset = queryset.only(*only, *required)
+    return queryset
+
+
+def _related_queryset(model_field, serializer=None):
+    """
+    Queryset for prefetching `model_field`, rendered with `serializer` or, for
+    relations collapsed to primary keys, with no serializer at all.
+    """
+    model = model_field.related_model
+    queryset = model._default_manager.all()
+    if model._meta.ordering:
+        queryset = queryset.order_by(*model._meta.ordering)
+    # Prefetching a reverse foreign key matches rows on the forward column.
+    required = (model_field.field.name,) if model_field.one_to_many else ()
+    if serializer is None:
+        return queryset.only('pk', *required)
+    return plan_queryset(queryset, serializer, required)
+
+
+def _collect_lookups(serializer, model, prefix='', restrict=False):
+    """
+    Return (select_related, prefetch_related, only) lookups for `serializer`.
+    `only` is None when a field is not backed by a model column, in which case
+    no columns may safely be deferred.
+    """
+    select, prefetch, only = [], [], [prefix + model._meta.pk.name]
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            only = None
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            only = None
+            continue
+
+        lookup = prefix + field.source
+        if not model_field.is_relation:
+            if only is not None:
+                only.append(lookup)
+            continue
+
+        to_many = model_field.many_to_many or model_field.one_to_many
+
+        if isinstance(field, serializers.ListSerializer):
+            if isinstance(field.child, serializers.ModelSerializer):
+                prefetch.append(Prefetch(lookup, queryset=_related_queryset(model_field, field.child)))
+            else:
+                prefetch.append(lookup)
+        elif isinstance(field, serializers.ModelSerializer):
+            if to_many:
+                prefetch.append(Prefetch(lookup, queryset=_related_queryset(model_field, field)))
+                continue
+            select.append(lookup)
+            nested_select, nested_prefetch, nested_only = _collect_lookups(
+                field, model_field.related_model, lookup + '__', restrict=restrict,
+            )
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+            if only is not None and nested_only is not None and model_field.concrete:
+                only.append(lookup)
+                only.extend(nested_only)
+            else:
+                only = None
+        elif isinstance(field, ManyRelatedField):
+            if restrict:
+                prefetch.append(Prefetch(lookup, queryset=_related_queryset(model_field)))
+            else:
+                prefetch.append(lookup)
+        elif isinstance(field, RelatedField):
+            # Primary keys are read straight from the '<field>_id' column.
+            if not field.use_pk_only_optimization():
+                select.append(lookup)
+                only = None
+            elif only is not None and model_field.concrete:
+                only.append(lookup)
+            elif not model_field.concrete:
+                only = None
+
+    return select, prefetch, only
+
+
+class QueryPlannerMixin:
+    """
+    Generic view mixin that plans the queryset against the view's serializer,
+    so list and detail endpoints issue a constant number of queries and, for
+    sparse fieldsets, only read the columns they render.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # The paginator reads the ordering columns to build its cursors.
+        ordering = [name.lstrip('-') for name in queryset.query.order_by if isinstance(name, str)]
+        return plan_queryset(queryset, self.get_serializer(), required=ordering)
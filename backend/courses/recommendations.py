@@ -0,0 +1,167 @@
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, FloatField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from Enrollment.models import Enrollment
+from Review.models import Review
+from .models import Course, CourseNeighbor
+
+# Enrollments older than the last build by less than this are looked at
+# again, to catch rows whose transaction committed after the build read.
+UPDATE_OVERLAP = timedelta(minutes=5)
+
+
+def weighted_enrollments():
+    """
+    Enrollment rows annotated with the student's interest in the course: 1.0
+    for an enrollment, scaled from 0.5 to 1.5 by an approved review's rating.
+    """
+    rating = Review.objects.filter(
+        course=OuterRef('course'), student=OuterRef('student'), is_approved=True,
+    ).values('rating')[:1]
+    return Enrollment.objects.annotate(
+        weight=(Cast(Coalesce(Subquery(rating), Value(3)), FloatField()) + 1.0) / 4.0,
+    )
+
+
+def compute_neighbors(rows, norms, targets=None, top_k=20, min_overlap=2):
+    """
+    Item-item cosine similarity over the sparse student x course matrix
+    given as (student_id, course_id, weight) rows.
+
+    Each student's row contributes the outer product of its entries to the
+    course x course dot products, so the work is the sum of squared row
+    lengths rather than courses squared. `norms` holds each course's squared
+    column norm. Only the courses in `targets` (all when None) get neighbor
+    lists. Returns {course_id: [(neighbor_id, score), ...]}, best first.
+    """
+    students = defaultdict(list)
+    for student_id, course_id, weight in rows:
+        students[student_id].append((course_id, weight))
+
+    dots = defaultdict(lambda: defaultdict(float))
+    overlaps = defaultdict(lambda: defaultdict(int))
+    for entries in students.values():
+        for course_id, weight in entries:
+            if targets is not None and course_id not in targets:
+                continue
+            course_dots, course_overlaps = dots[course_id], overlaps[course_id]
+            for other_id, other_weight in entries:
+                if other_id != course_id:
+                    course_dots[other_id] += weight * other_weight
+                    course_overlaps[other_id] += 1
+
+    neighbors = {}
+    for course_id, course_dots in dots.items():
+        scored = (
+            (other_id, dot / math.sqrt(norms[course_id] * norms[other_id]))
+            for other_id, dot in course_dots.items()
+            if overlaps[course_id][other_id] >= min_overlap
+        )
+        neighbors[course_id] = heapq.nlargest(top_k, scored, key=lambda item: (item[1], -item[0]))
+    return neighbors
+
+
+def _save_neighbors(neighbors, course_ids=None):
+    """Replace the stored neighbors of `course_ids` (every course when None)."""
+    now = timezone.now()
+    with transaction.atomic():
+        stale = CourseNeighbor.objects.all() if course_ids is None else CourseNeighbor.objects.filter(course_id__in=course_ids)
+        stale.delete()
+        CourseNeighbor.objects.bulk_create([
+            CourseNeighbor(course_id=course_id, neighbor_id=neighbor_id, rank=rank, score=score, computed_at=now)
+            for course_id, ranked in neighbors.items()
+            for rank, (neighbor_id, score) in enumerate(ranked, start=1)
+        ], batch_size=1000)
+
+
+def _options():
+    return getattr(settings, 'RECOMMENDATION_TOP_K', 20), getattr(settings, 'RECOMMENDATION_MIN_OVERLAP', 2)
+
+
+def rebuild_recommendations():
+    """Recompute every course's neighbors from all enrollments. Returns the number of courses with neighbors."""
+    top_k, min_overlap = _options()
+    rows = list(weighted_enrollments().values_list('student_id', 'course_id', 'weight').iterator(chunk_size=5000))
+    norms = defaultdict(float)
+    for _, course_id, weight in rows:
+        norms[course_id] += weight * weight
+    neighbors = compute_neighbors(rows, norms, top_k=top_k, min_overlap=min_overlap)
+    _save_neighbors(neighbors)
+    return len(neighbors)
+
+
+def refresh_recommendations(course_ids):
+    """
+    Recompute the neighbors of `course_ids` only. Reads the enrollments of
+    the students in those courses, plus the column norms of every course
+    they touch in one grouped query.
+    """
+    course_ids = set(course_ids)
+    if not course_ids:
+        return 0
+    top_k, min_overlap = _options()
+    students = Enrollment.objects.filter(course_id__in=course_ids).values('student_id')
+    rows = list(
+        weighted_enrollments().filter(student_id__in=students)
+        .values_list('student_id', 'course_id', 'weight').iterator(chunk_size=5000)
+    )
+    norms = dict(
+        weighted_enrollments().filter(course_id__in={course_id for _, course_id, _ in rows})
+        .values('course_id').annotate(norm=Sum(F('weight') * F('weight'))).values_list('course_id', 'norm')
+    )
+    neighbors = compute_neighbors(rows, norms, targets=course_ids, top_k=top_k, min_overlap=min_overlap)
+    _save_neighbors({course_id: neighbors.get(course_id, []) for course_id in course_ids}, course_ids)
+    return len(course_ids)
+
+
+def update_recommendations():
+    """
+    Bring neighbors up to date with enrollments made since the last build:
+    the courses that gained students, every other course of those students,
+    and the courses that list any of them as a neighbor (scores are
+    normalised by both courses' enrollments, so those lists moved too).
+    Falls back to a full rebuild when nothing was built yet. Returns the
+    number of courses refreshed.
+    """
+    last_build = CourseNeighbor.objects.aggregate(last=Max('computed_at'))['last']
+    if last_build is None:
+        return rebuild_recommendations()
+    recent = Enrollment.objects.filter(enrolled_at__gte=last_build - UPDATE_OVERLAP)
+    students = recent.values('student_id')
+    affected = set(Enrollment.objects.filter(student_id__in=students).values_list('course_id', flat=True))
+    affected.update(CourseNeighbor.objects.filter(neighbor_id__in=affected).values_list('course_id', flat=True))
+    return refresh_recommendations(affected)
+
+
+def also_taken(course_id, limit=10):
+    """Published courses most often taken together with `course_id`, in one indexed lookup."""
+    return [
+        (row.neighbor, row.score)
+        for row in CourseNeighbor.objects.filter(course_id=course_id, neighbor__is_published=True)
+        .select_related('neighbor__instructor').order_by('rank')[:limit]
+    ]
+
+
+def recommend_for(user, limit=10):
+    """
+    Published courses for `user`: the neighbors of every course they are
+    enrolled in, scored by summed similarity, minus the courses they already
+    take. One query over the (course, rank) index.
+    """
+    enrolled = Enrollment.objects.filter(student=user).values('course_id')
+    courses = (
+        Course.objects.filter(is_published=True, neighbor_of__course_id__in=enrolled)
+        .exclude(pk__in=enrolled)
+        .annotate(recommendation_score=Sum('neighbor_of__score'))
+        .select_related('instructor')
+        .order_by('-recommendation_score', 'pk')[:limit]
+    )
+    return [(course, course.recommendation_score) for course in courses]
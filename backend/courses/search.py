@@ -0,0 +1,359 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import and_
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .catalog_cache import get_generations
+from .models import Course, SearchChange
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'courses_course_search'
+# (column, BM25 weight), in the column order of the FTS5 table.
+SEARCH_FIELDS = (
+    ('title', 10.0),
+    ('short_description', 4.0),
+    ('description', 1.0),
+    ('what_you_will_learn', 2.0),
+    ('lesson_titles', 3.0),
+)
+TOKEN = re.compile(r'\w+')
+# Change log rows this much older than the last sync are read again, to
+# catch those whose transaction committed after the sync read.
+CHANGE_OVERLAP = timedelta(minutes=5)
+# Change log rows are pruned after this long; a process that has not synced
+# for longer rebuilds its index in the background instead.
+CHANGE_RETENTION = timedelta(days=1)
+
+
+def tokenize(text):
+    """Lowercase word tokens with diacritics removed, like FTS5's unicode61."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return TOKEN.findall(text.lower())
+
+
+def course_documents(course_ids=None):
+    """
+    Yield (course_id, {field: text}, is_published) for the given courses, or
+    for every course, with lesson titles concatenated in lesson order.
+    """
+    from Lesson.models import Lesson
+
+    courses = Course.objects.order_by('pk')
+    lessons = Lesson.objects.order_by('course_id', 'order')
+    if course_ids is not None:
+        courses = courses.filter(pk__in=course_ids)
+        lessons = lessons.filter(course_id__in=course_ids)
+
+    lesson_titles = defaultdict(list)
+    for course_id, title in lessons.values_list('course_id', 'title').iterator():
+        lesson_titles[course_id].append(title)
+
+    columns = [name for name, _ in SEARCH_FIELDS if name != 'lesson_titles']
+    for row in courses.values('pk', 'is_published', *columns).iterator():
+        fields = {name: row[name] or '' for name in columns}
+        fields['lesson_titles'] = ' '.join(lesson_titles.get(row['pk'], ()))
+        yield row['pk'], fields, row['is_published']
+
+
+class FTS5SearchBackend:
+    """Ranks with SQLite's built-in bm25() over the courses_course_search table."""
+    # The index is a table in the same database, so it is written inside the
+    # surrounding transaction and rolls back with it.
+    transactional = True
+
+    def index(self, course_ids):
+        with connection.cursor() as cursor:
+            if course_ids is not None:
+                self.remove(course_ids, cursor)
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(name for name, _ in SEARCH_FIELDS)}) "
+                f"VALUES (%s, {', '.join('%s' for _ in SEARCH_FIELDS)})",
+                [(pk, *(fields[name] for name, _ in SEARCH_FIELDS)) for pk, fields, _ in course_documents(course_ids)],
+            )
+
+    def remove(self, course_ids, cursor=None):
+        if cursor is None:
+            with connection.cursor() as cursor:
+                return self.remove(course_ids, cursor)
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(pk,) for pk in course_ids])
+
+    def rebuild(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            self.index(None)
+
+    def search(self, terms, limit, published_only=False):
+        # Every term must match; the last one is a prefix, for typeahead.
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        weights = ', '.join(str(weight) for _, weight in SEARCH_FIELDS)
+        course_table = Course._meta.db_table
+        published = f"AND {course_table}.is_published " if published_only else ""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {SEARCH_TABLE}.rowid, bm25({SEARCH_TABLE}, {weights}) AS rank FROM {SEARCH_TABLE} "
+                f"JOIN {course_table} ON {course_table}.id = {SEARCH_TABLE}.rowid "
+                f"WHERE {SEARCH_TABLE} MATCH %s {published}ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+            # bm25() is lower-is-better; flip it so higher scores rank first.
+            return [(pk, -rank) for pk, rank in cursor.fetchall()]
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index with the same BM25 scoring as FTS5: term
+    frequencies are weighted per field and documents are length-normalized
+    by their total token count.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # term -> {doc_id: weighted term frequency}
+        self.doc_terms = {}  # doc_id -> terms, so a document can be removed
+        self.doc_lengths = {}
+        self.total_length = 0
+        self._sorted_terms = None
+
+    def add(self, doc_id, fields):
+        self.remove(doc_id)
+        weights = dict(SEARCH_FIELDS)
+        frequencies = defaultdict(float)
+        length = 0
+        for name, text in fields.items():
+            tokens = tokenize(text)
+            length += len(tokens)
+            for token in tokens:
+                frequencies[token] += weights[name]
+        for term, frequency in frequencies.items():
+            self.postings[term][doc_id] = frequency
+        self.doc_terms[doc_id] = list(frequencies)
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        self._sorted_terms = None
+
+    def remove(self, doc_id):
+        for term in self.doc_terms.pop(doc_id, ()):
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+                self._sorted_terms = None
+        self.total_length -= self.doc_lengths.pop(doc_id, 0)
+
+    def expand_prefix(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        terms = self._sorted_terms
+        start = bisect_left(terms, prefix)
+        end = start
+        while end < len(terms) and terms[end].startswith(prefix):
+            end += 1
+        return terms[start:end]
+
+    def matches(self, term, prefix=False):
+        if not prefix:
+            return self.postings.get(term, {})
+        merged = defaultdict(float)
+        for expansion in self.expand_prefix(term):
+            for doc_id, frequency in self.postings[expansion].items():
+                merged[doc_id] += frequency
+        return merged
+
+    def search(self, terms, limit, exclude=()):
+        postings = [self.matches(term, prefix=index == len(terms) - 1) for index, term in enumerate(terms)]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:]).difference(exclude)
+
+        total = len(self.doc_lengths)
+        average_length = (self.total_length / total) or 1
+        scores = defaultdict(float)
+        for matches in postings:
+            idf = math.log(1 + (total - len(matches) + 0.5) / (len(matches) + 0.5))
+            for doc_id in candidates:
+                frequency = matches[doc_id]
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def database_search(terms, limit, published_only=False):
+    """
+    Unranked stand-in used while an in-memory index is being built: courses
+    whose title or descriptions contain every term, oldest first.
+    """
+    queryset = Course.objects.filter(reduce(and_, (
+        Q(title__icontains=term) | Q(short_description__icontains=term) | Q(description__icontains=term)
+        for term in terms
+    )))
+    if published_only:
+        queryset = queryset.filter(is_published=True)
+    return [(pk, 0.0) for pk in queryset.order_by('pk').values_list('pk', flat=True)[:limit]]
+
+
+class PythonSearchBackend:
+    """
+    Fallback for databases without FTS5. The index lives in process memory.
+    It is built on a background thread at first use; until then searches are
+    answered by database_search(). From there on it is updated per course:
+    changes made by this process are applied on commit, and changes made by
+    other workers are read back from the SearchChange log whenever the
+    Course/Lesson catalog generations move. Searches never rebuild it.
+    """
+    transactional = False
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.inverted = None
+        self.unpublished = set()
+        self.generations = None
+        self.synced_at = None
+        self.building = False
+
+    def _catalog_generations(self):
+        from Lesson.models import Lesson
+        return get_generations((Course, Lesson))
+
+    def _apply(self, course_ids):
+        documents = {pk: (fields, published) for pk, fields, published in course_documents(course_ids)}
+        for pk in course_ids:
+            if pk in documents:
+                fields, published = documents[pk]
+                self.inverted.add(pk, fields)
+                (self.unpublished.discard if published else self.unpublished.add)(pk)
+            else:
+                self.inverted.remove(pk)
+                self.unpublished.discard(pk)
+
+    def _catch_up(self):
+        """Apply the changes other workers logged since the last sync. Called with the lock held."""
+        generations = self._catalog_generations()
+        if generations == self.generations:
+            return
+        now = timezone.now()
+        if now - self.synced_at > CHANGE_RETENTION - CHANGE_OVERLAP:
+            # Rows this process has not read yet may be pruned already.
+            self.start_build()
+            return
+        self._apply(set(
+            SearchChange.objects.filter(created_at__gte=self.synced_at - CHANGE_OVERLAP).values_list('course_id', flat=True)
+        ))
+        self.generations, self.synced_at = generations, now
+
+    def index(self, course_ids):
+        with self.lock:
+            if self.inverted is None:
+                return
+            self._apply(list(course_ids))
+            self.generations = self._catalog_generations()
+
+    def remove(self, course_ids):
+        self.index(course_ids)
+
+    def rebuild(self, generations=None):
+        # Read the generations and the clock first: changes made while the
+        # documents are read are applied again by the next sync.
+        generations = generations or self._catalog_generations()
+        started = timezone.now()
+        SearchChange.objects.filter(created_at__lt=started - CHANGE_RETENTION).delete()
+        inverted, unpublished = InvertedIndex(), set()
+        for pk, fields, published in course_documents():
+            inverted.add(pk, fields)
+            if not published:
+                unpublished.add(pk)
+        with self.lock:
+            self.inverted, self.unpublished = inverted, unpublished
+            self.generations, self.synced_at = generations, started
+
+    def start_build(self):
+        """Rebuild the index on a background thread, unless a build is already running."""
+        with self.lock:
+            if self.building:
+                return
+            self.building = True
+        threading.Thread(target=self._build, name='course-search-index', daemon=True).start()
+
+    def _build(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Could not build the course search index")
+        finally:
+            with self.lock:
+                self.building = False
+            connection.close()
+
+    def search(self, terms, limit, published_only=False):
+        with self.lock:
+            if self.inverted is not None:
+                self._catch_up()
+                return self.inverted.search(terms, limit, self.unpublished if published_only else ())
+        self.start_build()
+        return database_search(terms, limit, published_only)
+
+
+_python_backend = PythonSearchBackend()
+_fts5_tables = {}
+
+
+def fts5_enabled():
+    """Whether this database has the FTS5 table created by migration 0004."""
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _fts5_tables:
+        _fts5_tables[key] = (
+            connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names()
+        )
+    return _fts5_tables[key]
+
+
+def get_search_backend():
+    backend = getattr(settings, 'COURSE_SEARCH_BACKEND', 'auto')
+    if backend == 'fts5' or (backend == 'auto' and fts5_enabled()):
+        return FTS5SearchBackend()
+    return _python_backend
+
+
+def search_courses(query, limit=20, published_only=False):
+    """Return [(course_id, score), ...] for `query`, best match first."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_search_backend().search(terms, limit, published_only)
+
+
+def reindex_courses(course_ids):
+    """
+    Refresh the search entries of the given courses: right away for FTS5,
+    once the transaction commits for the in-memory index. The in-memory
+    case also logs the change, in the same transaction, for the indexes of
+    other worker processes.
+    """
+    course_ids = [pk for pk in set(course_ids) if pk is not None]
+    if not course_ids:
+        return
+    backend = get_search_backend()
+    if backend.transactional:
+        backend.index(course_ids)
+    else:
+        SearchChange.objects.bulk_create([SearchChange(course_id=pk) for pk in course_ids])
+        transaction.on_commit(lambda: backend.index(course_ids))
+
+
+def rebuild_search_index():
+    get_search_backend().rebuild()
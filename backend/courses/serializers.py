@@ -1,49 +1,366 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.db.models.manager import BaseManager
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from .images import get_many_variants, get_variants
 from .models import Course
-from Enrollment.models import Enrollment
+from Enrollment.models import Enrollment, LessonProgress
 from Account.models import CustomUser
 from Category.models import Category
 from Lesson.models import Lesson
 from Quiz.models import Quiz
+from Question.models import AnswerChoice, Question
 from FAQ.models import FAQ
 
-class CustomUserSerializer(serializers.ModelSerializer):
+
+def parse_field_paths(value):
+    """
+    Turn 'id,title,course.title,course.lessons' into a nested dict tree:
+    {'id': {}, 'title': {}, 'course': {'title': {}, 'lessons': {}}}.
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    tree = {}
+    for path in value:
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients ask for a subset of a serializer's output.
+
+    ?fields=id,progress,course.title   only render these (dotted paths reach
+                                       into nested serializers)
+    ?expand=course,course.lessons      render only these nested relations as
+                                       objects; the others collapse to ids
+
+    Without either parameter the full representation is returned. The same
+    options can be passed as `fields=` / `expand=` keyword arguments. When a
+    fieldset is applied, `is_sparse` is set so the query planner can defer the
+    unrequested columns with `.only()`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+        self.is_sparse = False
+
+        request = self.context.get('request')
+        if request is not None and fields is None and expand is None:
+            fields = request.query_params.get('fields')
+            expand = request.query_params.get('expand')
+        if fields is not None or expand is not None:
+            self.apply_sparse_fieldset(
+                parse_field_paths(fields) if fields else None,
+                parse_field_paths(expand) if expand is not None else None,
+            )
+
+    def apply_sparse_fieldset(self, fields_tree, expand_tree):
+        self.is_sparse = True
+        if fields_tree:
+            for name in list(self.fields):
+                if name not in fields_tree:
+                    self.fields.pop(name)
+
+        for name, field in list(self.fields.items()):
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, SparseFieldsetMixin):
+                continue
+            sub_fields = fields_tree.get(name) if fields_tree else None
+            if expand_tree is not None and name not in expand_tree and not sub_fields:
+                source = {} if field.source == name else {'source': field.source}
+                self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many, **source)
+                continue
+            nested.apply_sparse_fieldset(
+                sub_fields or None,
+                expand_tree.get(name, {}) if expand_tree is not None else None,
+            )
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    URLs of the resized copies of an image field, keyed by width:
+    {"320": ".../media/variants/<digest>-320w.webp", ...}. Their names are
+    content-hashed, so the URLs can be cached forever. Empty until the
+    variants are built (see courses/images.py); clients then fall back to
+    the original image.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return {}
+        variants = self.page_variants().get(value.name)
+        if variants is None:
+            variants = get_variants(value.name, getattr(getattr(self.parent, 'Meta', None), 'model', None))
+        request = self.context.get('request')
+        urls = {}
+        for width, name in sorted(variants.items()):
+            url = default_storage.url(name)
+            urls[str(width)] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+    def page_variants(self):
+        """
+        The variants of every image the root serializer renders, nested
+        serializers included, looked up together the first time one is
+        needed, so that a page of rows costs one query rather than one per row.
+        """
+        if 'image_variants' not in self.context:
+            root = self.root
+            instances = root.instance if isinstance(root, serializers.ListSerializer) else [root.instance]
+            sources = {}
+            if root.instance is not None:
+                collect_image_sources(root, instances, sources)
+            self.context['image_variants'] = get_many_variants(sources) if sources else {}
+        return self.context['image_variants']
+
+
+def _attribute(field, instance):
+    try:
+        return field.get_attribute(instance)
+    except (AttributeError, ObjectDoesNotExist, SkipField):
+        return None
+
+
+def _renders_variants(field):
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, ImageVariantsField):
+        return True
+    return isinstance(field, serializers.Serializer) and any(_renders_variants(child) for child in field.fields.values())
+
+
+def collect_image_sources(serializer, instances, sources):
+    """Add {image name: model} to `sources` for every ImageVariantsField `serializer` renders for `instances`."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    for field in serializer.fields.values():
+        if field.write_only or not _renders_variants(field):
+            continue
+        values = [value for value in (_attribute(field, instance) for instance in instances) if value]
+        if isinstance(field, ImageVariantsField):
+            for value in values:
+                sources.setdefault(value.name, model)
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            values = [item for value in values for item in (value.all() if isinstance(value, BaseManager) else value)]
+        collect_image_sources(field, values, sources)
+
+
+class CustomUserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    profile_picture_variants = ImageVariantsField(source='profile_picture')
+
     class Meta:
         model = CustomUser
         fields = '__all__'
+        extra_kwargs = {'password': {'write_only': True}}
+
+class PublicUserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    A user as anyone may see them, e.g. a course's instructor in the public
+    (and cached) catalog: profile columns only, never contact details,
+    permissions or account internals.
+    """
+    profile_picture_variants = ImageVariantsField(source='profile_picture')
+
+    class Meta:
+        model = CustomUser
+        fields = [
+            'id', 'username', 'first_name', 'last_name', 'role', 'bio', 'profile_picture', 'profile_picture_variants',
+            'instructor_rating', 'total_reviews', 'date_joined',
+        ]
+
+class CurrentUserSerializer(serializers.ModelSerializer):
+    """
+    The logged-in user's own profile for /api/me/: the profile columns
+    only, without the password, the course many-to-many fields or other
+    internal columns.
+    """
+    profile_picture_variants = ImageVariantsField(source='profile_picture')
+
+    class Meta:
+        model = CustomUser
+        fields = [
+            'id', 'username', 'email', 'first_name', 'last_name', 'role', 'is_staff', 'bio', 'profile_picture',
+            'date_of_birth', 'gender', 'contact_number', 'address', 'country', 'is_email_verified',
+            'highest_qualification', 'institution', 'skills', 'linkedin_profile', 'github_profile',
+            'instructor_rating', 'total_reviews', 'two_factor_enabled', 'date_joined', 'last_login', 'last_activity',
+            'profile_picture_variants',
+        ]
+        read_only_fields = [
+            'id', 'username', 'role', 'is_staff', 'is_email_verified', 'instructor_rating', 'total_reviews',
+            'date_joined', 'last_login', 'last_activity',
+        ]
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField(source='image')
 
-class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Lesson
         fields = '__all__'
 
-class CourseSerializer(serializers.ModelSerializer):
-    instructor = CustomUserSerializer(read_only=True)
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    instructor = PublicUserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     lessons = LessonSerializer(many=True, read_only=True)
+    thumbnail_variants = ImageVariantsField(source='thumbnail')
 
     class Meta:
         model = Course
         fields = '__all__'
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Enrollment model.
     Includes nested serializers for student (CustomUser) and course.
     """
-    student = CustomUserSerializer(read_only=True)
+    student = PublicUserSerializer(read_only=True)
     course = CourseSerializer(read_only=True)
 
     class Meta:
         model = Enrollment
         fields = ['id', 'student', 'course', 'enrolled_at', 'progress']
 
-class QuizSerializer(serializers.ModelSerializer):
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'first_name', 'last_name']
+
+class StudentSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'email', 'first_name', 'last_name']
+
+class CourseSummarySerializer(serializers.ModelSerializer):
+    instructor = UserSummarySerializer(read_only=True)
+    thumbnail_variants = ImageVariantsField(source='thumbnail')
+
+    class Meta:
+        model = Course
+        fields = ['id', 'slug', 'title', 'thumbnail', 'thumbnail_variants', 'level', 'total_lectures', 'instructor']
+
+class EnrollmentFeedSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    A student's own enrollment with a course summary, for the enrollment
+    feed. Lessons and the full course are fetched from the course endpoints.
+    """
+    course = CourseSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = ['id', 'course', 'enrolled_at', 'progress', 'completed_lessons', 'is_completed', 'completed_at']
+
+class StaffEnrollmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    student = StudentSummarySerializer(read_only=True)
+    course = CourseSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = ['id', 'student', 'course', 'enrolled_at', 'progress', 'completed_lessons', 'is_completed', 'completed_at']
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    """
+    Input for the bulk enrollment endpoint: a course and the students to
+    enroll, each given as a user id or an email address.
+    """
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    users = serializers.ListField(
+        child=serializers.CharField(max_length=254),
+        allow_empty=False,
+        max_length=10000,
+    )
+
+class PackageChoiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AnswerChoice
+        fields = ['choice_text', 'is_correct']
+
+class PackageQuestionSerializer(serializers.ModelSerializer):
+    order = serializers.IntegerField(min_value=0, required=False)
+    choices = PackageChoiceSerializer(many=True, required=False)
+
+    class Meta:
+        model = Question
+        fields = ['question_text', 'question_type', 'order', 'choices']
+
+    def validate(self, attrs):
+        choices = attrs.get('choices', [])
+        if attrs.get('question_type', 'mcq') == 'mcq' and not any(choice.get('is_correct', False) for choice in choices):
+            raise serializers.ValidationError("A multiple choice question needs at least one correct choice.")
+        return attrs
+
+class PackageQuizSerializer(serializers.ModelSerializer):
+    questions = PackageQuestionSerializer(many=True, required=False)
+
+    class Meta:
+        model = Quiz
+        fields = ['title', 'description', 'passing_score', 'questions']
+
+class PackageLessonSerializer(serializers.ModelSerializer):
+    slug = serializers.SlugField(max_length=250, required=False)
+    order = serializers.IntegerField(min_value=0, required=False)
+    quizzes = PackageQuizSerializer(many=True, required=False)
+
+    class Meta:
+        model = Lesson
+        fields = ['title', 'slug', 'content', 'video_url', 'order', 'is_preview', 'quizzes']
+
+class CoursePackageSerializer(serializers.ModelSerializer):
+    """
+    A whole course for the content import: the course fields plus nested
+    lessons, quizzes, questions and choices. Slugs are optional; missing or
+    taken ones are allocated by courses/content_import.py. `category` is a
+    category slug and `instructor` a username.
+    """
+    slug = serializers.SlugField(max_length=200, required=False)
+    category = serializers.SlugRelatedField(slug_field='slug', queryset=Category.objects.all(), required=False, allow_null=True)
+    instructor = serializers.SlugRelatedField(
+        slug_field='username', queryset=CustomUser.objects.filter(role__in=['instructor', 'admin']), required=False, allow_null=True,
+    )
+    lessons = PackageLessonSerializer(many=True, max_length=5000)
+
+    class Meta:
+        model = Course
+        fields = [
+            'title', 'slug', 'short_description', 'description', 'what_you_will_learn', 'requirements',
+            'target_audience', 'promo_video_url', 'price', 'is_free', 'is_published', 'level', 'duration',
+            'category', 'instructor', 'lessons',
+        ]
+
+class ProgressEventSerializer(serializers.Serializer):
+    """
+    One lesson progress event: a playback heartbeat (`position` in seconds)
+    and/or a completion.
+    """
+    lesson = serializers.IntegerField()
+    position = serializers.IntegerField(min_value=0, required=False)
+    completed = serializers.BooleanField(default=False)
+
+class ProgressEventsSerializer(serializers.Serializer):
+    events = ProgressEventSerializer(many=True, allow_empty=False, max_length=500)
+
+class LessonProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LessonProgress
+        fields = ['lesson', 'position_seconds', 'completed_at', 'updated_at']
+
+class QuizSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Quiz model.
     Includes all fields.
@@ -52,7 +369,7 @@ class QuizSerializer(serializers.ModelSerializer):
         model = Quiz
         fields = ['id', 'lesson', 'title', 'created_at']
 
-class FAQSerializer(serializers.ModelSerializer):
+class FAQSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the FAQ model.
     Includes all fields.
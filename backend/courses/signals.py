@@ -0,0 +1,213 @@
+import threading
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from Account.models import CustomUser
+from Category.models import Category
+from Certificate.issuance import verification_cache_key
+from Certificate.models import Certificate
+from Enrollment.models import Enrollment
+from Enrollment.progress import refresh_enrollment_progress
+from FAQ.models import FAQ
+from Lesson.models import Lesson
+from Question.models import AnswerChoice, Question
+from Quiz.grading import invalidate_answer_key
+from Quiz.models import Quiz
+from Review.models import Review
+from .authentication import forget_profiles, forget_user
+from .catalog_cache import bump_generation, get_cache
+from .images import IMAGE_FIELDS, get_variants
+from .models import Course
+from .search import reindex_courses
+from .statistics import apply_lesson_delta, apply_review_delta, review_contribution
+
+# Per-thread state for work deferred to the end of the transaction.
+_pending = threading.local()
+# Fields updated on every login; they are not part of the public catalog.
+USER_ACTIVITY_FIELDS = {'last_login', 'last_activity', 'login_ip'}
+# Columns remembered before a save, so post_save can see what changed.
+PREVIOUS_STATE_FIELDS = {
+    Review: ('course_id', 'is_approved', 'rating'),
+    Lesson: ('course_id',),
+    Question: ('quiz_id',),
+    AnswerChoice: ('question_id',),
+}
+
+
+def invalidate_catalog(model):
+    # Bump now so reads inside this transaction see fresh data, and again on
+    # commit so other workers drop anything cached from the old rows meanwhile.
+    bump_generation(model)
+    transaction.on_commit(lambda: bump_generation(model))
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Lesson)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=FAQ)
+@receiver([post_save, post_delete], sender=Quiz)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog(sender)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def instructor_changed(sender, instance, update_fields=None, **kwargs):
+    # Instructors are nested into course responses.
+    if update_fields and set(update_fields) <= USER_ACTIVITY_FIELDS:
+        return
+    if instance.role in ('instructor', 'admin'):
+        invalidate_catalog(sender)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def forget_authenticated_user(sender, instance, **kwargs):
+    # Token authentication caches users; see courses/authentication.py.
+    forget_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def enrollment_count_changed(sender, instance, created=True, **kwargs):
+    # /api/me/ caches the enrollment count; progress updates do not change it.
+    if created:
+        forget_profiles([instance.student_id])
+
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=CustomUser)
+def image_saved(sender, instance, update_fields=None, **kwargs):
+    # Resized copies of a new upload are built off the request thread, once
+    # the row is committed; known images are found in the cache.
+    field = IMAGE_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    image = getattr(instance, field)
+    if image:
+        transaction.on_commit(lambda: get_variants(image.name, sender))
+
+# --- Denormalized course statistics ---
+
+@receiver(pre_save, sender=Review)
+@receiver(pre_save, sender=Lesson)
+@receiver(pre_save, sender=Question)
+@receiver(pre_save, sender=AnswerChoice)
+def remember_previous_state(sender, instance, **kwargs):
+    # Keep the stored row so post_save can apply the difference.
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = sender.objects.filter(pk=instance.pk).values(
+            *PREVIOUS_STATE_FIELDS[sender]
+        ).first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    old_count, old_rating = review_contribution(previous['is_approved'], previous['rating']) if previous else (0, 0)
+    new_count, new_rating = review_contribution(instance.is_approved, instance.rating)
+
+    if previous and previous['course_id'] != instance.course_id:
+        apply_review_delta(previous['course_id'], -old_count, -old_rating)
+        apply_review_delta(instance.course_id, new_count, new_rating)
+    else:
+        apply_review_delta(instance.course_id, new_count - old_count, new_rating - old_rating)
+    if old_count or new_count:
+        invalidate_catalog(Course)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    count, rating = review_contribution(instance.is_approved, instance.rating)
+    apply_review_delta(instance.course_id, -count, -rating)
+    if count:
+        invalidate_catalog(Course)
+
+
+def refresh_progress_on_commit(course_ids):
+    """
+    Recompute the enrollment progress of `course_ids` once the transaction
+    commits. Courses are collected per thread, so deleting many lessons in
+    one transaction recomputes each course once, in one batch.
+    """
+    _pending.__dict__.setdefault('progress_courses', set()).update(pk for pk in course_ids if pk is not None)
+    transaction.on_commit(_refresh_pending_progress)
+
+
+def _refresh_pending_progress():
+    # Every callback but the first finds nothing left to do.
+    course_ids = _pending.__dict__.pop('progress_courses', None)
+    if course_ids:
+        refresh_enrollment_progress(Enrollment.objects.filter(course_id__in=course_ids))
+
+
+def _course_deletion(origin):
+    # Deleting a course cascades to its lessons; there is nothing to update then.
+    return isinstance(origin, Course) or (isinstance(origin, QuerySet) and origin.model is Course)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created:
+        apply_lesson_delta(instance.course_id, 1)
+    elif previous and previous['course_id'] != instance.course_id:
+        apply_lesson_delta(previous['course_id'], -1)
+        apply_lesson_delta(instance.course_id, 1)
+    else:
+        return
+    # total_lectures moved, so enrollment progress percentages did too.
+    refresh_progress_on_commit({instance.course_id, previous['course_id'] if previous else None})
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, origin=None, **kwargs):
+    if _course_deletion(origin):
+        return
+    apply_lesson_delta(instance.course_id, -1)
+    refresh_progress_on_commit([instance.course_id])
+
+
+# --- Full-text search index ---
+
+@receiver([post_save, post_delete], sender=Course)
+def course_search_changed(sender, instance, **kwargs):
+    reindex_courses([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def lesson_search_changed(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    reindex_courses([instance.course_id, previous['course_id'] if previous else None])
+
+
+# --- Compiled quiz answer keys ---
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    for quiz_id in {instance.quiz_id, previous['quiz_id'] if previous else None}:
+        invalidate_answer_key(quiz_id)
+
+
+@receiver([post_save, post_delete], sender=AnswerChoice)
+def answer_choice_changed(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    question_ids = {instance.question_id, previous['question_id'] if previous else None}
+    for quiz_id in set(Question.objects.filter(pk__in=question_ids).values_list('quiz_id', flat=True)):
+        invalidate_answer_key(quiz_id)
+
+
+# --- Certificate verification ---
+
+@receiver([post_save, post_delete], sender=Certificate)
+def certificate_changed(sender, instance, **kwargs):
+    get_cache().delete(verification_cache_key(instance.unique_id))
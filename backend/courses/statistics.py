@@ -0,0 +1,99 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+
+from .catalog_cache import bump_generation
+from .models import Course
+
+
+def review_contribution(is_approved, rating):
+    """(number_of_reviews, rating_total) a review adds to its course."""
+    return (1, rating) if is_approved else (0, 0)
+
+
+def apply_review_delta(course_id, count_delta, rating_delta):
+    """
+    Shift a course's review counters by the given deltas and recompute
+    average_rating from them, without reading the row into Python.
+    """
+    if course_id is None or (count_delta == 0 and rating_delta == 0):
+        return
+    courses = Course.objects.filter(pk=course_id)
+    with transaction.atomic():
+        # Two statements, because MySQL evaluates SET clauses left to right
+        # against already-updated values while other backends do not.
+        courses.update(
+            number_of_reviews=Greatest(F('number_of_reviews') + count_delta, 0),
+            rating_total=Greatest(F('rating_total') + rating_delta, 0),
+        )
+        courses.update(average_rating=Case(
+            When(number_of_reviews__gt=0, then=Cast(F('rating_total'), FloatField()) / F('number_of_reviews')),
+            default=Value(0),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ))
+
+
+def apply_lesson_delta(course_id, delta):
+    if course_id is None or delta == 0:
+        return
+    Course.objects.filter(pk=course_id).update(total_lectures=Greatest(F('total_lectures') + delta, 0))
+
+
+def average(rating_total, number_of_reviews):
+    if not number_of_reviews:
+        return Decimal('0.00')
+    return (Decimal(rating_total) / number_of_reviews).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def recompute_course_statistics(queryset=None, dry_run=False, batch_size=500):
+    """
+    Recompute total_lectures, number_of_reviews, rating_total and
+    average_rating for every course from one grouped query, and write back
+    only the courses that drifted. Returns the list of drifted courses.
+    """
+    from Lesson.models import Lesson
+    from Review.models import Review
+
+    if queryset is None:
+        queryset = Course.objects.all()
+
+    lessons = (
+        Lesson.objects.filter(course=OuterRef('pk')).order_by()
+        .values('course').annotate(total=Count('pk')).values('total')
+    )
+    approved = Review.objects.filter(course=OuterRef('pk'), is_approved=True).order_by().values('course')
+    review_counts = approved.annotate(total=Count('pk')).values('total')
+    rating_totals = approved.annotate(total=Sum('rating')).values('total')
+
+    courses = queryset.order_by().annotate(
+        actual_lectures=Coalesce(Subquery(lessons), 0),
+        actual_reviews=Coalesce(Subquery(review_counts), 0),
+        actual_rating_total=Coalesce(Subquery(rating_totals), 0),
+    ).only('pk', 'total_lectures', 'number_of_reviews', 'rating_total', 'average_rating')
+
+    drifted = []
+    for course in courses.iterator(chunk_size=batch_size):
+        expected_average = average(course.actual_rating_total, course.actual_reviews)
+        if (
+            course.total_lectures != course.actual_lectures
+            or course.number_of_reviews != course.actual_reviews
+            or course.rating_total != course.actual_rating_total
+            or course.average_rating != expected_average
+        ):
+            course.total_lectures = course.actual_lectures
+            course.number_of_reviews = course.actual_reviews
+            course.rating_total = course.actual_rating_total
+            course.average_rating = expected_average
+            drifted.append(course)
+
+    if drifted and not dry_run:
+        Course.objects.bulk_update(
+            drifted,
+            ['total_lectures', 'number_of_reviews', 'rating_total', 'average_rating'],
+            batch_size=batch_size,
+        )
+        # bulk_update() sends no signals, so invalidate cached course responses here.
+        bump_generation(Course)
+    return drifted
@@ -1,3 +1,1139 @@
-from django.test import TestCase
+import json
+import math
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.exceptions import AuthenticationFailed
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory
+
+from Account.models import CustomUser
+from Category.models import Category
+from Enrollment.models import Enrollment
+from FAQ.models import FAQ
+from Lesson.models import Lesson
+from Outbox.models import OutgoingEmail
+from Question.models import Question
+from Quiz.models import Quiz, UserQuizAttempt
+from Review.models import Review
+from utils import slugs
+from . import images
+from .authentication import SignedTokenAuthentication
+from .models import Course, CourseNeighbor, ImageVariant
+from .recommendations import rebuild_recommendations, update_recommendations
+from .search import search_courses
+from .statistics import recompute_course_statistics
+
+
+class CoursePaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for i in range(25):
+            Course.objects.create(
+                title=f"Course {i}",
+                short_description="Short",
+                description="Long",
+            )
+
+    def test_list_is_paginated_with_cursor(self):
+        response = self.client.get('/api/courses/', {'page_size': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+        self.assertNotIn('count', response.data)
+
+    def test_cursor_walks_every_row_once(self):
+        seen = []
+        url = '/api/courses/?page_size=7'
+        while url:
+            response = self.client.get(url)
+            seen.extend(course['id'] for course in response.data['results'])
+            url = response.data['next']
+        expected = list(Course.objects.order_by('-created_at', '-pk').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_ties_larger_than_a_page_are_paged_by_key_and_pk(self):
+        course = Course.objects.first()
+        Lesson.objects.bulk_create([Lesson(course=course, title=f"Part {i}", slug=f"part-{i}", order=1) for i in range(25)])
+        Lesson.objects.create(course=course, title="Last", order=2)
+        expected = list(Lesson.objects.order_by('order', 'pk').values_list('id', flat=True))
+
+        seen, url = [], '/api/lessons/?page_size=7'
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                seen.extend(lesson['id'] for lesson in response.data['results'])
+                url = response.data['next']
+        self.assertEqual(seen, expected)
+        self.assertFalse([query for query in queries if 'OFFSET' in query['sql']])
+
+        # And back again through the previous links.
+        back, url = [lesson['id'] for lesson in response.data['results']], response.data['previous']
+        while url:
+            response = self.client.get(url)
+            back[:0] = [lesson['id'] for lesson in response.data['results']]
+            url = response.data['previous']
+        self.assertEqual(back, expected)
+
+    def test_total_count_is_opt_in(self):
+        response = self.client.get('/api/courses/', {'count': 'true'})
+        self.assertEqual(response.data['count'], 25)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get('/api/courses/', {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_catalog_filters(self):
+        category = Category.objects.create(name="Data")
+        Course.objects.filter(title__in=["Course 1", "Course 2", "Course 3"]).update(is_published=True, category=category)
+        Course.objects.filter(title="Course 3").update(level='advanced')
+        Course.objects.filter(title="Course 4").update(category=category)
+
+        def titles(**params):
+            return sorted(course['title'] for course in self.client.get('/api/courses/', params).data['results'])
+
+        self.assertEqual(titles(published='true', category=category.pk), ["Course 1", "Course 2", "Course 3"])
+        self.assertEqual(titles(published='true', level='advanced'), ["Course 3"])
+        self.assertEqual(len(titles(published='false', page_size=100)), 22)
+        self.assertEqual(self.client.get('/api/courses/', {'level': 'expert'}).status_code, 400)
+
+
+class ConstantQueryCountMixin:
+    """
+    Test harness asserting an endpoint's query count does not grow with rows.
+    """
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueryCount(self, url, add_rows):
+        add_rows(2)
+        small = self.count_queries(url)
+        add_rows(10)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url} issued {small} queries for 2 rows but {large} for 12")
+
+
+class QueryPlannerTests(ConstantQueryCountMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Programming")
+        self.instructor = CustomUser.objects.create_user(username="teacher", password="pw", role="instructor")
+        self.student = CustomUser.objects.create_user(username="learner", password="pw")
+        self.created = 0
+
+    def add_courses(self, count):
+        for _ in range(count):
+            self.created += 1
+            course = Course.objects.create(
+                title=f"Planned {self.created}",
+                short_description="Short",
+                description="Long",
+                instructor=self.instructor,
+                category=self.category,
+            )
+            for order in (2, 1):
+                Lesson.objects.create(course=course, title=f"Lesson {order}", order=order)
+            Enrollment.objects.create(student=self.student, course=course)
+
+    def test_course_list_query_count_is_constant(self):
+        self.assertConstantQueryCount('/api/courses/?page_size=100', self.add_courses)
+
+    def test_enrollment_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.student)
+        self.assertConstantQueryCount('/api/enrollments/?page_size=100', self.add_courses)
+
+    def test_prefetched_lessons_keep_their_order(self):
+        self.add_courses(1)
+        response = self.client.get('/api/courses/')
+        orders = [lesson['order'] for lesson in response.data['results'][0]['lessons']]
+        self.assertEqual(orders, [1, 2])
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student = CustomUser.objects.create_user(username="learner", password="pw")
+        self.course = Course.objects.create(title="Sparse", short_description="Short", description="Long")
+        Lesson.objects.create(course=self.course, title="Intro", order=1, content="Body " * 100)
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.client.force_authenticate(self.student)
+
+    def test_fields_selects_nested_paths(self):
+        response = self.client.get('/api/enrollments/', {'fields': 'id,progress,course.title'})
+        enrollment = response.data['results'][0]
+        self.assertEqual(set(enrollment), {'id', 'course', 'progress'})
+        self.assertEqual(dict(enrollment['course']), {'title': "Sparse"})
+
+    def test_unexpanded_relations_collapse_to_ids(self):
+        response = self.client.get('/api/enrollments/', {'expand': 'course'})
+        enrollment = response.data['results'][0]
+        self.assertEqual(enrollment['student'], self.student.pk)
+        self.assertEqual(enrollment['course']['lessons'], [self.course.lessons.get().pk])
+
+    def test_unrequested_columns_are_not_selected(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/courses/', {'fields': 'id,title,lessons.title'})
+        sql = " ".join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"content"', sql)
+
+    def test_password_hash_is_never_serialized(self):
+        response = self.client.get('/api/enrollments/')
+        self.assertNotIn('password', response.data['results'][0]['student'])
+
+    def test_catalog_lists_only_public_instructor_fields(self):
+        Course.objects.filter(pk=self.course.pk).update(instructor=self.student)
+        self.client.force_authenticate(None)
+        instructor = self.client.get(f'/api/courses/{self.course.pk}/').data['instructor']
+        self.assertEqual(instructor['username'], "learner")
+        for private in ('password', 'email', 'address', 'login_ip', 'is_staff', 'is_superuser', 'token_version'):
+            self.assertNotIn(private, instructor)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.course = Course.objects.create(title="Cached", short_description="Short", description="Long")
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.assertEqual(self.client.get('/api/courses/')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['results'][0]['title'], "Cached")
+
+    def test_saving_a_course_invalidates_the_list(self):
+        self.client.get('/api/courses/')
+        self.course.title = "Renamed"
+        self.course.save()
+        response = self.client.get('/api/courses/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['title'], "Renamed")
+
+    def test_nested_lesson_changes_invalidate_course_detail(self):
+        url = f'/api/courses/{self.course.pk}/'
+        self.client.get(url)
+        Lesson.objects.create(course=self.course, title="New lesson", order=1)
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['lessons']), 1)
+
+    def test_unrelated_models_keep_the_cache_warm(self):
+        self.client.get('/api/faqs/')
+        Course.objects.create(title="Other", short_description="Short", description="Long")
+        self.assertEqual(self.client.get('/api/faqs/')['X-Cache'], 'HIT')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.course = Course.objects.create(title="Conditional", short_description="Short", description="Long")
+        self.lesson = Lesson.objects.create(course=self.course, title="Intro", order=1)
+
+    def a_second_later(self):
+        # Last-Modified is withheld while the newest change is in the current second.
+        return mock.patch('courses.conditional.time.time', return_value=time.time() + 2)
+
+    def test_list_returns_validators(self):
+        response = self.client.get('/api/lessons/')
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertNotIn('Last-Modified', response)
+        with self.a_second_later():
+            self.assertIn('Last-Modified', self.client.get('/api/lessons/'))
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get('/api/lessons/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/lessons/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_list_validators_run_no_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/lessons/')
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+
+    def test_deleting_a_lesson_changes_the_etag(self):
+        Lesson.objects.create(course=self.course, title="Newer", order=2)
+        etag = self.client.get('/api/lessons/')['ETag']
+        self.lesson.delete()
+        self.assertEqual(self.client.get('/api/lessons/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since_on_detail(self):
+        url = f'/api/lessons/{self.lesson.pk}/'
+        self.client.get(url)
+        with self.a_second_later():
+            last_modified = self.client.get(url)['Last-Modified']
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_decides_when_both_headers_are_sent(self):
+        url = f'/api/lessons/{self.lesson.pk}/'
+        self.client.get(url)
+        with self.a_second_later():
+            last_modified = self.client.get(url)['Last-Modified']
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_generation_bump_moves_last_modified(self):
+        url = f'/api/courses/{self.course.pk}/'
+        self.client.get(url)
+        with self.a_second_later():
+            last_modified = self.client.get(url)['Last-Modified']
+        # A category rename changes no course timestamp, only a generation.
+        Category.objects.create(name="Bumped")
+        with mock.patch('courses.conditional.time.time', return_value=time.time() + 4):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_lesson_change_changes_course_etag(self):
+        url = f'/api/courses/{self.course.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.lesson.title = "Updated"
+        self.lesson.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_cached_catalog_revalidates_without_queries(self):
+        etag = self.client.get('/api/courses/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_detail_is_still_404(self):
+        self.assertEqual(self.client.get('/api/lessons/999/').status_code, 404)
+
+
+
+class CurrentUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username="me", email="me@example.com", password="pw", first_name="Ann")
+        self.course = Course.objects.create(title="Mine", short_description="Short", description="Long")
+        Enrollment.objects.create(student=self.user, course=self.course)
+        self.client.force_authenticate(self.user)
+
+    def test_compact_profile_is_cached(self):
+        CustomUser.objects.bulk_create([CustomUser(username=f"crowd{i}") for i in range(50)])
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get('/api/me/')
+        self.assertEqual((response.data['username'], response.data['role'], response.data['enrollment_count']), ("me", "student", 1))
+        self.assertNotIn('password', response.data)
+        self.assertNotIn('enrolled_courses', response.data)
+        self.assertLessEqual(len(first), 2)
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self.client.get('/api/me/').data, response.data)
+        self.assertEqual(len(second), 0)
+
+    def test_patch_and_enrollment_changes_invalidate_the_cache(self):
+        self.client.get('/api/me/')
+        response = self.client.patch('/api/me/', {'first_name': "Bea", 'role': "admin"}, format='json')
+        self.assertEqual((response.data['first_name'], response.data['role']), ("Bea", "student"))
+        self.client.patch(f'/api/users/{self.user.pk}/', {'last_name': "Lee"}, format='json')
+        self.user.refresh_from_db()  # the forced user stands in for the one auth loads per request
+        self.assertEqual(self.client.get('/api/me/').data['last_name'], "Lee")
+
+        other = Course.objects.create(title="Second", short_description="Short", description="Long")
+        Enrollment.objects.create(student=self.user, course=other)
+        self.assertEqual(self.client.get('/api/me/').data['enrollment_count'], 2)
+
+    def test_requires_login(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/me/').status_code, 403)
+
+class CourseStatisticsTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Stats", short_description="Short", description="Long")
+        self.students = [CustomUser.objects.create_user(username=f"s{i}", password="pw") for i in range(3)]
+
+    def review(self, student, rating, is_approved=True):
+        return Review.objects.create(course=self.course, student=student, rating=rating, is_approved=is_approved)
+
+    def test_lessons_maintain_total_lectures(self):
+        first = Lesson.objects.create(course=self.course, title="One", order=1)
+        Lesson.objects.create(course=self.course, title="Two", order=2)
+        first.title = "Renamed"
+        first.save()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_lectures, 2)
+        first.delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_lectures, 1)
+
+    def test_only_approved_reviews_count(self):
+        self.review(self.students[0], 5)
+        pending = self.review(self.students[1], 2, is_approved=False)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.number_of_reviews, self.course.average_rating), (1, Decimal('5.00')))
+
+        pending.is_approved = True
+        pending.save()
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.number_of_reviews, self.course.average_rating), (2, Decimal('3.50')))
+
+        pending.is_approved = False
+        pending.save()
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.number_of_reviews, self.course.average_rating), (1, Decimal('5.00')))
+
+    def test_deleting_last_review_resets_average(self):
+        self.review(self.students[0], 4).delete()
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.number_of_reviews, self.course.average_rating), (0, Decimal('0.00')))
+
+    def test_recompute_repairs_drift(self):
+        Lesson.objects.create(course=self.course, title="One", order=1)
+        for student, rating in zip(self.students, (5, 4, 4)):
+            self.review(student, rating)
+        Course.objects.filter(pk=self.course.pk).update(total_lectures=9, number_of_reviews=0, rating_total=0, average_rating=0)
+
+        out = StringIO()
+        call_command('recompute_course_stats', stdout=out)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.total_lectures, 1)
+        self.assertEqual(self.course.number_of_reviews, 3)
+        self.assertEqual(self.course.average_rating, Decimal('4.33'))
+        self.assertIn("Repaired 1 course(s).", out.getvalue())
+        self.assertEqual(recompute_course_statistics(), [])
+
+
+
+class EnrollmentFeedTests(ConstantQueryCountMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.instructor = CustomUser.objects.create_user(username="teach", password="pw", role="instructor")
+        self.student = CustomUser.objects.create_user(username="learner", password="pw")
+        self.classmate = CustomUser.objects.create_user(username="classmate", password="pw")
+        self.created = 0
+
+    def add_enrollments(self, count):
+        for _ in range(count):
+            self.created += 1
+            course = Course.objects.create(
+                title=f"Feed {self.created}", short_description="Short", description="Long",
+                instructor=self.instructor if self.created % 2 else None,
+            )
+            Lesson.objects.create(course=course, title="Intro", order=1)
+            Enrollment.objects.create(student=self.student, course=course)
+            Enrollment.objects.create(student=self.classmate, course=course)
+
+    def test_students_only_see_their_own_enrollments(self):
+        self.add_enrollments(3)
+        self.client.force_authenticate(self.student)
+        for url in ('/api/enrollments/', '/api/enrollments/feed/'):
+            results = self.client.get(url).data['results']
+            self.assertEqual(len(results), 3)
+        self.assertEqual(
+            set(results[0]), {'id', 'course', 'enrolled_at', 'progress', 'completed_lessons', 'is_completed', 'completed_at'},
+        )
+        self.assertEqual(results[0]['course']['title'], "Feed 3")
+        self.assertEqual(self.client.get('/api/enrollments/staff/').status_code, 403)
+
+    def test_enrollment_detail_is_scoped_like_the_lists(self):
+        self.add_enrollments(2)
+        mine = Enrollment.objects.get(student=self.student, course__title="Feed 2")
+        theirs = Enrollment.objects.get(student=self.classmate, course__title="Feed 2")
+        taught = Enrollment.objects.get(student=self.classmate, course__title="Feed 1")
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get(f'/api/enrollments/{mine.pk}/').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/enrollments/{theirs.pk}/').status_code, 404)
+        self.assertEqual(self.client.patch(f'/api/enrollments/{theirs.pk}/', {'progress': 100}, format='json').status_code, 404)
+
+        self.client.force_authenticate(self.instructor)
+        self.assertEqual(self.client.get(f'/api/enrollments/{taught.pk}/').status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/enrollments/{theirs.pk}/').status_code, 404)
+        self.assertTrue(Enrollment.objects.filter(pk=theirs.pk).exists())
+
+    def test_course_pages_are_found_by_slug_beyond_the_first_page(self):
+        self.add_enrollments(25)
+        other = Course.objects.create(title="Not Mine", short_description="Short", description="Long")
+        oldest = Course.objects.get(title="Feed 1")
+        response = self.client.get(f'/api/courses/slug/{oldest.slug}/')
+        self.assertEqual((response.status_code, response.data['id']), (200, oldest.pk))
+        self.assertEqual(self.client.get('/api/courses/slug/missing/').status_code, 404)
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(len(self.client.get('/api/enrollments/feed/', {'course': oldest.slug}).data['results']), 1)
+        self.assertEqual(self.client.get('/api/enrollments/feed/', {'course': other.slug}).data['results'], [])
+
+    def test_feed_query_count_is_constant(self):
+        self.client.force_authenticate(self.student)
+        self.assertConstantQueryCount('/api/enrollments/feed/?page_size=100', self.add_enrollments)
+
+    def test_staff_view_is_scoped_to_taught_courses(self):
+        self.add_enrollments(4)
+        self.client.force_authenticate(self.instructor)
+        results = self.client.get('/api/enrollments/staff/').data['results']
+        self.assertEqual(len(results), 4)
+        self.assertEqual({row['course']['instructor']['username'] for row in results}, {"teach"})
+        results = self.client.get('/api/enrollments/staff/', {'student': self.classmate.pk}).data['results']
+        self.assertEqual({row['student']['username'] for row in results}, {"classmate"})
+
+        admin = CustomUser.objects.create_user(username="root", password="pw", role="admin")
+        self.client.force_authenticate(admin)
+        self.assertEqual(len(self.client.get('/api/enrollments/staff/', {'page_size': 100}).data['results']), 8)
+        self.assertConstantQueryCount('/api/enrollments/staff/?page_size=100', self.add_enrollments)
+
+
+@override_settings(RECOMMENDATION_MIN_OVERLAP=1, RECOMMENDATION_TOP_K=5)
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.courses = {
+            name: Course.objects.create(title=name, short_description="Short", description="Long", is_published=True)
+            for name in ("python", "django", "flask", "painting")
+        }
+        self.students = [CustomUser.objects.create_user(username=f"rec{i}", password="pw") for i in range(4)]
+        self.enroll(0, "python", "django")
+        self.enroll(1, "python", "django", "flask")
+        self.enroll(2, "python", "flask")
+        self.enroll(3, "painting")
+
+    def enroll(self, student, *names):
+        for name in names:
+            Enrollment.objects.create(student=self.students[student], course=self.courses[name])
+
+    def also_taken(self, name):
+        response = self.client.get(f'/api/courses/{self.courses[name].pk}/also-taken/')
+        return [item['title'] for item in response.data['results']]
+
+    def test_neighbors_are_ranked_by_cosine_similarity(self):
+        rebuild_recommendations()
+        self.assertEqual(self.also_taken("django"), ["python", "flask"])
+        self.assertEqual(self.also_taken("painting"), [])
+        # django: students {0, 1}; python: {0, 1, 2}
+        neighbor = CourseNeighbor.objects.get(course=self.courses["django"], rank=1)
+        self.assertAlmostEqual(neighbor.score, 2 / math.sqrt(2 * 3))
+
+    def test_user_recommendations_skip_enrolled_courses(self):
+        rebuild_recommendations()
+        self.client.force_authenticate(self.students[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/recommendations/')
+        self.assertEqual([item['title'] for item in response.data['results']], ["flask"])
+        self.assertEqual(len(queries), 1)
+
+    def test_incremental_update_picks_up_new_enrollments(self):
+        Enrollment.objects.update(enrolled_at=timezone.now() - timedelta(days=1))
+        rebuild_recommendations()
+        self.enroll(3, "python")
+        # The courses student 3 takes, and django and flask, which rank python.
+        self.assertEqual(update_recommendations(), 4)
+        self.assertIn("painting", self.also_taken("python"))
+        self.assertIn("python", self.also_taken("painting"))
+
+        def neighbors():
+            rows = CourseNeighbor.objects.values_list('course', 'neighbor', 'rank', 'score')
+            return {(course, neighbor, rank, round(score, 9)) for course, neighbor, rank, score in rows}
+
+        updated = neighbors()
+        rebuild_recommendations()
+        self.assertEqual(updated, neighbors())
+
+    def test_unpublished_courses_are_not_recommended(self):
+        Course.objects.filter(pk=self.courses["python"].pk).update(is_published=False)
+        rebuild_recommendations()
+        self.assertEqual(self.also_taken("django"), ["flask"])
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.instructor = CustomUser.objects.create_user(username="teach", password="pw", role="instructor")
+        self.course = Course.objects.create(
+            title="Cohort", short_description="Short", description="Long", instructor=self.instructor,
+        )
+        self.students = [
+            CustomUser.objects.create_user(username=f"cohort{i}", email=f"cohort{i}@example.com", password="pw")
+            for i in range(5)
+        ]
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+
+    def test_enrolls_by_id_and_email_with_per_user_results(self):
+        self.client.force_authenticate(self.instructor)
+        users = [str(self.students[0].pk), str(self.students[1].pk), "cohort2@example.com", "missing@example.com", "COHORT1@example.com"]
+        response = self.client.post('/api/enrollments/bulk/', {'course': self.course.pk, 'users': users}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['enrolled'], 2)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['already_enrolled', 'enrolled', 'enrolled', 'not_found', 'already_enrolled'],
+        )
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 3)
+        self.assertEqual(
+            sorted(email.recipients[0] for email in OutgoingEmail.objects.all()),
+            ['cohort1@example.com', 'cohort2@example.com'],
+        )
+
+    def test_emails_match_regardless_of_case(self):
+        self.client.force_authenticate(self.instructor)
+        mixed = CustomUser.objects.create_user(username="mixed", email="Mixed.Case@Example.com", password="pw")
+        users = ["mixed.case@example.com", "COHORT2@EXAMPLE.COM"]
+        response = self.client.post('/api/enrollments/bulk/', {'course': self.course.pk, 'users': users}, format='json')
+
+        self.assertEqual([result['status'] for result in response.data['results']], ['enrolled', 'enrolled'])
+        self.assertEqual(
+            set(Enrollment.objects.filter(course=self.course).values_list('student_id', flat=True)),
+            {self.students[0].pk, self.students[2].pk, mixed.pk},
+        )
+
+    def test_query_count_does_not_grow_with_cohort(self):
+        self.client.force_authenticate(self.instructor)
+        users = [student.email for student in self.students[1:]]
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/enrollments/bulk/', {'course': self.course.pk, 'users': users[:1]}, format='json')
+        Enrollment.objects.filter(student__in=self.students[1:]).delete()
+        with CaptureQueriesContext(connection) as large:
+            self.client.post('/api/enrollments/bulk/', {'course': self.course.pk, 'users': users}, format='json')
+        self.assertEqual(len(small), len(large))
+
+    def test_students_and_other_instructors_are_denied(self):
+        other = CustomUser.objects.create_user(username="other", password="pw", role="instructor")
+        for user in (self.students[1], other):
+            self.client.force_authenticate(user)
+            response = self.client.post(
+                '/api/enrollments/bulk/', {'course': self.course.pk, 'users': ["cohort3@example.com"]}, format='json',
+            )
+            self.assertEqual(response.status_code, 403)
+        self.assertFalse(Enrollment.objects.filter(student=self.students[3]).exists())
+
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(username="boss", password="pw", role="admin")
+        self.instructor = CustomUser.objects.create_user(username="teach", password="pw", role="instructor")
+        self.course = Course.objects.create(title="Reports", short_description="Short", description="Long", instructor=self.instructor)
+        self.other = Course.objects.create(title="Other", short_description="Short", description="Long")
+        self.students = [CustomUser.objects.create_user(username=f"s{i}", email=f"s{i}@example.com", password="pw") for i in range(3)]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+        Enrollment.objects.create(student=self.students[0], course=self.other)
+        Enrollment.objects.filter(student=self.students[1], course=self.course).update(is_completed=True, progress=100.0)
+        quiz = Quiz.objects.create(lesson=Lesson.objects.create(course=self.course, title="One", order=1), title="Check")
+        UserQuizAttempt.objects.create(student=self.students[0], quiz=quiz, score=Decimal('40.00'), passed=False)
+        UserQuizAttempt.objects.create(student=self.students[0], quiz=quiz, score=Decimal('90.00'), passed=True, attempt_number=2)
+
+    def get(self, url):
+        response = self.client.get(url)
+        body = b''.join(response.streaming_content).decode() if response.status_code == 200 else None
+        return response, body
+
+    def test_streams_csv_filtered_by_course_and_completion(self):
+        self.client.force_authenticate(self.admin)
+        response, body = self.get(f'/api/exports/enrollments/?course={self.course.pk}&passed=false')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="enrollments-', response['Content-Disposition'])
+        lines = body.splitlines()
+        self.assertTrue(lines[0].startswith('id,student_id,username,email,course_id'))
+        self.assertEqual(sorted(line.split(',')[2] for line in lines[1:]), ['s0', 's2'])
+
+    def test_streams_quiz_attempts_as_jsonl(self):
+        self.client.force_authenticate(self.admin)
+        response, body = self.get('/api/exports/quiz-attempts/?output=jsonl&passed=true')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(row['username'], row['score'], row['course_id']) for row in rows], [('s0', '90.00', self.course.pk)])
+
+    def test_date_range_is_inclusive(self):
+        self.client.force_authenticate(self.admin)
+        today = timezone.localdate()
+        _, body = self.get(f'/api/exports/enrollments/?since={today}&until={today}')
+        self.assertEqual(len(body.splitlines()), 5)
+        _, body = self.get(f'/api/exports/enrollments/?until={today - timedelta(days=1)}')
+        self.assertEqual(len(body.splitlines()), 1)
+        response, _ = self.get('/api/exports/enrollments/?since=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_instructors_only_see_their_courses_and_students_are_denied(self):
+        self.client.force_authenticate(self.instructor)
+        _, body = self.get('/api/exports/enrollments/')
+        self.assertEqual(len(body.splitlines()), 4)
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.client.get('/api/exports/enrollments/').status_code, 403)
+
+    def test_management_command_writes_the_same_report(self):
+        out = StringIO()
+        call_command('export_report', 'quiz-attempts', '--course', str(self.course.pk), stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+def course_package(lessons=3, **extra):
+    return {
+        'title': "Imported Course",
+        'short_description': "Short",
+        'description': "Long",
+        'lessons': [
+            {
+                'title': "Same Title" if i % 2 else f"Lesson {i}",
+                'content': "Body",
+                'quizzes': [{
+                    'title': f"Quiz {i}",
+                    'questions': [
+                        {'question_text': "Pick one", 'choices': [
+                            {'choice_text': "Right", 'is_correct': True}, {'choice_text': "Wrong", 'is_correct': False},
+                        ]},
+                        {'question_text': "Explain", 'question_type': 'text'},
+                    ],
+                }],
+            }
+            for i in range(lessons)
+        ],
+        **extra,
+    }
+
+
+class CourseImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.instructor = CustomUser.objects.create_user(username="author", password="pw", role="instructor")
+        Course.objects.create(title="Imported Course", short_description="Short", description="Long")
+
+    def test_imports_whole_tree_with_unique_slugs(self):
+        self.client.force_authenticate(self.instructor)
+        response = self.client.post('/api/courses/import/', course_package(lessons=5), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            {key: response.data[key] for key in ('slug', 'lessons', 'quizzes', 'questions', 'choices')},
+            {'slug': 'imported-course-1', 'lessons': 5, 'quizzes': 5, 'questions': 10, 'choices': 10},
+        )
+        course = Course.objects.get(pk=response.data['course'])
+        self.assertEqual((course.instructor, course.total_lectures), (self.instructor, 5))
+        self.assertEqual(
+            list(course.lessons.values_list('slug', flat=True)),
+            ['lesson-0', 'same-title', 'lesson-2', 'same-title-1', 'lesson-4'],
+        )
+        self.assertEqual(Quiz.objects.filter(lesson__course=course, questions__choices__is_correct=True).count(), 5)
+        self.assertEqual([course_id for course_id, _ in search_courses("same title")], [course.pk])
+
+    def test_query_count_does_not_grow_with_package_size(self):
+        self.client.force_authenticate(self.instructor)
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/courses/import/', course_package(lessons=2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post('/api/courses/import/', course_package(lessons=500), format='json')
+        self.assertEqual(response.data['lessons'], 500)
+        # Only the number of INSERT batches depends on size: 2,500 rows here.
+        other = lambda queries: [q for q in queries.captured_queries if not q['sql'].startswith('INSERT')]
+        self.assertEqual(len(other(small)), len(other(large)))
+        self.assertLess(len(large), 40)
+
+    def test_invalid_package_creates_nothing(self):
+        self.client.force_authenticate(self.instructor)
+        package = course_package()
+        package['lessons'][1]['quizzes'][0]['questions'][0]['choices'][0]['is_correct'] = False
+        response = self.client.post('/api/courses/import/', package, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_choices_default_to_incorrect_and_orders_start_at_one(self):
+        self.client.force_authenticate(self.instructor)
+        package = course_package(lessons=1)
+        del package['lessons'][0]['quizzes'][0]['questions'][0]['choices'][1]['is_correct']
+        response = self.client.post('/api/courses/import/', package, format='json')
+        self.assertEqual(response.status_code, 201)
+        course = Course.objects.get(pk=response.data['course'])
+        self.assertEqual(list(course.lessons.values_list('order', flat=True)), [1])
+        questions = Question.objects.filter(quiz__lesson__course=course)
+        self.assertEqual(list(questions.values_list('order', flat=True)), [1, 2])
+        self.assertEqual(list(questions.first().choices.values_list('is_correct', flat=True).order_by('pk')), [True, False])
+
+    def test_yaml_package_and_permissions(self):
+        package = "title: From YAML\nshort_description: Short\ndescription: Long\nlessons:\n  - title: Intro\n"
+        self.client.force_authenticate(CustomUser.objects.create_user(username="learner", password="pw"))
+        self.assertEqual(self.client.post('/api/courses/import/', package, content_type='application/yaml').status_code, 403)
+        self.client.force_authenticate(self.instructor)
+        response = self.client.post('/api/courses/import/', package, content_type='application/yaml')
+        self.assertEqual((response.status_code, response.data['slug'], response.data['lessons']), (201, 'from-yaml', 1))
+
+
+class UniqueSlugTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Slugs", short_description="Short", description="Long")
+
+    def test_duplicate_titles_get_suffixes(self):
+        self.assertEqual(Course.objects.create(title="Slugs", short_description="S", description="L").slug, "slugs-1")
+        Category.objects.create(name="Web Dev")
+        self.assertEqual(Category.objects.create(name="Web-Dev").slug, "web-dev-1")
+        self.assertEqual(Course.objects.create(title="Mine", slug="picked", short_description="S", description="L").slug, "picked")
+
+    def test_lesson_slug_costs_one_lookup_however_many_duplicates(self):
+        for order in range(5):
+            Lesson.objects.create(course=self.course, title="Recap", order=order)
+        with CaptureQueriesContext(connection) as queries:
+            lesson = Lesson.objects.create(course=self.course, title="Recap", order=9)
+        self.assertEqual(lesson.slug, "recap-5")
+        self.assertEqual(len([q for q in queries.captured_queries if 'LIKE' in q['sql']]), 1)
+        # Slugs are per course.
+        other = Course.objects.create(title="Other", short_description="S", description="L")
+        self.assertEqual(Lesson.objects.create(course=other, title="Recap", order=1).slug, "recap")
+
+    def test_retries_when_a_concurrent_writer_takes_the_slug(self):
+        Course.objects.create(title="Race", short_description="S", description="L")
+        stale = mock.Mock(side_effect=[set(), {"race"}])  # the first read misses the row above
+        with mock.patch.object(slugs, 'taken_slugs', stale):
+            course = Course.objects.create(title="Race", short_description="S", description="L")
+        self.assertEqual((course.slug, stale.call_count), ("race-1", 2))
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans are asserted against SQLite's EXPLAIN QUERY PLAN.")
+class QueryPlanTests(TestCase):
+    """
+    Guards the indexes declared in model Meta: each hot query must be served
+    by its index and must not fall back to sorting rows in a temp B-tree.
+    """
+    def assertUsesIndex(self, plan, index_name):
+        self.assertIn(f"USING INDEX {index_name}", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def endpoint_plan(self, url, table):
+        # Explain the statement an endpoint actually runs against `table`.
+        cache.clear()  # a response cached by an earlier test would run no query
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(APIClient().get(url).status_code, 200)
+        # Skip the validator and count aggregates; the page query is the one that matters.
+        sql = next(
+            query['sql'] for query in queries
+            if f'FROM "{table}"' in query['sql'] and 'COUNT(' not in query['sql'] and 'MAX(' not in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_enrollment_lookup_by_student_and_course(self):
+        plan = Enrollment.objects.filter(student=1, course=1).explain()
+        self.assertIn("(student_id=? AND course_id=?)", plan)
+
+    def test_student_enrollments_newest_first(self):
+        plan = Enrollment.objects.filter(student=1).order_by('-enrolled_at', '-pk').explain()
+        self.assertUsesIndex(plan, 'enrollment_student_recent_idx')
+
+    def test_course_enrollments_newest_first(self):
+        plan = Enrollment.objects.filter(course=1).order_by('-enrolled_at', '-pk').explain()
+        self.assertUsesIndex(plan, 'enrollment_course_recent_idx')
+
+    def test_published_faqs_newest_first(self):
+        plan = FAQ.objects.filter(is_published=True).order_by('-created_at', '-pk').explain()
+        self.assertUsesIndex(plan, 'faq_published_recent_idx')
+
+    def test_course_list_endpoint(self):
+        self.assertUsesIndex(self.endpoint_plan('/api/courses/', 'courses_course'), 'course_recent_idx')
+
+    def test_published_course_list_endpoint(self):
+        for query, index in (
+            ('published=true', 'course_published_recent_idx'),
+            ('published=true&category=1', 'course_category_recent_idx'),
+            ('published=true&level=beginner', 'course_level_recent_idx'),
+        ):
+            with self.subTest(query):
+                self.assertUsesIndex(self.endpoint_plan(f'/api/courses/?{query}', 'courses_course'), index)
+
+    def test_quiz_attempts_by_student_and_quiz(self):
+        plan = UserQuizAttempt.objects.filter(student=1, quiz=1).order_by('-submitted_at', '-pk').explain()
+        self.assertUsesIndex(plan, 'attempt_student_quiz_idx')
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.django = Course.objects.create(
+            title="Django for Beginners", short_description="Build web apps", description="Models, views and templates.",
+            is_published=True,
+        )
+        self.python = Course.objects.create(
+            title="Advanced Python", short_description="Generators and typing",
+            description="Covers the Django ORM briefly.", what_you_will_learn="Decorators, asyncio", is_published=True,
+        )
+        Course.objects.create(title="Watercolour Painting", short_description="Brushes", description="Colour theory.", is_published=True)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/courses/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [course['id'] for course in response.data['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search("django"), [self.django.pk, self.python.pk])
+
+    def test_all_terms_must_match_and_last_is_a_prefix(self):
+        self.assertEqual(self.search("python asyn"), [self.python.pk])
+        self.assertEqual(self.search("python painting"), [])
+        self.assertEqual(self.search(""), [])
+
+    def test_index_follows_course_and_lesson_changes(self):
+        lesson = Lesson.objects.create(course=self.django, title="Deploying to Kubernetes", order=1)
+        self.assertEqual(self.search("kubernetes"), [self.django.pk])
+        lesson.course = self.python
+        lesson.save()
+        self.assertEqual(self.search("kubernetes"), [self.python.pk])
+
+        self.python.title = "Expert Python"
+        self.python.save()
+        self.assertEqual(self.search("expert"), [self.python.pk])
+        self.python.delete()
+        self.assertEqual(self.search("expert"), [])
+
+    def test_unpublished_courses_are_not_listed(self):
+        self.python.is_published = False
+        self.python.save()
+        self.assertEqual(self.search("django"), [self.django.pk])
+        self.assertEqual([pk for pk, _ in search_courses("django")], [self.django.pk, self.python.pk])
+
+    def test_sparse_fields_and_score(self):
+        response = self.client.get('/api/courses/search/', {'q': "watercol", 'fields': 'id,title'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'score'})
+
+    def test_python_fallback_ranks_like_fts5(self):
+        from .search import FTS5SearchBackend, PythonSearchBackend, tokenize
+
+        python_backend = PythonSearchBackend()
+        python_backend.rebuild()
+        for query in ("django", "colour", "python asyn", "de"):
+            fts5 = [pk for pk, _ in FTS5SearchBackend().search(tokenize(query), 10)]
+            fallback = [pk for pk, _ in python_backend.search(tokenize(query), 10)]
+            self.assertEqual(fallback, fts5, query)
+
+    def test_python_fallback_updates_incrementally(self):
+        from .search import PythonSearchBackend, tokenize
+
+        backend = PythonSearchBackend()
+        backend.rebuild()
+        with self.settings(COURSE_SEARCH_BACKEND='python'), mock.patch('courses.search._python_backend', backend):
+            self.assertEqual(self.search("django"), [self.django.pk, self.python.pk])
+            with self.captureOnCommitCallbacks(execute=True):
+                Lesson.objects.create(course=self.python, title="Pattern matching", order=1)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual([pk for pk, _ in backend.search(tokenize("pattern"), 10)], [self.python.pk])
+            self.assertEqual(len(queries), 0)
+
+    def test_python_fallback_applies_other_workers_changes_without_rebuilding(self):
+        from .search import PythonSearchBackend, tokenize
+
+        backend = PythonSearchBackend()
+        backend.rebuild()
+        # Written through another process's backend: only the change log and the generations tell this one.
+        with self.settings(COURSE_SEARCH_BACKEND='python'), mock.patch('courses.search._python_backend', PythonSearchBackend()):
+            with self.captureOnCommitCallbacks(execute=True):
+                Lesson.objects.create(course=self.django, title="Celery workers", order=1)
+                self.python.delete()
+        with mock.patch.object(backend, 'rebuild', side_effect=AssertionError("rebuilt on the request path")), \
+                mock.patch.object(backend, 'start_build', side_effect=AssertionError("rebuilt in the background")):
+            self.assertEqual([pk for pk, _ in backend.search(tokenize("celery"), 10)], [self.django.pk])
+            self.assertEqual([pk for pk, _ in backend.search(tokenize("python"), 10)], [])
+
+    def test_python_fallback_builds_in_the_background(self):
+        from .search import PythonSearchBackend, tokenize
+
+        backend = PythonSearchBackend()
+        with mock.patch.object(backend, 'start_build') as start_build:
+            self.assertEqual([pk for pk, _ in backend.search(tokenize("django"), 10)], [self.django.pk, self.python.pk])
+        start_build.assert_called_once()
+        self.assertIsNone(backend.inverted)
+
+
+class SignedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username="bearer", password="secret-pass")
+        self.course = Course.objects.create(title="Tokens", short_description="Short", description="Long")
+        Enrollment.objects.create(student=self.user, course=self.course)
+        response = self.client.post('/api/login/', {'username': "bearer", 'password': "secret-pass"}, format='json')
+        self.token = response.data['token']
+        self.client = APIClient()  # drop the session cookie set by login
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {token}")
+        return SignedTokenAuthentication().authenticate(request)
+
+    def test_bearer_token_authenticates_api_requests(self):
+        self.assertEqual(len(self.client.get('/api/enrollments/').data['results']), 0)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(len(self.client.get('/api/enrollments/').data['results']), 1)
+
+    def test_user_lookup_is_cached(self):
+        self.authenticate(self.token)
+        with CaptureQueriesContext(connection) as queries, mock.patch('django.contrib.auth.hashers.check_password') as hasher:
+            user, _ = self.authenticate(self.token)
+        self.assertEqual((user.pk, len(queries)), (self.user.pk, 0))
+        hasher.assert_not_called()
+
+    def test_tampered_and_expired_tokens_are_rejected(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token[:-1] + ('A' if self.token[-1] != 'A' else 'B'))
+        with self.settings(API_TOKEN_MAX_AGE=-1), self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
+
+    def test_logout_revokes_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+        # 403 rather than 401: SessionAuthentication comes first and sends no WWW-Authenticate challenge.
+        self.assertEqual(self.client.get('/api/enrollments/').status_code, 403)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
+
+    def test_cached_identity_holds_no_password(self):
+        user, _ = self.authenticate(self.token)
+        cached = cache.get(f"auth:identity:{self.user.pk}")
+        self.assertNotIn(self.user.password, cached)
+        self.assertIn('password', user.get_deferred_fields())
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.assertEqual(self.client.get('/api/me/').data['username'], "bearer")
+
+    def test_password_reset_revokes_tokens(self):
+        self.user.refresh_from_db()  # the reset token covers last_login, which logging in changed
+        uid = urlsafe_base64_encode(force_bytes(self.user.pk))
+        token = default_token_generator.make_token(self.user)
+        response = self.client.post(
+            f'/reset/{uid}/{token}/', {'new_password1': "n3w-Secret-pass", 'new_password2': "n3w-Secret-pass"}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
+
+    def test_deactivated_users_are_rejected(self):
+        self.authenticate(self.token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.token)
+
+
+def image_bytes(size, fmt='JPEG', mode='RGB', exif=None):
+    buffer = BytesIO()
+    image = Image.new(mode, size, (200, 30, 30, 128)[:len(mode)])
+    image.save(buffer, format=fmt, **({'exif': exif} if exif is not None else {}))
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_VARIANTS_ASYNC=False, IMAGE_VARIANT_WIDTHS=[50, 100, 400], IMAGE_VARIANT_FORMAT='webp')
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = APIClient()
+
+    def test_upload_builds_variants_listed_by_the_serializer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(
+                title="Pictured", short_description="Short", description="Long",
+                thumbnail=SimpleUploadedFile("cover.jpg", image_bytes((200, 100)), content_type="image/jpeg"),
+            )
+        variants = list(ImageVariant.objects.filter(source=course.thumbnail.name).values_list('width', 'height', 'format'))
+        self.assertEqual(variants, [(50, 25, 'webp'), (100, 50, 'webp')])
+        for variant in ImageVariant.objects.all():
+            self.assertRegex(variant.name, r'^variants/[0-9a-f]{16}-%dw\.webp$' % variant.width)
+            with default_storage.open(variant.name) as stored:
+                self.assertEqual(Image.open(stored).size, (variant.width, variant.height))
+
+        response = self.client.get(f'/api/courses/{course.pk}/')
+        self.assertEqual(list(response.data['thumbnail_variants']), ['50', '100'])
+        self.assertTrue(response.data['thumbnail_variants']['50'].startswith('http://testserver/media/variants/'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/courses/')
+        self.assertFalse([query for query in queries if 'imagevariant' in query['sql']])
+
+    def test_a_page_looks_up_its_variants_in_one_query(self):
+        instructor = CustomUser.objects.create_user(username="painter", password="pw", role="instructor")
+        picture = default_storage.save("profile_pictures/painter.jpg", ContentFile(image_bytes((120, 60))))
+        CustomUser.objects.filter(pk=instructor.pk).update(profile_picture=picture)
+        for i in range(5):
+            name = default_storage.save(f"course_thumbnails/{i}.jpg", ContentFile(image_bytes((120, 60))))
+            course = Course.objects.create(title=f"Course {i}", short_description="Short", description="Long", instructor=instructor)
+            Course.objects.filter(pk=course.pk).update(thumbnail=name)
+        call_command('generate_image_variants', stdout=StringIO())
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/courses/')
+        self.assertEqual(len([query for query in queries if 'imagevariant' in query['sql']]), 1)
+        self.assertTrue(all(list(course['thumbnail_variants']) == ['50', '100'] for course in response.data['results']))
+        self.assertEqual(list(response.data['results'][0]['instructor']['profile_picture_variants']), ['50', '100'])
+
+    def test_pending_images_are_not_looked_up_again(self):
+        with override_settings(IMAGE_VARIANTS_ASYNC=True), mock.patch('courses.images._pool'):
+            self.addCleanup(images._pending.discard, "category_images/queued.jpg")
+            self.assertEqual(images.get_variants("category_images/queued.jpg"), {})
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(images.get_variants("category_images/queued.jpg"), {})
+        self.assertEqual(len(queries), 0)
+
+    def test_identical_uploads_share_files_and_narrow_images_are_only_reencoded(self):
+        data = image_bytes((300, 150), fmt='PNG', mode='RGBA')
+        first = Category.objects.create(name="First", image=SimpleUploadedFile("a.png", data))
+        second = Category.objects.create(name="Second", image=SimpleUploadedFile("b.png", data))
+        self.client.get('/api/categories/')
+        first_names = set(ImageVariant.objects.filter(source=first.image.name).values_list('name', flat=True))
+        self.assertEqual(first_names, set(ImageVariant.objects.filter(source=second.image.name).values_list('name', flat=True)))
+
+        # EXIF orientation 6: stored 80x40, upright 40x80, narrower than every width.
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        user = CustomUser.objects.create_user(username="pic", password="pw")
+        user.profile_picture.save("me.jpg", ContentFile(image_bytes((80, 40), exif=exif)))
+        self.client.force_authenticate(user)
+        self.assertEqual(list(self.client.get('/api/me/').data['profile_picture_variants']), ['40'])
+        self.assertEqual(ImageVariant.objects.get(source=user.profile_picture.name).height, 80)
+
+    def test_existing_media_is_backfilled_and_pruned(self):
+        name = default_storage.save("course_thumbnails/old.jpg", ContentFile(image_bytes((120, 60))))
+        course = Course.objects.create(title="Old", short_description="Short", description="Long")
+        Course.objects.filter(pk=course.pk).update(thumbnail=name)  # no signals, like rows from before the pipeline
+        broken = Category.objects.create(name="Broken")
+        Category.objects.filter(pk=broken.pk).update(image="category_images/missing.png")
+
+        out = StringIO()
+        with self.assertLogs('courses.images', 'ERROR'):
+            call_command('generate_image_variants', stdout=out)
+        self.assertIn("Built variants for 1 image(s), 1 failed", out.getvalue())
+        self.assertEqual(list(ImageVariant.objects.filter(source=name).values_list('width', flat=True)), [50, 100])
+
+        Course.objects.filter(pk=course.pk).update(thumbnail='')
+        Category.objects.filter(pk=broken.pk).update(image='')
+        files = list(ImageVariant.objects.values_list('name', flat=True))
+        call_command('generate_image_variants', '--prune', stdout=StringIO())
+        self.assertFalse(ImageVariant.objects.exists())
+        self.assertFalse(any(default_storage.exists(file) for file in files))
+
+    def test_unknown_images_are_scheduled_on_first_use(self):
+        name = default_storage.save("category_images/lazy.jpg", ContentFile(image_bytes((120, 60))))
+        category = Category.objects.create(name="Lazy")
+        Category.objects.filter(pk=category.pk).update(image=name)
+        with override_settings(IMAGE_VARIANTS_ASYNC=True), mock.patch('courses.images._pool') as pool:
+            self.assertEqual(self.client.get(f'/api/categories/{category.pk}/').data['image_variants'], {})
+            self.client.get(f'/api/categories/{category.pk}/')
+        self.addCleanup(images._pending.discard, name)
+        pool.submit.assert_called_once()
+        self.assertEqual(pool.submit.call_args.args[1], name)
 
-# Create your tests here.
@@ -1,19 +1,24 @@
 from django.urls import path
 from .api_views import (
-    CustomUserListCreateAPIView, CustomUserRetrieveUpdateDestroyAPIView,
+    CustomUserListCreateAPIView, CustomUserRetrieveUpdateDestroyAPIView, CurrentUserAPIView,
     CategoryListCreateAPIView, CategoryRetrieveUpdateDestroyAPIView,
-    CourseListCreateAPIView, CourseRetrieveUpdateDestroyAPIView,
+    CourseListCreateAPIView, CourseRetrieveUpdateDestroyAPIView, CourseBySlugAPIView, CourseSearchAPIView, CourseImportAPIView,
+    CourseAlsoTakenAPIView, RecommendationAPIView,
     LessonListCreateAPIView, LessonRetrieveUpdateDestroyAPIView,
-    EnrollmentListCreateAPIView, EnrollmentRetrieveUpdateDestroyAPIView,
-    QuizListCreateAPIView, QuizRetrieveUpdateDestroyAPIView,
+    EnrollmentListCreateAPIView, EnrollmentRetrieveUpdateDestroyAPIView, BulkEnrollmentAPIView,
+    EnrollmentFeedAPIView, StaffEnrollmentListAPIView, LessonProgressAPIView,
+    QuizListCreateAPIView, QuizRetrieveUpdateDestroyAPIView, QuizSnapshotAPIView, QuizSubmitAPIView,
     FAQListCreateAPIView, FAQRetrieveUpdateDestroyAPIView,
-    LoginAPIView, RegisterAPIView,
+    CertificateVerifyAPIView, CertificateDocumentAPIView, ExportAPIView,
+    CourseAnalyticsAPIView, QuizAnalyticsAPIView,
+    LoginAPIView, LogoutAPIView, RegisterAPIView,
 )
 
 urlpatterns = [
     # CustomUser API URLs
     path('users/', CustomUserListCreateAPIView.as_view(), name='user-list-create'),
     path('users/<int:pk>/', CustomUserRetrieveUpdateDestroyAPIView.as_view(), name='user-detail'),
+    path('me/', CurrentUserAPIView.as_view(), name='current-user'),
 
     # Category API URLs
     path('categories/', CategoryListCreateAPIView.as_view(), name='category-list-create'),
@@ -21,7 +26,12 @@ urlpatterns = [
 
     # Course API URLs
     path('courses/', CourseListCreateAPIView.as_view(), name='course-list-create'),
+    path('courses/search/', CourseSearchAPIView.as_view(), name='course-search'),
+    path('courses/import/', CourseImportAPIView.as_view(), name='course-import'),
     path('courses/<int:pk>/', CourseRetrieveUpdateDestroyAPIView.as_view(), name='course-detail'),
+    path('courses/slug/<slug:slug>/', CourseBySlugAPIView.as_view(), name='course-by-slug'),
+    path('courses/<int:pk>/also-taken/', CourseAlsoTakenAPIView.as_view(), name='course-also-taken'),
+    path('recommendations/', RecommendationAPIView.as_view(), name='recommendations'),
 
     # Lesson API URLs
     path('lessons/', LessonListCreateAPIView.as_view(), name='lesson-list-create'),
@@ -30,10 +40,27 @@ urlpatterns = [
     # Enrollment API URLs
     path('enrollments/', EnrollmentListCreateAPIView.as_view(), name='enrollment-list-create'),
     path('enrollments/<int:pk>/', EnrollmentRetrieveUpdateDestroyAPIView.as_view(), name='enrollment-detail'),
+    path('enrollments/bulk/', BulkEnrollmentAPIView.as_view(), name='enrollment-bulk'),
+    path('enrollments/feed/', EnrollmentFeedAPIView.as_view(), name='enrollment-feed'),
+    path('enrollments/staff/', StaffEnrollmentListAPIView.as_view(), name='enrollment-staff'),
+    path('progress/', LessonProgressAPIView.as_view(), name='lesson-progress'),
+
+    # Certificate API URLs
+    path('certificates/<str:unique_id>/verify/', CertificateVerifyAPIView.as_view(), name='certificate-verify'),
+    path('certificates/<str:unique_id>/document/', CertificateDocumentAPIView.as_view(), name='certificate-document'),
+
+    # Export API URLs
+    path('exports/<str:kind>/', ExportAPIView.as_view(), name='export'),
+
+    # Analytics API URLs
+    path('analytics/courses/', CourseAnalyticsAPIView.as_view(), name='analytics-courses'),
+    path('analytics/quizzes/', QuizAnalyticsAPIView.as_view(), name='analytics-quizzes'),
 
     # Quiz API URLs
     path('quizzes/', QuizListCreateAPIView.as_view(), name='quiz-list-create'),
     path('quizzes/<int:pk>/', QuizRetrieveUpdateDestroyAPIView.as_view(), name='quiz-detail'),
+    path('quizzes/<int:pk>/snapshot/', QuizSnapshotAPIView.as_view(), name='quiz-snapshot'),
+    path('quizzes/<int:pk>/submit/', QuizSubmitAPIView.as_view(), name='quiz-submit'),
 
     # FAQ API URLs
     path('faqs/', FAQListCreateAPIView.as_view(), name='faq-list-create'),
@@ -41,5 +68,6 @@ urlpatterns = [
 
     # Login and Registration API URLs
     path('login/', LoginAPIView.as_view(), name='api-login'),
+    path('logout/', LogoutAPIView.as_view(), name='api-logout'),
     path('register/', RegisterAPIView.as_view(), name='api-register'),
 ]
\ No newline at end of file
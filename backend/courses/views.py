@@ -4,8 +4,6 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django import forms
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
 from courses.models import Course  # Only Course from courses.models
 from Enrollment.models import Enrollment
@@ -15,6 +13,7 @@ from Lesson.models import Lesson
 from Quiz.models import Quiz
 from FAQ.models import FAQ
 from django.views.generic import ListView
+from utils.mail import queue_email
 from django.contrib.auth.views import PasswordResetView
 import os
 # DRF Imports
@@ -195,21 +194,16 @@ def register(request):
             user.set_password(form.cleaned_data['password1'])
             user.save()
             subject = 'Welcome to E-Learn!'
-            html_message = render_to_string('registration/welcome_email.html', {
-                'user': user,
-                'site_url': request.build_absolute_uri('/')
-            })
             plain_message = f"Hi {user.username},\n\nWelcome to E-Learn! We're excited to have you on board. Start exploring our courses at {request.build_absolute_uri('/')}\n\nBest,\nThe E-Learn Team"
-            try:
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    html_message=html_message,
-                    fail_silently=False,
-                )
-            except Exception as e:
+            # Queued for the outbox worker so the request never waits on SMTP
+            email_error = queue_email(
+                context={'user': user, 'site_url': request.build_absolute_uri('/')},
+                template='welcome_email.html',
+                subject=subject,
+                recipients=[user.email],
+                message=plain_message,
+            )
+            if email_error:
                 messages.warning(request, 'Welcome email could not be sent, but your account was created.')
             login(request, user)
             messages.success(request, 'Registration successful! A welcome email has been sent.')
@@ -225,22 +219,19 @@ def enroll(request, slug):
         if not Enrollment.objects.filter(student=request.user, course=course).exists():
             enrollment = Enrollment.objects.create(student=request.user, course=course)
             subject = f'Enrolled in {course.title}'
-            html_message = render_to_string('registration/course_enrollment_email.html', {
-                'user': request.user,
-                'course': course,
-                'course_url': request.build_absolute_uri(course.get_absolute_url())
-            })
             plain_message = f"Hi {request.user.username},\n\nYou have successfully enrolled in {course.title}! Access the course at {request.build_absolute_uri(course.get_absolute_url())}\n\nBest,\nThe E-Learn Team"
-            try:
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [request.user.email],
-                    html_message=html_message,
-                    fail_silently=False,
-                )
-            except Exception as e:
+            email_error = queue_email(
+                context={
+                    'user': request.user,
+                    'course': course,
+                    'course_url': request.build_absolute_uri(course.get_absolute_url())
+                },
+                template='registration/course_enrollment_email.html',
+                subject=subject,
+                recipients=[request.user.email],
+                message=plain_message,
+            )
+            if email_error:
                 messages.warning(request, 'Enrollment email could not be sent, but you are enrolled.')
             messages.success(request, f'You have successfully enrolled in {course.title}!')
             return redirect('course_detail', slug=course.slug)
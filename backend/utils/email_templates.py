@@ -0,0 +1,77 @@
+import os
+import re
+
+from django.template import engines
+from django.template.loader import get_template, render_to_string
+from premailer import transform
+
+TEMPLATE_TOKEN = re.compile(r'{{.*?}}|{%.*?%}|{#.*?#}', re.S)
+# Inheritance and includes pull in markup premailer never saw.
+UNSUPPORTED_TAG = re.compile(r'{%\s*(extends|include|block)\b')
+PLACEHOLDER = 'premailertoken{:05d}x'
+PLACEHOLDER_PATTERN = re.compile(r'premailertoken(\d{5})x')
+
+# template path -> (mtime, compiled inlined template, or None to fall back)
+_inlined_templates = {}
+
+
+def inline_template_source(source):
+    """
+    Run premailer over raw template source and return the inlined source, or
+    None when the template cannot be inlined ahead of rendering.
+
+    Template tags are swapped for plain-word placeholders first, so
+    premailer's HTML serializer cannot percent-encode or escape them (e.g.
+    `href="{{ reset_url }}"` would otherwise become `{{%20reset_url%20}}`).
+    """
+    if UNSUPPORTED_TAG.search(source):
+        return None
+    tokens = TEMPLATE_TOKEN.findall(source)
+    counter = iter(range(len(tokens)))
+    masked = TEMPLATE_TOKEN.sub(lambda match: PLACEHOLDER.format(next(counter)), source)
+
+    inlined = transform(masked)
+
+    found = [int(index) for index in PLACEHOLDER_PATTERN.findall(inlined)]
+    if found != list(range(len(tokens))):
+        # premailer dropped or moved a tag (e.g. one inside <style>).
+        return None
+    return PLACEHOLDER_PATTERN.sub(lambda match: tokens[int(match.group(1))], inlined)
+
+
+def get_inlined_template(template_name):
+    """
+    Return a compiled template whose CSS premailer has already inlined, cached
+    per template path and file modification time, or None if the template
+    has to be inlined after every render.
+    """
+    template = get_template(template_name)
+    path = template.origin.name
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _inlined_templates.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    inlined = inline_template_source(template.template.source)
+    compiled = engines['django'].from_string(inlined) if inlined is not None else None
+    _inlined_templates[path] = (mtime, compiled)
+    return compiled
+
+
+def render_inlined(template_name, context):
+    """
+    Render an email template to HTML with inlined CSS. premailer runs once
+    per template version; each message only pays for Django's rendering.
+    """
+    template = get_inlined_template(template_name)
+    if template is None:
+        return transform(render_to_string(template_name=template_name, context=context))
+    return template.render(context)
+
+
+def clear_inlined_templates():
+    _inlined_templates.clear()
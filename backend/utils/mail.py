@@ -1,30 +1,39 @@
 # myapp/mail.py (or utils/mail.py, ensure import paths are correct)
 
-from premailer import transform
 from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from Outbox.models import OutgoingEmail
+from utils.email_templates import render_inlined
 import os
 
+def add_branding(context):
+    """
+    Add the logo, links and contact details every email template expects.
+    """
+    context['imgLogo'] = os.getenv('EMAIL_LOGO_URL')
+    context['VITE_APP_BACKEND_URL'] = os.getenv('VITE_APP_BACKEND_URL')
+    context['ADDRESS'] = os.getenv('ADDRESS')
+    context['SUPPORT_MAIL'] = os.getenv('SUPPORT_MAIL')
+    return context
+
+def get_from_email():
+    # Use environment variables for all email config if available, else fallback to Django settings
+    from_email = os.getenv('DEFAULT_FROM_EMAIL')
+    if not from_email:
+        raise Exception("DEFAULT_FROM_EMAIL is not set in environment or Django settings.")
+    return from_email
+
 def trigger_email(context, template, subject, recipients, message=None):
     """
     Sends an email using Django's send_mail, rendering an HTML template
     and inlining CSS with premailer.
     """
     try:
-        # Use environment variables for all email config if available, else fallback to Django settings
-        from_email = os.getenv('DEFAULT_FROM_EMAIL')
-        if not from_email:
-            raise Exception("DEFAULT_FROM_EMAIL is not set in environment or Django settings.")
-
-        context['imgLogo'] = os.getenv('EMAIL_LOGO_URL')
-        context['VITE_APP_BACKEND_URL'] = os.getenv('VITE_APP_BACKEND_URL')
-        context['ADDRESS'] = os.getenv('ADDRESS')
-        context['SUPPORT_MAIL'] = os.getenv('SUPPORT_MAIL')
+        from_email = get_from_email()
+        add_branding(context)
 
-        # Render the HTML template with the provided context
-        raw_html = render_to_string(template_name=template, context=context)
-        # Inline CSS using premailer for better email client compatibility
-        html_message = transform(raw_html)
+        # Render the HTML template with CSS inlined by premailer for better email
+        # client compatibility (premailer runs once per template version)
+        html_message = render_inlined(template, context)
 
         # Send the email using Django's send_mail function
         send_mail(
@@ -38,4 +47,50 @@ def trigger_email(context, template, subject, recipients, message=None):
         return None # Return None on successful email sending
     except Exception as e:
         print(f"Error in trigger_email: {e}") # Log the error for debugging
-        return e # Return the exception object on failure
\ No newline at end of file
+        return e # Return the exception object on failure
+
+def queue_email(context, template, subject, recipients, message=None):
+    """
+    Same arguments as trigger_email, but only renders the template and stores
+    the email in the outbox. SMTP delivery happens later in the
+    `send_queued_mail` worker, outside the request.
+    """
+    try:
+        from_email = get_from_email()
+        add_branding(context)
+        OutgoingEmail.objects.create(
+            subject=subject,
+            message=message or "",
+            html_message=render_inlined(template, context),
+            inline_css=False,
+            from_email=from_email,
+            recipients=list(recipients),
+        )
+        return None # Return None once the email is queued
+    except Exception as e:
+        print(f"Error in queue_email: {e}") # Log the error for debugging
+        return e # Return the exception object on failure
+
+def queue_mass_email(template, subject, messages):
+    """
+    Queue one email per (context, recipients, plain_message) tuple in
+    `messages` with a single bulk insert, e.g. for a cohort enrollment.
+    Returns None on success or the exception, like queue_email.
+    """
+    try:
+        from_email = get_from_email()
+        OutgoingEmail.objects.bulk_create([
+            OutgoingEmail(
+                subject=subject,
+                message=message or "",
+                html_message=render_inlined(template, add_branding(context)),
+                inline_css=False,
+                from_email=from_email,
+                recipients=list(recipients),
+            )
+            for context, recipients, message in messages
+        ], batch_size=500)
+        return None
+    except Exception as e:
+        print(f"Error in queue_mass_email: {e}") # Log the error for debugging
+        return e
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60). Like DRF, only the first letter of the period counts."""
+    count, period = rate.split('/')
+    return int(count), DURATIONS[period.strip()[0]]
+
+
+class LocalCounterStore:
+    """Counters in process memory: fine for a single worker or for tests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}  # key -> (value, expires_at)
+
+    def get(self, key):
+        with self.lock:
+            value, expires_at = self.counters.get(key, (0, 0))
+            return value if expires_at > time.time() else 0
+
+    def incr(self, key, ttl):
+        now = time.time()
+        with self.lock:
+            value, expires_at = self.counters.get(key, (0, 0))
+            if expires_at <= now:
+                value, expires_at = 0, now + ttl
+            self.counters[key] = (value + 1, expires_at)
+            if len(self.counters) > 10000:
+                self.counters = {k: v for k, v in self.counters.items() if v[1] > now}
+            return value + 1
+
+    def decr(self, key):
+        with self.lock:
+            value, expires_at = self.counters.get(key, (0, 0))
+            if value > 0 and expires_at > time.time():
+                self.counters[key] = (value - 1, expires_at)
+
+    def delete(self, key):
+        with self.lock:
+            self.counters.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+
+class CacheCounterStore:
+    """Counters in a Django cache, shared by every worker using it."""
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def get(self, key):
+        return caches[self.alias].get(key, 0)
+
+    def incr(self, key, ttl):
+        cache = caches[self.alias]
+        cache.add(key, 0, ttl)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr().
+            cache.set(key, 1, ttl)
+            return 1
+
+    def decr(self, key):
+        try:
+            caches[self.alias].decr(key)
+        except ValueError:
+            pass  # Expired meanwhile; nothing left to take back.
+
+    def delete(self, key):
+        caches[self.alias].delete(key)
+
+
+_local_store = LocalCounterStore()
+
+
+def get_store():
+    if getattr(settings, 'RATELIMIT_STORE', 'cache') == 'local':
+        return _local_store
+    return CacheCounterStore(getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default'))
+
+
+def hit(scope, ident, rate=None, store=None, now=None, count_denied=True):
+    """
+    Count one request by `ident` against the `scope` rate (RATELIMIT_RATES)
+    and return (allowed, retry_after_seconds).
+
+    Sliding-window counter: the previous fixed window's count is weighted by
+    how much of it still overlaps the sliding window, so bursts across a
+    window boundary are caught without keeping a log of timestamps. Denied
+    requests are counted too, so a client that keeps hammering stays blocked,
+    unless `count_denied` is false; then a denied request's increment is
+    taken back and the limit lifts as soon as the allowed requests age out
+    of the window.
+    """
+    rate = rate or getattr(settings, 'RATELIMIT_RATES', {}).get(scope)
+    if not rate or not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return True, 0
+    limit, window = parse_rate(rate)
+    store = store or get_store()
+    now = time.time() if now is None else now
+
+    digest = hashlib.md5(str(ident).encode()).hexdigest()
+    index = int(now // window)
+    elapsed = now - index * window
+    key = f"ratelimit:{scope}:{digest}:{index}"
+    # Increment first, so concurrent requests cannot all slip under the limit.
+    current = store.incr(key, 2 * window)
+    previous = store.get(f"ratelimit:{scope}:{digest}:{index - 1}")
+    estimate = previous * (window - elapsed) / window + current
+    if estimate <= limit:
+        return True, 0
+    if not count_denied:
+        store.decr(key)
+
+    if current > limit or not previous:
+        retry_after = window - elapsed
+    else:
+        # Wait until the previous window's weight has decayed enough.
+        retry_after = window * (1 - (limit - current) / previous) - elapsed
+    return False, max(1, math.ceil(retry_after))
+
+
+def reset(scope, ident, rate=None, store=None, now=None):
+    """Forget every request counted for `ident` in the `scope` window and the one before it."""
+    rate = rate or getattr(settings, 'RATELIMIT_RATES', {}).get(scope)
+    if not rate:
+        return
+    window = parse_rate(rate)[1]
+    store = store or get_store()
+    now = time.time() if now is None else now
+    digest = hashlib.md5(str(ident).encode()).hexdigest()
+    index = int(now // window)
+    for i in (index - 1, index):
+        store.delete(f"ratelimit:{scope}:{digest}:{i}")
+
+
+def client_ip(request):
+    if getattr(settings, 'RATELIMIT_TRUST_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    DRF throttle on top of hit(). Subclasses set `scope` and may override
+    get_ident() to key on something other than the client IP.
+    """
+    scope = None
+    count_denied = True
+
+    def get_ident(self, request):
+        return client_ip(request)
+
+    def allow_request(self, request, view):
+        ident = self.get_ident(request)
+        if not ident:
+            return True
+        allowed, self.retry_after = hit(self.scope, ident, count_denied=self.count_denied)
+        return allowed
+
+    def reset(self, request):
+        ident = self.get_ident(request)
+        if ident:
+            reset(self.scope, ident)
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginRateThrottle(SlidingWindowThrottle):
+    scope = 'login'
+
+
+class LoginUsernameRateThrottle(SlidingWindowThrottle):
+    """
+    Caps failed password guesses against one account, whichever IPs they
+    come from. Denied attempts are not counted and the login view calls
+    reset() on success, so only failed authentications add up.
+    """
+    scope = 'login_username'
+    count_denied = False
+
+    def get_ident(self, request):
+        return str(request.data.get('username') or '').lower()
+
+
+class RegisterRateThrottle(SlidingWindowThrottle):
+    scope = 'register'
+
+
+def json_field(name):
+    """Key function for ratelimit(): a field of the JSON request body."""
+    def get(request):
+        try:
+            return str(json.loads(request.body).get(name) or '').lower()
+        except (ValueError, AttributeError):
+            return ''
+    return get
+
+
+def ratelimit(scope, key=client_ip, methods=('POST',)):
+    """
+    Rate limit a plain Django view, e.g. @ratelimit('password_reset'). `key`
+    maps the request to the identity being limited (client IP by default).
+    Over the limit, the view is not called and a 429 JSON response with a
+    Retry-After header is returned.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                ident = key(request)
+                if ident:
+                    allowed, retry_after = hit(scope, ident)
+                    if not allowed:
+                        response = JsonResponse({'error': 'Too many requests. Please try again later.'}, status=429)
+                        response['Retry-After'] = str(retry_after)
+                        return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+from django.db import IntegrityError, transaction
+
+# Room kept for a "-<n>" suffix when looking up colliding slugs, so a base
+# cut short to fit the suffix is still found by the startswith query.
+SUFFIX_ROOM = 10
+
+
+def free_slug(base, taken, max_length):
+    """The first of base, base-1, base-2, ... (cut to max_length) not in `taken`."""
+    slug, num = base[:max_length], 1
+    while slug in taken:
+        suffix = f"-{num}"
+        slug = base[:max_length - len(suffix)] + suffix
+        num += 1
+    return slug
+
+
+def allocate_slugs(bases, taken, max_length):
+    """
+    Pick a free slug for every base in `bases`, in memory. `taken` is
+    updated with each slug handed out, so duplicates within `bases` get
+    suffixes too.
+    """
+    slugs = []
+    for base in bases:
+        slug = free_slug(base or 'untitled', taken, max_length)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def taken_slugs(queryset, base, max_length, field='slug'):
+    """Every slug in `queryset` that could collide with `base` or its suffixed forms, in one query."""
+    prefix = base[:max(max_length - SUFFIX_ROOM, 1)]
+    return set(queryset.filter(**{f'{field}__startswith': prefix}).values_list(field, flat=True))
+
+
+def save_with_unique_slug(instance, base, queryset, save, field='slug', attempts=5):
+    """
+    Set `instance.<field>` to the first free slug derived from `base` among
+    the rows of `queryset` (the uniqueness scope) and call `save()`.
+
+    The colliding slugs are read with one startswith query and the suffix is
+    picked in memory. If another writer takes the same slug between the read
+    and the insert, the unique constraint raises IntegrityError; the save is
+    then retried with a fresh read, up to `attempts` times. IntegrityErrors
+    not caused by the slug are re-raised at once.
+    """
+    max_length = instance._meta.get_field(field).max_length
+    base = base or 'untitled'
+    if instance.pk is not None:
+        queryset = queryset.exclude(pk=instance.pk)
+    for attempt in range(attempts):
+        slug = free_slug(base, taken_slugs(queryset, base, max_length, field), max_length)
+        setattr(instance, field, slug)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            setattr(instance, field, '')
+            if attempt == attempts - 1 or not queryset.filter(**{field: slug}).exists():
+                raise
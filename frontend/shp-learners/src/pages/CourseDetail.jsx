@@ -10,6 +10,12 @@ function CourseDetail({ course, isEnrolled, user, navigate, enrollment }) {
   const instructor = course.instructor || {};
   const category = course.category || {};
 
+  // Helper: srcSet from the resized copies the API lists as { width: url }
+  const variantSrcSet = (variants) => {
+    const entries = Object.entries(variants || {});
+    return entries.length ? entries.map(([width, url]) => `${url} ${width}w`).join(', ') : undefined;
+  };
+
   // Helper: Format multiline description with bullets and emojis
   const formatDescription = (desc) => {
     if (!desc) return null;
@@ -28,6 +34,8 @@ function CourseDetail({ course, isEnrolled, user, navigate, enrollment }) {
             <div className="relative w-full flex flex-col items-center">
               <img
                 src={course.thumbnail}
+                srcSet={variantSrcSet(course.thumbnail_variants)}
+                sizes="(min-width: 768px) 320px, 100vw"
                 alt={course.title}
                 className="rounded-xl border shadow max-w-full"
                 style={{ maxHeight: 320, objectFit: 'contain', background: '#f3f4f6' }}
@@ -37,6 +45,8 @@ function CourseDetail({ course, isEnrolled, user, navigate, enrollment }) {
           ) : category.image ? (
             <img
               src={category.image}
+              srcSet={variantSrcSet(category.image_variants)}
+              sizes="(min-width: 768px) 320px, 100vw"
               alt={category.name}
               className="rounded-xl border shadow max-w-full"
               style={{ maxHeight: 320, objectFit: 'contain', background: '#f3f4f6' }}
@@ -266,7 +276,6 @@ function CourseDetail({ course, isEnrolled, user, navigate, enrollment }) {
           <h3 className="font-semibold text-gray-800 mb-2">Instructor Details</h3>
           <ul className="text-gray-700 text-sm space-y-1">
             <li><strong>Username:</strong> {instructor.username}</li>
-            <li><strong>Email:</strong> {instructor.email || 'N/A'}</li>
             <li><strong>Bio:</strong> {instructor.bio || 'N/A'}</li>
             <li><strong>Joined:</strong> {instructor.date_joined ? new Date(instructor.date_joined).toLocaleDateString() : 'N/A'}</li>
             <li><strong>Role:</strong> {instructor.role}</li>
@@ -28,7 +28,7 @@ function FAQ() {
         });
         if (res.ok) {
           const data = await res.json();
-          setFaqs(data);
+          setFaqs(data.results ?? data);
         } else {
           setFaqs([]);
         }
@@ -8,7 +8,7 @@ function Home({ courses: initialCourses, navigate }) {
 
   useEffect(() => {
     setLoading(true);
-    fetch(`${BACKEND_URL}/api/courses/`)
+    fetch(`${BACKEND_URL}/api/courses/?published=true`)
       .then(res => {
         if (!res.ok) {
           throw new Error(`HTTP error! status: ${res.status}`);
@@ -16,7 +16,7 @@ function Home({ courses: initialCourses, navigate }) {
         return res.json();
       })
       .then(data => {
-        setCourses(data);
+        setCourses(data.results ?? data);
         setLoading(false);
       })
       .catch(err => {
@@ -47,8 +47,8 @@ function Login() {
         return;
       }
 
-      // Optionally, fetch user profile after login
-      const userRes = await fetch(`${BACKEND_URL}/api/users/`, {
+      // Fetch the logged-in user's own profile
+      const userRes = await fetch(`${BACKEND_URL}/api/me/`, {
         credentials: 'include',
       });
       if (!userRes.ok) {
@@ -56,14 +56,7 @@ function Login() {
         setIsSubmitting(false); // Stop loading on error
         return;
       }
-      const users = await userRes.json();
-      const user = users.find(u => u.username === username);
-
-      if (!user) {
-        setErrorMessage('User profile not found after login. This might be a server configuration issue.');
-        setIsSubmitting(false); // Stop loading on error
-        return;
-      }
+      const user = await userRes.json();
 
       handleLogin(user);
       navigate('/profile');
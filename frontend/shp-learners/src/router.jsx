@@ -14,6 +14,26 @@ const PasswordResetComplete = React.lazy(() => import('./pages/PasswordResetComp
 
 const BACKEND_URL = import.meta.env.VITE_APP_BACKEND_URL;
 
+function fetchJSON(url) {
+  return fetch(url, { credentials: 'include' }).then(res => {
+    if (!res.ok) {
+      throw new Error(`HTTP error! status: ${res.status}`);
+    }
+    return res.json();
+  });
+}
+
+// Lists are paginated; follow `next` until every page is in.
+async function fetchAllPages(url) {
+  const rows = [];
+  while (url) {
+    const data = await fetchJSON(url);
+    rows.push(...(data.results ?? data));
+    url = data.next ?? null;
+  }
+  return rows;
+}
+
 export default function Router({
   currentRoute,
   user,
@@ -27,16 +47,17 @@ export default function Router({
   const [enrollments, setEnrollments] = useState(initialEnrollments || []);
   const [loading, setLoading] = useState(false);
 
+  const pathSegments = currentRoute.split('/').filter(Boolean);
+  const routeSlug = (pathSegments[0] === 'course' || pathSegments[0] === 'enroll') ? pathSegments[1] : null;
+  // The course of a /course/<slug>/ or /enroll/<slug>/ page, which may not be on the first catalog page.
+  const [routeCourse, setRouteCourse] = useState(null);
+  const [routeEnrolled, setRouteEnrolled] = useState(false);
+  const [routeLoading, setRouteLoading] = useState(Boolean(routeSlug));
+
   useEffect(() => {
     setLoading(true);
-    fetch(`${BACKEND_URL}/api/courses/`, { credentials: 'include' })
-      .then(res => {
-        if (!res.ok) {
-          throw new Error(`HTTP error! status: ${res.status}`);
-        }
-        return res.json();
-      })
-      .then(data => setCourses(data))
+    fetchJSON(`${BACKEND_URL}/api/courses/`)
+      .then(data => setCourses(data.results ?? data))
       .catch(error => {
         console.error("Failed to fetch courses:", error);
       })
@@ -46,14 +67,9 @@ export default function Router({
   useEffect(() => {
     if (user) {
       setLoading(true);
-      fetch(`${BACKEND_URL}/api/enrollments/`, { credentials: 'include' })
-        .then(res => {
-          if (!res.ok) {
-            throw new Error(`HTTP error! status: ${res.status}`);
-          }
-          return res.json();
-        })
-        .then(data => setEnrollments(data))
+      // The feed only holds the logged-in user's enrollments, with a course summary.
+      fetchAllPages(`${BACKEND_URL}/api/enrollments/feed/?page_size=100&fields=id,enrolled_at,progress,course.slug,course.title`)
+        .then(setEnrollments)
         .catch(error => {
           console.error("Failed to fetch enrollments:", error);
         })
@@ -61,6 +77,37 @@ export default function Router({
     }
   }, [user]);
 
+  useEffect(() => {
+    if (!routeSlug) {
+      setRouteCourse(null);
+      setRouteEnrolled(false);
+      return;
+    }
+    let cancelled = false;
+    setRouteLoading(true);
+    const slug = encodeURIComponent(routeSlug);
+    Promise.all([
+      fetchJSON(`${BACKEND_URL}/api/courses/slug/${slug}/`).catch(() => null),
+      user
+        ? fetchJSON(`${BACKEND_URL}/api/enrollments/feed/?course=${slug}&fields=id`)
+            .then(data => (data.results ?? data).length > 0)
+            .catch(() => false)
+        : Promise.resolve(false),
+    ])
+      .then(([course, enrolled]) => {
+        if (!cancelled) {
+          setRouteCourse(course);
+          setRouteEnrolled(enrolled);
+        }
+      })
+      .finally(() => {
+        if (!cancelled) setRouteLoading(false);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [routeSlug, user]);
+
   function Redirect({ to }) {
     useEffect(() => {
       navigate(to);
@@ -68,8 +115,6 @@ export default function Router({
     return null;
   }
 
-  const pathSegments = currentRoute.split('/').filter(Boolean);
-
   if (pathSegments[0] === 'courses') {
     return <Redirect to="/" />;
   }
@@ -90,21 +135,12 @@ export default function Router({
     ComponentToRender = Home;
     componentProps = { courses, navigate };
   } else if (isCourseDetail) {
-    const slug = pathSegments[1];
-    const course = courses.find(c => c.slug === slug);
-    const isEnrolled = user
-      ? (Array.isArray(enrollments) ? enrollments : []).some(
-        e => e.student.username === user.username && e.course.slug === slug
-      )
-      : false;
+    const course = routeCourse;
+    const isEnrolled = Boolean(user) && routeEnrolled;
     ComponentToRender = course ? CourseDetail : () => <p className="text-center text-xl mt-10">Course not found.</p>;
     componentProps = { course, isEnrolled, user, navigate };
   } else if (isProfile) {
-    const userEnrollments = user
-      ? (Array.isArray(enrollments) ? enrollments : []).filter(
-        e => e.student.username === user.username
-      )
-      : [];
+    const userEnrollments = user && Array.isArray(enrollments) ? enrollments : [];
     ComponentToRender = user ? Profile : Login;
     componentProps = user ? { user, enrollments: userEnrollments, navigate } : { onLogin, navigate };
   } else if (isLogin) {
@@ -114,8 +150,7 @@ export default function Router({
     ComponentToRender = Register;
     componentProps = { navigate };
   } else if (isEnroll) {
-    const slug = pathSegments[1];
-    const course = courses.find(c => c.slug === slug);
+    const course = routeCourse;
     ComponentToRender = user && course ? Enroll : Login;
     componentProps = user && course ? { course, user, addEnrollment, navigate } : { onLogin, navigate };
   } else if (isFAQ) {
@@ -139,7 +174,8 @@ export default function Router({
     componentProps = { courses, navigate };
   }
 
-  if (loading) {
+  const routePending = routeSlug && (routeLoading || (routeCourse && routeCourse.slug !== routeSlug));
+  if (loading || routePending) {
     return <div className="text-center text-xl mt-10">Loading data...</div>;
   }
 